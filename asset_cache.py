@@ -0,0 +1,223 @@
+"""
+Content-addressed on-disk cache for downloaded source images.
+Headshots and logos are stored once per SHA-256 of their bytes; an SQLite index
+maps each (normalized) URL to its blob plus the ETag/Last-Modified validators
+the server returned. Re-renders of the same company are served from disk.
+"""
+import os
+import time
+import uuid
+import shutil
+import sqlite3
+import threading
+from typing import Dict, Optional
+
+from config import Config
+from idempotency import file_sha256, normalize_image_url
+import image_ingest
+
+
+class AssetCache:
+    """URL -> image blob cache with conditional revalidation and an LRU size cap."""
+
+    def __init__(self, directory: str, max_bytes: int, ttl_seconds: int = 86400):
+        """
+        Initialize the cache (creates the directory and index if needed).
+
+        Args:
+            directory: Cache root (blobs live in <directory>/<sha[:2]>/<sha>)
+            max_bytes: Total blob size to keep; least recently used entries are evicted beyond this
+            ttl_seconds: Entries younger than this are served without contacting the server.
+                         Older entries are revalidated with If-None-Match / If-Modified-Since.
+        """
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self.db_path = os.path.join(directory, "index.db")
+        self._local = threading.local()
+        self._counter_lock = threading.Lock()
+        self.counters = {"hits": 0, "revalidated": 0, "misses": 0, "evictions": 0, "errors": 0}
+        os.makedirs(os.path.join(directory, "tmp"), exist_ok=True)
+        self._init_db()
+
+    def _connect(self) -> sqlite3.Connection:
+        """Return a per-thread connection (sqlite3 connections are not thread-safe)."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _init_db(self):
+        self._connect().execute(
+            """
+            CREATE TABLE IF NOT EXISTS entries (
+                url_key TEXT PRIMARY KEY,
+                sha256 TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                mime TEXT,
+                etag TEXT,
+                last_modified TEXT,
+                validated_at REAL NOT NULL,
+                last_used REAL NOT NULL
+            )
+            """
+        )
+        self._connect().execute("CREATE INDEX IF NOT EXISTS idx_entries_last_used ON entries (last_used)")
+
+    def _count(self, name: str):
+        with self._counter_lock:
+            self.counters[name] += 1
+
+    @staticmethod
+    def url_key(url: str) -> str:
+        """Cache key: Drive links resolved to their file ID, signature/expiry parameters dropped."""
+        return normalize_image_url(image_ingest.normalize_drive_url(url.strip()))
+
+    def _blob_path(self, sha: str) -> str:
+        return os.path.join(self.directory, sha[:2], sha)
+
+    def _lookup(self, key: str) -> Optional[sqlite3.Row]:
+        row = self._connect().execute("SELECT * FROM entries WHERE url_key = ?", (key,)).fetchone()
+        if row is not None and not os.path.exists(self._blob_path(row["sha256"])):
+            # Blob removed behind our back (manual cleanup, another process's eviction)
+            self._connect().execute("DELETE FROM entries WHERE url_key = ?", (key,))
+            return None
+        return row
+
+    def _serve(self, key: str, sha: str, output_path: str, revalidated: bool = False):
+        shutil.copyfile(self._blob_path(sha), output_path)
+        now = time.time()
+        if revalidated:
+            self._connect().execute(
+                "UPDATE entries SET last_used = ?, validated_at = ? WHERE url_key = ?", (now, now, key)
+            )
+        else:
+            self._connect().execute("UPDATE entries SET last_used = ? WHERE url_key = ?", (now, key))
+
+    def fetch(self, url: str, output_path: str) -> str:
+        """
+        Save the image at url to output_path, from the cache when possible.
+
+        Args:
+            url: Image URL (Notion file URL, Google Drive link, any HTTP URL)
+            output_path: Path to save file
+
+        Returns:
+            output_path
+
+        Raises:
+            image_ingest.ImageIngestError: If the image has to be downloaded and that fails
+        """
+        key = self.url_key(url)
+        row = self._lookup(key)
+
+        if row is not None and time.time() - row["validated_at"] < self.ttl_seconds:
+            self._serve(key, row["sha256"], output_path)
+            self._count("hits")
+            return output_path
+
+        headers = {}
+        if row is not None:
+            if row["etag"]:
+                headers["If-None-Match"] = row["etag"]
+            if row["last_modified"]:
+                headers["If-Modified-Since"] = row["last_modified"]
+
+        tmp_path = os.path.join(self.directory, "tmp", uuid.uuid4().hex)
+        try:
+            try:
+                info = image_ingest.fetch_url(url, tmp_path, headers=headers or None)
+            except image_ingest.ImageIngestError:
+                self._count("errors")
+                raise
+            if info["status"] == 304 and row is not None:
+                self._serve(key, row["sha256"], output_path, revalidated=True)
+                self._count("revalidated")
+                return output_path
+
+            sha = file_sha256(tmp_path)
+            blob_path = self._blob_path(sha)
+            os.makedirs(os.path.dirname(blob_path), exist_ok=True)
+            if os.path.exists(blob_path):
+                os.unlink(tmp_path)
+            else:
+                os.replace(tmp_path, blob_path)
+            now = time.time()
+            self._connect().execute(
+                "INSERT OR REPLACE INTO entries "
+                "(url_key, sha256, size, mime, etag, last_modified, validated_at, last_used) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (key, sha, os.path.getsize(blob_path), info["mime"], info["etag"],
+                 info["last_modified"], now, now),
+            )
+            shutil.copyfile(blob_path, output_path)
+            self._count("misses")
+        finally:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+
+        self.evict()
+        return output_path
+
+    def total_bytes(self) -> int:
+        """Size of all distinct blobs referenced by the index."""
+        row = self._connect().execute(
+            "SELECT COALESCE(SUM(size), 0) AS total FROM (SELECT MAX(size) AS size FROM entries GROUP BY sha256)"
+        ).fetchone()
+        return row["total"]
+
+    def evict(self):
+        """Drop least recently used entries (and unreferenced blobs) until under max_bytes."""
+        conn = self._connect()
+        total = self.total_bytes()
+        if total <= self.max_bytes:
+            return
+        for row in conn.execute("SELECT url_key, sha256, size FROM entries ORDER BY last_used").fetchall():
+            if total <= self.max_bytes:
+                break
+            conn.execute("DELETE FROM entries WHERE url_key = ?", (row["url_key"],))
+            self._count("evictions")
+            still_used = conn.execute(
+                "SELECT 1 FROM entries WHERE sha256 = ? LIMIT 1", (row["sha256"],)
+            ).fetchone()
+            if still_used is None:
+                try:
+                    os.unlink(self._blob_path(row["sha256"]))
+                except FileNotFoundError:
+                    pass
+                total -= row["size"]
+
+    def stats(self) -> Dict:
+        """Hit/miss counters for this process plus current cache size."""
+        with self._counter_lock:
+            counters = dict(self.counters)
+        lookups = counters["hits"] + counters["revalidated"] + counters["misses"]
+        entries = self._connect().execute("SELECT COUNT(*) AS n FROM entries").fetchone()["n"]
+        return {
+            **counters,
+            "hit_ratio": round((counters["hits"] + counters["revalidated"]) / lookups, 3) if lookups else None,
+            "entries": entries,
+            "total_bytes": self.total_bytes(),
+            "max_bytes": self.max_bytes,
+        }
+
+
+_asset_cache = None
+_asset_cache_lock = threading.Lock()
+
+
+def get_asset_cache() -> AssetCache:
+    """Return the process-wide asset cache."""
+    global _asset_cache
+    with _asset_cache_lock:
+        if _asset_cache is None:
+            _asset_cache = AssetCache(
+                Config.ASSET_CACHE_DIR,
+                max_bytes=Config.ASSET_CACHE_MAX_BYTES,
+                ttl_seconds=Config.ASSET_CACHE_TTL_SECONDS,
+            )
+        return _asset_cache
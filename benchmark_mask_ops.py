@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""
+Background-removal mask benchmark.
+Times the previous per-pixel deque flood fill against mask_ops on the temp_test
+headshots (upscaled to headshot processing size) and checks both give the same mask.
+Also times the one-pass level map that answers every tolerance by thresholding,
+and _fix_alpha_mask's largest-blob + hole-fill step against its old Python BFS.
+
+Usage: python benchmark_mask_ops.py [--size 1500] [--runs 3] [images...]
+"""
+
+import argparse
+import glob
+import os
+import time
+from collections import deque
+
+import numpy as np
+from PIL import Image
+
+import mask_ops
+
+
+def legacy_border_flood(allowed: np.ndarray) -> np.ndarray:
+    """The flood fill previously inlined in html_slide_generator (8-neighborhood, deque)."""
+    H, W = allowed.shape
+    bg_mask = np.zeros((H, W), dtype=bool)
+    q = deque()
+
+    def push(y, x):
+        if not (0 <= y < H and 0 <= x < W):
+            return
+        if allowed[y, x] and not bg_mask[y, x]:
+            bg_mask[y, x] = True
+            q.append((y, x))
+
+    for x in range(W):
+        push(0, x); push(H - 1, x)
+    for y in range(H):
+        push(y, 0); push(y, W - 1)
+    while q:
+        y, x = q.popleft()
+        for dy in (-1, 0, 1):
+            for dx in (-1, 0, 1):
+                if dy == 0 and dx == 0:
+                    continue
+                push(y + dy, x + dx)
+    return bg_mask
+
+
+def legacy_fix_alpha_regions(fg: np.ndarray) -> np.ndarray:
+    """Largest blob + hole fill as _fix_alpha_mask previously did it (Python BFS)."""
+    H, W = fg.shape
+    visited = np.zeros((H, W), dtype=bool)
+    best_coords, best_size = None, 0
+    for y0 in range(H):
+        for x0 in range(W):
+            if fg[y0, x0] and not visited[y0, x0]:
+                q = deque([(y0, x0)])
+                visited[y0, x0] = True
+                coords = []
+                while q:
+                    y, x = q.popleft()
+                    coords.append((y, x))
+                    for dy in (-1, 0, 1):
+                        for dx in (-1, 0, 1):
+                            ny, nx = y + dy, x + dx
+                            if 0 <= ny < H and 0 <= nx < W and fg[ny, nx] and not visited[ny, nx]:
+                                visited[ny, nx] = True
+                                q.append((ny, nx))
+                if len(coords) > best_size:
+                    best_size, best_coords = len(coords), coords
+    keep = np.zeros((H, W), dtype=bool)
+    if best_coords:
+        ys, xs = zip(*best_coords)
+        keep[np.array(ys), np.array(xs)] = True
+    return keep | ~legacy_border_flood(~keep)
+
+
+def fix_alpha_regions(fg: np.ndarray) -> np.ndarray:
+    return mask_ops.fill_holes(mask_ops.largest_component(fg))
+
+
+def luminance_distance(path: str, size: int) -> np.ndarray:
+    """|luminance - border median|, as _remove_background_gray computes it."""
+    img = Image.open(path).convert("RGB")
+    img = img.resize((size, round(size * img.height / img.width)), Image.Resampling.LANCZOS)
+    arr = np.asarray(img).astype(np.float32)
+    lum = 0.299 * arr[..., 0] + 0.587 * arr[..., 1] + 0.114 * arr[..., 2]
+    H, W = lum.shape
+    bs = max(8, min(H, W) // 25)
+    border = np.concatenate([lum[:bs, :].ravel(), lum[-bs:, :].ravel(), lum[:, :bs].ravel(), lum[:, -bs:].ravel()])
+    return np.abs(lum - np.median(border))
+
+
+def best_of(fn, runs: int):
+    best, result = None, None
+    for _ in range(runs):
+        started = time.perf_counter()
+        result = fn()
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("images", nargs="*", help="Images to test (default temp_test/headshot*.png)")
+    parser.add_argument("--size", type=int, default=1500, help="Width to resize to (default 1500)")
+    parser.add_argument("--runs", type=int, default=3, help="Timed runs per method, best is reported (default 3)")
+    parser.add_argument("--tolerances", default="3,5,8,18,30", help="Comma-separated integer tolerances")
+    args = parser.parse_args()
+
+    here = os.path.dirname(os.path.abspath(__file__))
+    images = args.images or sorted(glob.glob(os.path.join(here, "temp_test", "headshot*.png")))
+    if not images:
+        raise SystemExit("No images found (pass paths or add temp_test/headshot*.png)")
+    tolerances = [int(t) for t in args.tolerances.split(",")]
+
+    print(f"{'image':28} {'tol':>5} {'removed':>8} {'legacy ms':>10} {'mask_ops ms':>12} {'speedup':>8}")
+    for path in images:
+        dist = luminance_distance(path, args.size)
+        level_s, level = best_of(lambda: mask_ops.border_level_map(dist, max(tolerances)), args.runs)
+        for t in tolerances:
+            allowed = dist <= t
+            legacy_s, legacy = best_of(lambda: legacy_border_flood(allowed), 1)
+            fast_s, fast = best_of(lambda: mask_ops.border_connected(allowed), args.runs)
+            if not np.array_equal(legacy, fast) or not np.array_equal(legacy, level <= t):
+                raise SystemExit(f"Mask mismatch on {path} at tol={t}")
+            print(f"{os.path.basename(path)[:28]:28} {t:5d} {fast.mean():8.1%} "
+                  f"{legacy_s * 1000:10.1f} {fast_s * 1000:12.1f} {legacy_s / fast_s:7.1f}x")
+        print(f"{os.path.basename(path)[:28]:28} level map for all {len(tolerances)} tolerances: {level_s * 1000:.1f} ms")
+
+        # _fix_alpha_mask on the subject left after background removal, with speckle
+        rng = np.random.default_rng(0)
+        fg = (level > min(tolerances)) | (rng.random(level.shape) < 0.002)
+        legacy_s, legacy = best_of(lambda: legacy_fix_alpha_regions(fg), 1)
+        fast_s, fast = best_of(lambda: fix_alpha_regions(fg), args.runs)
+        if not np.array_equal(legacy, fast):
+            raise SystemExit(f"_fix_alpha_mask region mismatch on {path}")
+        print(f"{os.path.basename(path)[:28]:28} _fix_alpha_mask regions: {legacy_s * 1000:.1f} ms -> "
+              f"{fast_s * 1000:.1f} ms ({legacy_s / fast_s:.1f}x)")
+    print("✅ Masks identical")
+
+
+if __name__ == "__main__":
+    main()
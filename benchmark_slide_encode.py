@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Slide PDF encode benchmark.
+Lays out a sample company on the slide template (name, text blocks, location
+label, headshot) and reports PDF size and encode time for each codec option, so
+SLIDE_IMAGE_CODEC / SLIDE_JPEG_QUALITY / SLIDE_PNG_COMPRESS_LEVEL can be chosen
+by trading deck size against render latency. Also times the vector PDF mode.
+
+Usage: python benchmark_slide_encode.py [--template PATH] [--headshot PATH] [--runs 3]
+"""
+
+import argparse
+import os
+import time
+
+from PIL import Image
+
+import slide_encode
+import slide_layers
+import template_cache
+import vector_pdf
+from config import Config
+
+
+OPTIONS = [
+    {"codec": "png", "compress_level": 1},
+    {"codec": "png", "compress_level": 6},
+    {"codec": "png", "compress_level": 9},
+    {"codec": "jpeg", "jpeg_quality": 95},
+    {"codec": "jpeg", "jpeg_quality": 85},
+    {"codec": "jpeg", "jpeg_quality": 75},
+    {"codec": "mixed", "jpeg_quality": 85},
+    {"codec": "mixed", "jpeg_quality": 75},
+]
+
+
+def sample_layers(headshot_path: str):
+    """Layers shaped like a real slide (positions from html_slide_generator)."""
+    layers = [
+        slide_layers.text((270, 120), "ACME ROBOTICS", 140, bold=True, fill=(255, 140, 0),
+                          stroke_width=1, stroke_fill=(200, 80, 30)),
+        slide_layers.text_block((320, 415), ["Jane Doe", "John Smith"], 28, line_height=35, fill=(255, 255, 255)),
+        slide_layers.text_block((650, 415), ["Alpha Ventures", "Beta Capital"], 28, line_height=35, fill=(255, 255, 255)),
+        slide_layers.text_block(
+            (320, 650),
+            ["Builds autonomous robots for warehouses and", "logistics companies across the country, with",
+             "a focus on safety and uptime."],
+            32, line_height=36, fill=(255, 255, 255),
+        ),
+    ]
+    label = Image.new('RGBA', (130, 50), (255, 215, 0, 255))
+    layers.append(slide_layers.Layer(label, (1560, 300), [
+        slide_layers.RectOp((0, 0, 129, 49), (255, 215, 0)),
+        slide_layers.TextOp(["Austin"], (24, 12), 32, bold=True, stroke_width=1, stroke_fill=(0, 0, 0)),
+    ]))
+    if headshot_path and os.path.exists(headshot_path):
+        headshot = Image.open(headshot_path).convert('RGBA').resize((500, 500), Image.Resampling.LANCZOS)
+        layers.append(slide_layers.Layer(headshot, (1310, 615)))
+    return layers
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    here = os.path.dirname(os.path.abspath(__file__))
+    parser.add_argument("--template", default=Config.SLIDE_TEMPLATE_PATH or os.path.join(here, "SLAUSON&CO.Template.pdf"),
+                        help="Slide template (default SLIDE_TEMPLATE_PATH or SLAUSON&CO.Template.pdf)")
+    parser.add_argument("--headshot", default=os.path.join(here, "temp_test", "headshot_placeholder.png"),
+                        help="Headshot image for the photo layer")
+    parser.add_argument("--runs", type=int, default=3, help="Timed runs per option, best is reported (default 3)")
+    args = parser.parse_args()
+
+    template = template_cache.get_template(args.template)
+    base = slide_layers.SlideBase(template, (1250, 110, 620, 450), {})
+    layers = sample_layers(args.headshot)
+    slide = slide_layers.compose(base, layers)
+
+    print(f"{'codec':8} {'quality':>8} {'level':>6} {'size KB':>9} {'encode ms':>10}")
+    for option in OPTIONS:
+        best, size = None, 0
+        for _ in range(args.runs):
+            started = time.perf_counter()
+            size = len(slide_encode.encode_slide(base, layers, slide=slide, **option))
+            elapsed = time.perf_counter() - started
+            best = elapsed if best is None else min(best, elapsed)
+        print(f"{option['codec']:8} {option.get('jpeg_quality', '-'):>8} {option.get('compress_level', '-'):>6} "
+              f"{size / 1024:9.0f} {best * 1000:10.1f}")
+
+    best, size = None, 0
+    for _ in range(args.runs):
+        started = time.perf_counter()
+        size = len(vector_pdf.render_slide(base, layers, args.template))
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    print(f"{'vector':8} {'-':>8} {'-':>6} {size / 1024:9.0f} {best * 1000:10.1f}")
+
+
+if __name__ == "__main__":
+    main()
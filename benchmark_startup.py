@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+Startup benchmark for the web app.
+Imports webhook_listener in fresh interpreters under `python -X importtime` and
+reports cold-start wall time, baseline RSS and the slowest imports.
+
+Usage: python benchmark_startup.py [--runs N] [--module NAME] [--top N] [--json out.json]
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+# Printed by the child after the import so RSS reflects the loaded app only
+_CHILD_CODE = """
+import resource, sys
+import {module}
+rss_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+print("RSS_KB", rss_kb, "MODULES", len(sys.modules))
+"""
+
+
+def parse_importtime(stderr: str):
+    """
+    Parse `-X importtime` output.
+
+    Args:
+        stderr: Child stderr
+
+    Returns:
+        Dict of module -> cumulative microseconds, for top-level imports and
+        their direct children (deeper imports are already counted in those)
+    """
+    cumulative = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        parts = line[len("import time:"):].split("|")
+        if len(parts) != 3:
+            continue
+        try:
+            cumulative_us = int(parts[1])
+        except ValueError:
+            continue
+        # Each nesting level adds two spaces after the single separator space
+        name = parts[2].rstrip()
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        if depth <= 1:
+            cumulative[name.strip()] = cumulative.get(name.strip(), 0) + cumulative_us
+    return cumulative
+
+
+def run_once(module: str):
+    """Import the module in a fresh interpreter; returns (wall_s, rss_mb, modules, importtime dict)."""
+    env = dict(os.environ, PYTHONDONTWRITEBYTECODE="0")
+    started = time.perf_counter()
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", _CHILD_CODE.format(module=module)],
+        capture_output=True, text=True, env=env, cwd=os.path.dirname(os.path.abspath(__file__)),
+    )
+    wall = time.perf_counter() - started
+    if proc.returncode != 0:
+        raise RuntimeError(f"Importing {module} failed:\n{proc.stderr[-2000:]}")
+    fields = proc.stdout.split()
+    rss_kb = int(fields[fields.index("RSS_KB") + 1])
+    modules = int(fields[fields.index("MODULES") + 1])
+    # ru_maxrss is kilobytes on Linux, bytes on macOS
+    rss_mb = rss_kb / (1024 * 1024) if sys.platform == "darwin" else rss_kb / 1024
+    return wall, rss_mb, modules, parse_importtime(proc.stderr)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5, help="Fresh interpreters to start (default 5)")
+    parser.add_argument("--module", default="webhook_listener", help="Module to import (default webhook_listener)")
+    parser.add_argument("--top", type=int, default=15, help="Slowest imports to list (default 15)")
+    parser.add_argument("--json", dest="json_path", help="Also write the results to this JSON file")
+    args = parser.parse_args()
+
+    # First run warms the bytecode and filesystem caches; it is reported separately
+    print(f"🚀 Benchmarking `import {args.module}` ({args.runs} runs + 1 warm-up)")
+    first_wall, first_rss, _, _ = run_once(args.module)
+
+    walls, rsss, totals = [], [], []
+    per_module = {}
+    modules = 0
+    for _ in range(max(1, args.runs)):
+        wall, rss, modules, imports = run_once(args.module)
+        walls.append(wall)
+        rsss.append(rss)
+        totals.append(imports.get(args.module, sum(imports.values())) / 1e6)
+        for name, us in imports.items():
+            per_module.setdefault(name, []).append(us / 1e6)
+
+    top = sorted(((statistics.median(v), k) for k, v in per_module.items() if k != args.module), reverse=True)[:args.top]
+
+    print(f"   First run:          {first_wall * 1000:.0f} ms wall, {first_rss:.1f} MB RSS")
+    print(f"   Wall (median):      {statistics.median(walls) * 1000:.0f} ms (min {min(walls) * 1000:.0f}, max {max(walls) * 1000:.0f})")
+    print(f"   Import (median):    {statistics.median(totals) * 1000:.0f} ms cumulative for {args.module}")
+    print(f"   Baseline RSS:       {statistics.median(rsss):.1f} MB")
+    print(f"   Modules loaded:     {modules}")
+    print("   Slowest imports:")
+    for seconds, name in top:
+        print(f"     {seconds * 1000:8.1f} ms  {name}")
+
+    if args.json_path:
+        result = {
+            "module": args.module,
+            "python": sys.version.split()[0],
+            "runs": len(walls),
+            "first_run_wall_ms": round(first_wall * 1000, 1),
+            "wall_ms_median": round(statistics.median(walls) * 1000, 1),
+            "wall_ms_min": round(min(walls) * 1000, 1),
+            "import_ms_median": round(statistics.median(totals) * 1000, 1),
+            "rss_mb_median": round(statistics.median(rsss), 1),
+            "modules_loaded": modules,
+            "top_imports_ms": {name: round(seconds * 1000, 1) for seconds, name in top},
+        }
+        with open(args.json_path, "w") as f:
+            json.dump(result, f, indent=2)
+        print(f"✅ Results written to {args.json_path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -43,6 +43,11 @@ class Config:
     # Slide Template
     SLIDE_TEMPLATE_PATH = os.getenv("SLIDE_TEMPLATE_PATH")  # Path to template slide image
     MAP_TEMPLATE_PATH = os.getenv("MAP_TEMPLATE_PATH")  # Path to map template PDF
+    TEMPLATE_CACHE_DIR = os.getenv("TEMPLATE_CACHE_DIR", os.path.join(".cache", "templates"))  # Rasterized templates ("" = memory only)
+    SLIDE_PDF_MODE = os.getenv("SLIDE_PDF_MODE", "raster").lower()  # "raster" (full-page bitmap) or "vector" (template page + PDF text)
+    SLIDE_IMAGE_CODEC = os.getenv("SLIDE_IMAGE_CODEC", "png").lower()  # Raster PDFs: "png" (lossless), "jpeg" or "mixed"
+    SLIDE_JPEG_QUALITY = int(os.getenv("SLIDE_JPEG_QUALITY", "90"))  # For "jpeg" and "mixed"
+    SLIDE_PNG_COMPRESS_LEVEL = int(os.getenv("SLIDE_PNG_COMPRESS_LEVEL", "6"))  # zlib 0 (fastest) - 9 (smallest)
     
     # Google Drive
     GOOGLE_DRIVE_CREDENTIALS_JSON = os.getenv("GOOGLE_DRIVE_CREDENTIALS_JSON")  # JSON string of credentials
@@ -52,6 +57,58 @@ class Config:
     GOOGLE_DRIVE_STATIC_FILE_ID = os.getenv("GOOGLE_DRIVE_STATIC_FILE_ID")  # Optional: File ID of SlidesGen.pdf (for DocSend)
     GOOGLE_DRIVE_STATIC_FILE_NAME = os.getenv("GOOGLE_DRIVE_STATIC_FILE_NAME")  # Optional: Filename to search for (e.g., "SlidesGen.pdf")
     
+    # Onboarding job queue (background processing of /webhook/onboarding)
+    JOB_QUEUE_PATH = os.getenv("JOB_QUEUE_PATH", "jobs.db")  # SQLite file holding queued payloads
+    JOB_WORKERS = int(os.getenv("JOB_WORKERS", "2"))  # Background worker threads per process
+    JOB_LEASE_SECONDS = int(os.getenv("JOB_LEASE_SECONDS", "900"))  # Re-queue jobs stuck "running" longer than this (must exceed the slowest run)
+    JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", "3"))  # Fail a job instead of re-queuing it after this many expired leases
+    ONBOARDING_SYNC = os.getenv("ONBOARDING_SYNC", "false").lower() == "true"  # Run workflow inside the request (debugging)
+    
+    # Image ingestion (headshot/logo downloads)
+    IMAGE_FETCH_CONNECT_TIMEOUT = float(os.getenv("IMAGE_FETCH_CONNECT_TIMEOUT", "5"))  # Seconds
+    IMAGE_FETCH_READ_TIMEOUT = float(os.getenv("IMAGE_FETCH_READ_TIMEOUT", "20"))  # Seconds between bytes
+    IMAGE_MAX_BYTES = int(os.getenv("IMAGE_MAX_BYTES", str(25 * 1024 * 1024)))  # Per-image size cap
+    IMAGE_FETCH_CONCURRENCY = int(os.getenv("IMAGE_FETCH_CONCURRENCY", "4"))  # Parallel downloads per job
+    
+    # Request bodies and multipart uploads to /webhook/onboarding
+    MAX_REQUEST_BYTES = int(os.getenv("MAX_REQUEST_BYTES", str(80 * 1024 * 1024)))  # Larger bodies get 413
+    UPLOAD_DIR = os.getenv("UPLOAD_DIR", os.path.join(".cache", "uploads"))  # Uploaded images kept until their job runs
+    UPLOAD_RETENTION_SECONDS = int(os.getenv("UPLOAD_RETENTION_SECONDS", str(7 * 86400)))
+    
+    PIPELINE_WORKERS = int(os.getenv("PIPELINE_WORKERS", "4"))  # Concurrent onboarding stages per job
+    BATCH_RENDER_PROCESSES = int(os.getenv("BATCH_RENDER_PROCESSES", "2"))  # Render processes for /webhook/onboarding/batch
+    BATCH_MAX_COMPANIES = int(os.getenv("BATCH_MAX_COMPANIES", "50"))
+    
+    WARMUP_ENABLED = os.getenv("WARMUP_ENABLED", "true").lower() == "true"  # Preload templates/fonts/models per worker
+    
+    # Downloaded image cache (content-addressed, LRU size cap)
+    ASSET_CACHE_ENABLED = os.getenv("ASSET_CACHE_ENABLED", "true").lower() == "true"
+    ASSET_CACHE_DIR = os.getenv("ASSET_CACHE_DIR", os.path.join(".cache", "assets"))
+    ASSET_CACHE_MAX_BYTES = int(os.getenv("ASSET_CACHE_MAX_BYTES", str(500 * 1024 * 1024)))
+    ASSET_CACHE_TTL_SECONDS = int(os.getenv("ASSET_CACHE_TTL_SECONDS", "86400"))  # Serve without revalidating for this long
+    
+    # Local background removal (rembg U²-Net on onnxruntime; one session per worker process)
+    SEGMENTATION_MODEL = os.getenv("SEGMENTATION_MODEL", "u2net")  # u2net, u2netp, u2net_human_seg or silueta
+    SEGMENTATION_INTRA_OP_THREADS = int(os.getenv("SEGMENTATION_INTRA_OP_THREADS", "0"))  # 0 = one per core
+    SEGMENTATION_INTER_OP_THREADS = int(os.getenv("SEGMENTATION_INTER_OP_THREADS", "1"))
+    SEGMENTATION_MAX_BATCH = int(os.getenv("SEGMENTATION_MAX_BATCH", "4"))  # Headshots per model run
+    BG_REMOVAL_HEDGE = os.getenv("BG_REMOVAL_HEDGE", "true").lower() == "true"  # Race rembg against remove.bg/OpenAI
+    BG_REMOVAL_DEADLINE_SECONDS = float(os.getenv("BG_REMOVAL_DEADLINE_SECONDS", "20"))  # Then fall back to flood fill
+    BG_REMOVAL_STAGGER_SECONDS = float(os.getenv("BG_REMOVAL_STAGGER_SECONDS", "6"))  # Before the next paid API joins the race (0 = all at once)
+    BG_REMOVAL_WORKERS = int(os.getenv("BG_REMOVAL_WORKERS", "4"))  # Threads for concurrent strategy calls
+    BG_REMOVAL_ADAPTIVE = os.getenv("BG_REMOVAL_ADAPTIVE", "true").lower() == "true"  # Order/disable strategies by live stats
+    BG_REMOVAL_STATS_PATH = os.getenv("BG_REMOVAL_STATS_PATH", os.path.join(".cache", "bg_removal.db"))
+    BG_REMOVAL_WINDOW = int(os.getenv("BG_REMOVAL_WINDOW", "50"))  # Recent calls kept per strategy
+    BG_REMOVAL_MIN_SAMPLES = int(os.getenv("BG_REMOVAL_MIN_SAMPLES", "5"))  # Before a strategy is reordered/disabled
+    BG_REMOVAL_DISABLE_BELOW = float(os.getenv("BG_REMOVAL_DISABLE_BELOW", "0.2"))  # Acceptance rate
+    BG_REMOVAL_COOLDOWN_SECONDS = int(os.getenv("BG_REMOVAL_COOLDOWN_SECONDS", "900"))  # Then one retry
+    SEGMENTATION_PROXY_SIZE = int(os.getenv("SEGMENTATION_PROXY_SIZE", "0"))  # Segment at this size, guided-upsample the mask (0 = full size)
+    
+    # Background-removal results (keyed by source pixels + method, LRU size cap)
+    CUTOUT_CACHE_ENABLED = os.getenv("CUTOUT_CACHE_ENABLED", "true").lower() == "true"
+    CUTOUT_CACHE_DIR = os.getenv("CUTOUT_CACHE_DIR", os.path.join(".cache", "cutouts"))
+    CUTOUT_CACHE_MAX_BYTES = int(os.getenv("CUTOUT_CACHE_MAX_BYTES", str(200 * 1024 * 1024)))
+    
     # Granola (Future)
     GRANOLA_API_KEY = os.getenv("GRANOLA_API_KEY")
     
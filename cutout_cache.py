@@ -0,0 +1,265 @@
+"""
+On-disk cache of background-removal results.
+Each cutout is keyed by the SHA-256 of the source image's decoded pixels plus
+the method (removebg, openai, rembg, floodfill) and the parameters it ran with,
+and stored as an RGBA PNG with its alpha statistics in an SQLite index. Rejected
+cutouts are kept too, so a re-render of the same founder skips straight past
+methods that already failed the alpha check instead of paying for them again.
+The index also remembers which method's cutout a photo ended up with, so a
+re-render reuses that one even when other methods' cutouts were cached since.
+"""
+import hashlib
+import io
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Dict, Optional, Tuple, Union
+
+import numpy as np
+from PIL import Image
+
+from config import Config
+
+
+AlphaStats = Tuple[float, float, float]
+
+
+def alpha_stats(image: Image.Image) -> AlphaStats:
+    """Return (opaque_frac, transparent_frac, mean_alpha) of an RGBA image."""
+    a = np.asarray(image.getchannel('A'), dtype=np.uint8)
+    return float((a > 200).mean()), float((a < 10).mean()), float(a.mean())
+
+
+def pixel_sha256(image: Image.Image) -> str:
+    """SHA-256 of decoded pixels (mode and size included), independent of file format and metadata."""
+    digest = hashlib.sha256(f"{image.mode}:{image.size[0]}x{image.size[1]}:".encode())
+    digest.update(image.tobytes())
+    return digest.hexdigest()
+
+
+def source_sha256(path: str) -> str:
+    """pixel_sha256 of the image file at path, decoded as RGBA."""
+    with Image.open(path) as image:
+        return pixel_sha256(image.convert("RGBA"))
+
+
+class CutoutCache:
+    """(source pixels, method, params) -> RGBA cutout cache with an LRU size cap."""
+
+    def __init__(self, directory: str, max_bytes: int):
+        """
+        Initialize the cache (creates the directory and index if needed).
+
+        Args:
+            directory: Cache root (cutouts live in <directory>/<key[:2]>/<key>.png)
+            max_bytes: Total PNG size to keep; least recently used cutouts are evicted beyond this
+        """
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.db_path = os.path.join(directory, "index.db")
+        self._local = threading.local()
+        self._counter_lock = threading.Lock()
+        self.counters = {"hits": 0, "misses": 0, "stores": 0, "evictions": 0}
+        os.makedirs(os.path.join(directory, "tmp"), exist_ok=True)
+        self._init_db()
+
+    def _connect(self) -> sqlite3.Connection:
+        """Return a per-thread connection (sqlite3 connections are not thread-safe)."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _init_db(self):
+        self._connect().execute(
+            """
+            CREATE TABLE IF NOT EXISTS cutouts (
+                key TEXT PRIMARY KEY,
+                source_sha256 TEXT NOT NULL,
+                method TEXT NOT NULL,
+                params TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                opaque REAL NOT NULL,
+                transparent REAL NOT NULL,
+                mean_alpha REAL NOT NULL,
+                created_at REAL NOT NULL,
+                last_used REAL NOT NULL
+            )
+            """
+        )
+        self._connect().execute("CREATE INDEX IF NOT EXISTS idx_cutouts_last_used ON cutouts (last_used)")
+        self._connect().execute(
+            """
+            CREATE TABLE IF NOT EXISTS winners (
+                source_sha256 TEXT NOT NULL,
+                context TEXT NOT NULL,
+                method TEXT NOT NULL,
+                updated_at REAL NOT NULL,
+                PRIMARY KEY (source_sha256, context)
+            )
+            """
+        )
+
+    def _count(self, name: str):
+        with self._counter_lock:
+            self.counters[name] += 1
+
+    @staticmethod
+    def key(source_sha: str, method: str, params: Optional[Dict] = None) -> str:
+        """Cache key for a source image, method name and method parameters."""
+        material = json.dumps([source_sha, method, params or {}], sort_keys=True, separators=(",", ":"))
+        return hashlib.sha256(material.encode()).hexdigest()
+
+    def _blob_path(self, key: str) -> str:
+        return os.path.join(self.directory, key[:2], key + ".png")
+
+    def get(self, source_sha: str, method: str, params: Optional[Dict] = None
+            ) -> Optional[Tuple[Image.Image, AlphaStats]]:
+        """
+        Cached cutout for (source_sha, method, params).
+
+        Returns:
+            (RGBA image, alpha stats) or None on a miss
+        """
+        key = self.key(source_sha, method, params)
+        conn = self._connect()
+        row = conn.execute("SELECT * FROM cutouts WHERE key = ?", (key,)).fetchone()
+        if row is not None:
+            try:
+                image = Image.open(self._blob_path(key))
+                image.load()
+            except (OSError, ValueError):
+                # Blob removed behind our back (manual cleanup, another process's eviction) or truncated
+                conn.execute("DELETE FROM cutouts WHERE key = ?", (key,))
+                row = None
+        if row is None:
+            self._count("misses")
+            return None
+        conn.execute("UPDATE cutouts SET last_used = ? WHERE key = ?", (time.time(), key))
+        self._count("hits")
+        return image.convert("RGBA"), (row["opaque"], row["transparent"], row["mean_alpha"])
+
+    def put(self, source_sha: str, method: str, params: Optional[Dict],
+            cutout: Union[Image.Image, bytes]) -> AlphaStats:
+        """
+        Store a cutout (an image, or encoded image bytes as an API returned them).
+
+        Returns:
+            Alpha stats of the cutout
+        """
+        if isinstance(cutout, (bytes, bytearray)):
+            image = Image.open(io.BytesIO(cutout)).convert("RGBA")
+            data = bytes(cutout) if cutout[:8] == b"\x89PNG\r\n\x1a\n" else None
+        else:
+            image = cutout.convert("RGBA")
+            data = None
+        if data is None:
+            buffer = io.BytesIO()
+            image.save(buffer, format="PNG", compress_level=1)  # Written once, decoded on every hit
+            data = buffer.getvalue()
+        stats = alpha_stats(image)
+
+        key = self.key(source_sha, method, params)
+        blob_path = self._blob_path(key)
+        tmp_path = os.path.join(self.directory, "tmp", uuid.uuid4().hex)
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.makedirs(os.path.dirname(blob_path), exist_ok=True)
+        os.replace(tmp_path, blob_path)
+        now = time.time()
+        self._connect().execute(
+            "INSERT OR REPLACE INTO cutouts "
+            "(key, source_sha256, method, params, size, opaque, transparent, mean_alpha, created_at, last_used) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (key, source_sha, method, json.dumps(params or {}, sort_keys=True), len(data), *stats, now, now),
+        )
+        self._count("stores")
+        self.evict()
+        return stats
+
+    def winner(self, source_sha: str, context: Dict) -> Optional[str]:
+        """Method whose cutout was used for this source the last time it was processed in context."""
+        row = self._connect().execute(
+            "SELECT method FROM winners WHERE source_sha256 = ? AND context = ?",
+            (source_sha, json.dumps(context, sort_keys=True)),
+        ).fetchone()
+        return row["method"] if row is not None else None
+
+    def set_winner(self, source_sha: str, context: Dict, method: str):
+        """
+        Remember which method's cutout was used for a source.
+
+        Args:
+            source_sha: pixel_sha256 of the source image
+            context: What the choice depended on (e.g. the strategies offered and their params)
+            method: Winning method
+        """
+        self._connect().execute(
+            "INSERT OR REPLACE INTO winners (source_sha256, context, method, updated_at) VALUES (?, ?, ?, ?)",
+            (source_sha, json.dumps(context, sort_keys=True), method, time.time()),
+        )
+
+    def total_bytes(self) -> int:
+        row = self._connect().execute("SELECT COALESCE(SUM(size), 0) AS total FROM cutouts").fetchone()
+        return row["total"]
+
+    def evict(self):
+        """Drop least recently used cutouts until under max_bytes."""
+        conn = self._connect()
+        total = self.total_bytes()
+        if total <= self.max_bytes:
+            return
+        for row in conn.execute("SELECT key, source_sha256, method, size FROM cutouts ORDER BY last_used").fetchall():
+            if total <= self.max_bytes:
+                break
+            conn.execute("DELETE FROM cutouts WHERE key = ?", (row["key"],))
+            conn.execute("DELETE FROM winners WHERE source_sha256 = ? AND method = ?",
+                         (row["source_sha256"], row["method"]))
+            try:
+                os.unlink(self._blob_path(row["key"]))
+            except FileNotFoundError:
+                pass
+            total -= row["size"]
+            self._count("evictions")
+
+    def stats(self) -> Dict:
+        """Hit/miss counters for this process plus current cache size."""
+        with self._counter_lock:
+            counters = dict(self.counters)
+        lookups = counters["hits"] + counters["misses"]
+        conn = self._connect()
+        entries = conn.execute("SELECT COUNT(*) AS n FROM cutouts").fetchone()["n"]
+        by_method = {
+            row["method"]: row["n"]
+            for row in conn.execute("SELECT method, COUNT(*) AS n FROM cutouts GROUP BY method")
+        }
+        return {
+            **counters,
+            "hit_ratio": round(counters["hits"] / lookups, 3) if lookups else None,
+            "entries": entries,
+            "entries_by_method": by_method,
+            "total_bytes": self.total_bytes(),
+            "max_bytes": self.max_bytes,
+        }
+
+
+_cutout_cache = None
+_cutout_cache_lock = threading.Lock()
+
+
+def get_cutout_cache() -> Optional[CutoutCache]:
+    """Return the process-wide cutout cache, or None when CUTOUT_CACHE_ENABLED is off."""
+    global _cutout_cache
+    if not Config.CUTOUT_CACHE_ENABLED:
+        return None
+    with _cutout_cache_lock:
+        if _cutout_cache is None:
+            _cutout_cache = CutoutCache(Config.CUTOUT_CACHE_DIR, max_bytes=Config.CUTOUT_CACHE_MAX_BYTES)
+        return _cutout_cache
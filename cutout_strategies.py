@@ -0,0 +1,283 @@
+"""
+Hedged execution and adaptive ordering of background-removal strategies.
+Instead of waiting out each remote provider before trying the next, the local
+model and the first paid provider for a headshot start at once on a shared
+thread pool and the first result that passes the quality gate wins. Further
+paid providers join the race after a stagger delay, or as soon as the one
+before them fails, so a photo normally costs one paid call. Losers that have
+not started are cancelled; ones already running are left to finish in the
+background (their results still land in the cutout cache) and are ignored.
+
+StrategyScheduler keeps a rolling window of each strategy's latency and
+acceptance in a local SQLite file shared by all worker processes, orders
+strategies by expected time to an acceptable cutout, and benches strategies
+that keep failing (remove.bg out of credits, OpenAI returning nothing) for a
+cooldown before probing them again.
+"""
+import os
+import sqlite3
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Callable, Dict, Hashable, List, Optional, Sequence, Tuple, Union
+
+from config import Config
+
+
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def executor() -> ThreadPoolExecutor:
+    """Process-wide pool for strategy calls (created on first use, after gunicorn forks)."""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=max(2, Config.BG_REMOVAL_WORKERS),
+                                           thread_name_prefix="bg-removal")
+        return _executor
+
+
+def pick(future: Future, key: Hashable) -> Future:
+    """
+    Future for one entry of the dict another future returns (e.g. one photo's
+    result from a batched model run), so it can be raced on its own.
+    """
+    derived = Future()
+
+    def resolve(source: Future):
+        if derived.cancelled():
+            return
+        try:
+            if source.cancelled():
+                derived.cancel()
+            elif source.exception() is not None:
+                derived.set_exception(source.exception())
+            else:
+                derived.set_result(source.result().get(key))
+        except Exception:
+            pass  # Derived future was cancelled by the race meanwhile
+
+    future.add_done_callback(resolve)
+    return derived
+
+
+def first_acceptable(candidates: Dict[str, Union[Future, Callable[[], Future]]], accept: Callable[[object], bool],
+                     deadline: float, started: float, label: str = "", stagger: float = 0.0
+                     ) -> Optional[Tuple[str, object, float]]:
+    """
+    Wait for the first candidate whose result passes accept.
+
+    Args:
+        candidates: Strategy name -> future of its result (None = no result), or a
+            callable that starts the strategy and returns its future. Callables go last
+            and are started in order, each once stagger seconds have passed since the
+            entry before it started or as soon as that entry finished without winning.
+            When several finish together, earlier entries win
+        accept: Quality gate for a result
+        deadline: time.perf_counter() value to give up at
+        started: time.perf_counter() value the strategies were started at (for latency)
+        label: What is being processed, for the log line
+        stagger: Seconds between deferred starts
+
+    Returns:
+        (strategy name, result, seconds since started) or None if nothing acceptable
+        finished before the deadline
+    """
+    pending = {name: c for name, c in candidates.items() if isinstance(c, Future)}
+    deferred = [(name, c) for name, c in candidates.items() if not isinstance(c, Future)]
+    last_started, last_name = started, next(reversed(pending), None)
+    try:
+        while pending or deferred:
+            now = time.perf_counter()
+            remaining = deadline - now
+            if remaining <= 0:
+                print(f"   {label}: no acceptable cutout within the deadline (still running: {', '.join(pending)})")
+                return None
+            if deferred and (last_name not in pending or now - last_started >= stagger):
+                last_name, launch = deferred.pop(0)
+                pending[last_name] = launch()
+                last_started = now
+                print(f"   {label}: starting {last_name} after {(now - started) * 1000:.0f} ms")
+                continue
+            timeout = min(remaining, last_started + stagger - now) if deferred else remaining
+            done, _ = wait(list(pending.values()), timeout=timeout, return_when=FIRST_COMPLETED)
+            for name, future in list(pending.items()):
+                if future not in done:
+                    continue
+                del pending[name]
+                try:
+                    result = future.result()
+                except Exception as e:
+                    print(f"   {label}: {name} failed: {e}")
+                    continue
+                if result is not None and accept(result):
+                    elapsed = time.perf_counter() - started
+                    print(f"   {label}: {name} won after {elapsed * 1000:.0f} ms")
+                    return name, result, elapsed
+        return None
+    finally:
+        for future in pending.values():
+            future.cancel()
+
+
+class StrategyScheduler:
+    """Rolling per-strategy latency/acceptance stats that decide strategy order."""
+
+    def __init__(self, db_path: str, window: int = 50, min_samples: int = 5,
+                 disable_below: float = 0.2, cooldown_seconds: float = 900):
+        """
+        Initialize the scheduler (creates the state file if needed).
+
+        Args:
+            db_path: SQLite state file
+            window: Outcomes kept per strategy
+            min_samples: Outcomes needed before a strategy is reordered or disabled
+            disable_below: Acceptance rate under which a strategy that just failed is disabled
+            cooldown_seconds: How long a disabled strategy is skipped before it is tried again
+        """
+        self.db_path = db_path
+        self.window = max(1, window)
+        self.min_samples = max(1, min_samples)
+        self.disable_below = disable_below
+        self.cooldown_seconds = cooldown_seconds
+        self._local = threading.local()
+        self._init_db()
+
+    def _connect(self) -> sqlite3.Connection:
+        """Return a per-thread connection (sqlite3 connections are not thread-safe)."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            directory = os.path.dirname(os.path.abspath(self.db_path))
+            os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _init_db(self):
+        self._connect().execute(
+            """
+            CREATE TABLE IF NOT EXISTS outcomes (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                strategy TEXT NOT NULL,
+                at REAL NOT NULL,
+                seconds REAL NOT NULL,
+                accepted INTEGER NOT NULL
+            )
+            """
+        )
+        self._connect().execute("CREATE INDEX IF NOT EXISTS idx_outcomes_strategy ON outcomes (strategy, id)")
+
+    def record(self, strategy: str, seconds: float, accepted: bool):
+        """Record one strategy call (cache hits are not calls) and trim its window."""
+        try:
+            conn = self._connect()
+            conn.execute(
+                "INSERT INTO outcomes (strategy, at, seconds, accepted) VALUES (?, ?, ?, ?)",
+                (strategy, time.time(), float(seconds), int(bool(accepted))),
+            )
+            conn.execute(
+                "DELETE FROM outcomes WHERE strategy = ? AND id NOT IN "
+                "(SELECT id FROM outcomes WHERE strategy = ? ORDER BY id DESC LIMIT ?)",
+                (strategy, strategy, self.window),
+            )
+        except sqlite3.Error as e:
+            print(f"Warning: Could not record {strategy} outcome: {e}")
+
+    def _summary(self, strategy: str, rows: List[sqlite3.Row]) -> Dict:
+        now = time.time()
+        samples = len(rows)
+        accepted = sum(row["accepted"] for row in rows)
+        rate = accepted / samples if samples else None
+        mean = sum(row["seconds"] for row in rows) / samples if samples else None
+        disabled_until = None
+        if samples >= self.min_samples and rate < self.disable_below and not rows[-1]["accepted"]:
+            until = rows[-1]["at"] + self.cooldown_seconds
+            if until > now:
+                disabled_until = until
+        # Expected seconds until an acceptable cutout when this strategy is tried first
+        expected = mean / max(rate, 0.01) if samples >= self.min_samples else None
+        return {
+            "samples": samples,
+            "acceptance_rate": round(rate, 3) if rate is not None else None,
+            "mean_ms": round(mean * 1000, 1) if mean is not None else None,
+            "expected_ms": round(expected * 1000, 1) if expected is not None else None,
+            "disabled_until": disabled_until,
+            "_expected": expected,
+        }
+
+    def summaries(self, strategies: Optional[Sequence[str]] = None) -> Dict[str, Dict]:
+        """Window summary per strategy (every recorded strategy if none are named)."""
+        try:
+            rows = self._connect().execute("SELECT * FROM outcomes ORDER BY id").fetchall()
+        except sqlite3.Error as e:
+            print(f"Warning: Could not read background removal stats: {e}")
+            rows = []
+        by_strategy: Dict[str, List[sqlite3.Row]] = {name: [] for name in (strategies or [])}
+        for row in rows:
+            if strategies is None or row["strategy"] in by_strategy:
+                by_strategy.setdefault(row["strategy"], []).append(row)
+        return {name: self._summary(name, strategy_rows) for name, strategy_rows in by_strategy.items()}
+
+    def order(self, strategies: Sequence[str]) -> List[str]:
+        """
+        Enabled strategies, fastest expected acceptable result first.
+        Strategies with fewer than min_samples outcomes go first (so they get
+        measured); ties keep the given order.
+        """
+        summaries = self.summaries(strategies)
+        enabled = [name for name in strategies if summaries[name]["disabled_until"] is None]
+        skipped = [name for name in strategies if name not in enabled]
+        if skipped:
+            print(f"   Skipping background removal strategies with low acceptance: {', '.join(skipped)}")
+        return sorted(enabled, key=lambda name: summaries[name]["_expected"] or 0.0)
+
+    def stats(self) -> Dict:
+        """Per-strategy window stats for /stats/bg-removal."""
+        summaries = self.summaries()
+        for summary in summaries.values():
+            summary.pop("_expected")
+        return {
+            "window": self.window,
+            "min_samples": self.min_samples,
+            "disable_below": self.disable_below,
+            "cooldown_seconds": self.cooldown_seconds,
+            "strategies": summaries,
+        }
+
+
+_scheduler: Optional[StrategyScheduler] = None
+_scheduler_lock = threading.Lock()
+
+
+def get_scheduler() -> Optional[StrategyScheduler]:
+    """Return the process-wide strategy scheduler, or None when BG_REMOVAL_ADAPTIVE is off."""
+    global _scheduler
+    if not Config.BG_REMOVAL_ADAPTIVE:
+        return None
+    with _scheduler_lock:
+        if _scheduler is None:
+            _scheduler = StrategyScheduler(
+                Config.BG_REMOVAL_STATS_PATH,
+                window=Config.BG_REMOVAL_WINDOW,
+                min_samples=Config.BG_REMOVAL_MIN_SAMPLES,
+                disable_below=Config.BG_REMOVAL_DISABLE_BELOW,
+                cooldown_seconds=Config.BG_REMOVAL_COOLDOWN_SECONDS,
+            )
+        return _scheduler
+
+
+def record(strategy: str, seconds: float, accepted: bool):
+    """Record a strategy call with the scheduler, if adaptive ordering is on."""
+    scheduler = get_scheduler()
+    if scheduler is not None:
+        scheduler.record(strategy, seconds, accepted)
+
+
+def order(strategies: Sequence[str]) -> List[str]:
+    """Strategies in adaptive order without disabled ones (unchanged if adaptive ordering is off)."""
+    scheduler = get_scheduler()
+    return scheduler.order(strategies) if scheduler is not None else list(strategies)
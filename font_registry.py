@@ -0,0 +1,115 @@
+"""
+Process-wide font registry.
+Discovers usable font files once per process (fontconfig, bundled Linux fonts,
+then macOS fonts for local development) and memoizes ImageFont.truetype objects
+by (path, size), so slide rendering never spawns fc-list or re-parses a font file.
+"""
+import os
+import subprocess
+import threading
+from typing import Dict, List, Optional, Tuple
+
+from PIL import ImageFont
+
+
+# Preferred bundled fonts on Linux containers (Render uses these)
+_LINUX_BOLD = [
+    "/usr/share/fonts/truetype/dejavu/DejaVuSans-Bold.ttf",
+    "/usr/share/fonts/truetype/liberation/LiberationSans-Bold.ttf",
+]
+_LINUX_REGULAR = [
+    "/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf",
+    "/usr/share/fonts/truetype/liberation/LiberationSans-Regular.ttf",
+]
+# macOS fonts (for local development only)
+_MACOS_BOLD = [
+    "/System/Library/Fonts/Helvetica-Bold.ttf",
+    "/System/Library/Fonts/Arial Bold.ttf",
+]
+_MACOS_REGULAR = [
+    "/System/Library/Fonts/Helvetica.ttc",
+    "/System/Library/Fonts/Arial.ttf",
+]
+
+_candidates: Dict[bool, List[str]] = {}  # bold -> existing font files, best first
+_resolved: Dict[bool, Optional[str]] = {}  # bold -> first file truetype could open (None: PIL default)
+_fonts: Dict[Tuple[Optional[str], int], ImageFont.ImageFont] = {}  # (path, size) -> font
+_lock = threading.RLock()
+
+
+def _fontconfig_matches() -> Dict[bool, List[str]]:
+    """DejaVu/Liberation files known to fontconfig, split into bold and regular."""
+    matches = {True: [], False: []}
+    try:
+        result = subprocess.run(['fc-list'], capture_output=True, text=True, timeout=1)
+    except Exception:
+        return matches  # Fontconfig not available, continue with hardcoded paths
+    if result.returncode != 0:
+        return matches
+    for line in result.stdout.split('\n'):
+        if 'DejaVu' in line or 'Liberation' in line:
+            font_path = line.split(':')[0] if ':' in line else None
+            if font_path and os.path.exists(font_path):
+                matches['Bold' in font_path].insert(0, font_path)
+    return matches
+
+
+def candidates(bold: bool = False) -> List[str]:
+    """Existing font files for the weight, best first (discovered once per process)."""
+    with _lock:
+        if not _candidates:
+            discovered = _fontconfig_matches()
+            for weight in (True, False):
+                ordered = list(discovered[weight])
+                if weight:
+                    ordered += _LINUX_BOLD
+                ordered += _LINUX_REGULAR
+                if weight:
+                    ordered += _MACOS_BOLD
+                ordered += _MACOS_REGULAR
+                _candidates[weight] = [p for p in dict.fromkeys(ordered) if os.path.exists(p)]
+        return _candidates[bold]
+
+
+def font_path(bold: bool = False) -> Optional[str]:
+    """The font file used for the weight, or None when only PIL's default font is available."""
+    with _lock:
+        if bold not in _resolved:
+            _resolved[bold] = None
+            for path in candidates(bold):
+                try:
+                    truetype(path, 10)
+                except Exception:
+                    continue  # Silently continue to next candidate
+                _resolved[bold] = path
+                break
+            if _resolved[bold] is None:
+                print("Warning: Could not load custom font, using default font")
+        return _resolved[bold]
+
+
+def truetype(path: Optional[str], size: int) -> ImageFont.ImageFont:
+    """Memoized ImageFont.truetype(path, size); path None gives PIL's default font."""
+    key = (path, size)
+    font = _fonts.get(key)
+    if font is None:
+        with _lock:
+            font = _fonts.get(key)
+            if font is None:
+                font = ImageFont.truetype(path, size) if path else ImageFont.load_default()
+                _fonts[key] = font
+    return font
+
+
+def get_font(size: int, bold: bool = False) -> ImageFont.ImageFont:
+    """
+    Font of the given pixel size and weight with robust fallbacks that work on Render.
+
+    Args:
+        size: Font size in pixels
+        bold: Bold weight
+
+    Returns:
+        Cached FreeTypeFont (or PIL's default font if no font file is usable)
+    """
+    return truetype(font_path(bold), size)
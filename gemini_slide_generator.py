@@ -3,11 +3,12 @@ Google Gemini API integration for generating portfolio slides.
 Uses template image as base and replaces only text/images while preserving styling.
 """
 import io
-import base64
 from typing import Dict, Optional, Tuple
-from PIL import Image, ImageDraw, ImageFont, ImageFilter
+from PIL import Image, ImageDraw
 import img2pdf
 from config import Config
+import template_cache
+import font_registry
 import os
 import numpy as np
 from collections import Counter
@@ -117,20 +118,6 @@ class GeminiSlideGenerator:
         color_counts = Counter([p[:3] for p in pixels])
         return color_counts.most_common(1)[0][0]
     
-    def _pdf_to_image(self, pdf_path: str) -> Image.Image:
-        """Convert first page of PDF to PIL Image."""
-        try:
-            from pdf2image import convert_from_path
-            images = convert_from_path(pdf_path, dpi=300, first_page=1, last_page=1)
-            if images:
-                return images[0].convert('RGBA')
-        except ImportError:
-            raise ImportError(
-                "pdf2image required for PDF templates. Install with: pip install pdf2image"
-            )
-        except Exception as e:
-            raise Exception(f"Failed to convert PDF to image: {e}")
-    
     def _get_text_color_from_template(self, template: Image.Image, x: int, y: int, width: int, height: int) -> Tuple[int, int, int]:
         """Extract text color from template by finding brightest/darkest pixels in region."""
         region = template.crop((x, y, x + width, y + height))
@@ -173,17 +160,8 @@ class GeminiSlideGenerator:
                 f"Please set SLIDE_TEMPLATE_PATH in .env to point to your template image file."
             )
         
-        # Load template (PDF or image)
-        template_ext = os.path.splitext(self.template_path)[1].lower()
-        if template_ext == '.pdf':
-            # Convert PDF to image
-            template = self._pdf_to_image(self.template_path)
-        else:
-            # Load as image
-            template = Image.open(self.template_path).convert('RGBA')
-        # Resize to standard slide size if needed
-        if template.size != (1920, 1080):
-            template = template.resize((1920, 1080), Image.Resampling.LANCZOS)
+        # Load template (PDF or image), rasterized at 1920x1080 and cached per process
+        template = template_cache.get_template(self.template_path)
         
         # Create a copy to work with
         slide = template.copy()
@@ -191,24 +169,11 @@ class GeminiSlideGenerator:
         
         width, height = slide.size
         
-        # Load fonts with better size matching
-        try:
-            # Try to match template font sizes more precisely
-            name_font = ImageFont.truetype("/System/Library/Fonts/Helvetica.ttc", 120)  # Large for company name
-            body_font = ImageFont.truetype("/System/Library/Fonts/Helvetica.ttc", 28)  # Body text
-            small_font = ImageFont.truetype("/System/Library/Fonts/Helvetica.ttc", 20)  # Small labels
-            sidebar_font = ImageFont.truetype("/System/Library/Fonts/Helvetica.ttc", 28)  # Sidebar
-        except:
-            try:
-                name_font = ImageFont.truetype("/System/Library/Fonts/Arial.ttf", 120)
-                body_font = ImageFont.truetype("/System/Library/Fonts/Arial.ttf", 28)
-                small_font = ImageFont.truetype("/System/Library/Fonts/Arial.ttf", 20)
-                sidebar_font = ImageFont.truetype("/System/Library/Fonts/Arial.ttf", 28)
-            except:
-                name_font = ImageFont.load_default()
-                body_font = ImageFont.load_default()
-                small_font = ImageFont.load_default()
-                sidebar_font = ImageFont.load_default()
+        # Load fonts with better size matching (shared, cached registry)
+        name_font = font_registry.get_font(120)  # Large for company name
+        body_font = font_registry.get_font(28)  # Body text
+        small_font = font_registry.get_font(20)  # Small labels
+        sidebar_font = font_registry.get_font(28)  # Sidebar
         
         # 1. Replace company name (top, large orange text)
         company_name = company_data.get('name', '').upper()
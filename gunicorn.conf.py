@@ -0,0 +1,19 @@
+"""
+Gunicorn settings, read automatically from the working directory.
+Command-line flags in Procfile/render.yaml/railway.json still take precedence.
+"""
+
+
+def post_worker_init(worker):
+    """
+    Start each worker's job-queue threads and warm it after the app is loaded
+    (fork-safe: nothing is shared with the master).
+    """
+    from config import Config
+    if not Config.ONBOARDING_SYNC:
+        # Drain jobs left queued by a restart or another process without waiting for a request
+        import webhook_listener
+        webhook_listener.get_job_queue()
+    if Config.WARMUP_ENABLED:
+        import warmup
+        warmup.start_background_warmup()
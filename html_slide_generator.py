@@ -4,14 +4,27 @@ Uses Canva PDF or image template and overlays text/images using PIL.
 Supports both PDF and image templates (JPG, PNG, etc.)
 """
 import os
-from typing import Dict, Optional
+import time
+from typing import Dict, List, Optional, Tuple
 import io
-from PIL import Image, ImageDraw, ImageFont, ImageFilter, ImageEnhance
+from PIL import Image, ImageDraw, ImageFilter, ImageEnhance
 import hashlib
-import img2pdf
 from collections import Counter
 import numpy as np
+import functools
 from functools import lru_cache
+import template_cache
+import font_registry
+import text_fit
+import text_render
+import slide_layers
+import vector_pdf
+import slide_encode
+import mask_ops
+import cutout_cache
+import segmentation
+import cutout_strategies
+from idempotency import file_sha256
 
 # PPTX support for editable Canva designs
 try:
@@ -31,10 +44,15 @@ except TypeError:
         return _original_md5(data) if data is not None else _original_md5()
     hashlib.md5 = _patched_md5
 
+# OpenAI images.edit request for background removal (also part of its cutout cache key)
+_OPENAI_CUTOUT_PARAMS = {
+    "model": "gpt-image-1",
+    "prompt": "Remove the background; return transparent PNG of the person.",
+    "size": "1024x1024",
+}
+
+
 class HTMLSlideGenerator:
-    # Class-level cache for rembg session (avoids reloading model on every request)
-    _rembg_session = None
-    
     def __init__(self):
         from config import Config
         
@@ -106,83 +124,16 @@ class HTMLSlideGenerator:
     def _load_font(self, size: int, bold: bool = False):
         """
         Load a font with robust fallbacks that work on Render.
-        Tries common system fonts, then DejaVu (available in most containers), then default.
+        Fonts are discovered once and cached per (path, size) for the life of the process (see font_registry.py).
         """
-        font_candidates = []
-        # Preferred bundled fonts on Linux containers (Render uses these)
-        if bold:
-            font_candidates.append("/usr/share/fonts/truetype/dejavu/DejaVuSans-Bold.ttf")
-            font_candidates.append("/usr/share/fonts/truetype/liberation/LiberationSans-Bold.ttf")
-        font_candidates.append("/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf")
-        font_candidates.append("/usr/share/fonts/truetype/liberation/LiberationSans-Regular.ttf")
-        # Try to find fonts via fontconfig (common on Linux)
-        try:
-            import subprocess
-            result = subprocess.run(['fc-list'], capture_output=True, text=True, timeout=1)
-            if result.returncode == 0:
-                # Look for DejaVu or Liberation in font list
-                for line in result.stdout.split('\n'):
-                    if 'DejaVu' in line or 'Liberation' in line:
-                        font_path = line.split(':')[0] if ':' in line else None
-                        if font_path and os.path.exists(font_path):
-                            if bold and 'Bold' in font_path:
-                                font_candidates.insert(0, font_path)
-                            elif not bold and 'Bold' not in font_path:
-                                font_candidates.insert(0, font_path)
-        except Exception:
-            pass  # Fontconfig not available, continue with hardcoded paths
-        
-        # macOS fonts (for local development only)
-        if bold:
-            font_candidates.append("/System/Library/Fonts/Helvetica-Bold.ttf")
-            font_candidates.append("/System/Library/Fonts/Arial Bold.ttf")
-        font_candidates.append("/System/Library/Fonts/Helvetica.ttc")
-        font_candidates.append("/System/Library/Fonts/Arial.ttf")
-
-        for path in font_candidates:
-            try:
-                if os.path.exists(path) or not os.path.isabs(path):
-                    # Only check existence for absolute paths
-                    return ImageFont.truetype(path, size)
-            except (OSError, IOError, Exception) as e:
-                # Silently continue to next candidate
-                continue
-        
-        # Final fallback - always works
-        print(f"Warning: Could not load custom font, using default font for size {size}")
-        return ImageFont.load_default()
+        return font_registry.get_font(size, bold)
     
-    def _pdf_to_image(self, pdf_path: str) -> Image.Image:
-        """Convert first page of PDF to PIL Image."""
-        try:
-            from pdf2image import convert_from_path
-            images = convert_from_path(pdf_path, dpi=300, first_page=1, last_page=1)
-            if images:
-                return images[0].convert('RGBA')
-        except ImportError:
-            # Fallback: try PyPDF2 + extract images
-            try:
-                from PyPDF2 import PdfReader
-                reader = PdfReader(pdf_path)
-                page = reader.pages[0]
-                # Try to extract images from PDF
-                if '/XObject' in page['/Resources']:
-                    xObject = page['/Resources']['/XObject'].get_object()
-                    for obj in xObject:
-                        if xObject[obj]['/Subtype'] == '/Image':
-                            # Extract image data
-                            data = xObject[obj].get_data()
-                            img = Image.open(io.BytesIO(data))
-                            return img.convert('RGBA')
-                # If no images found, render PDF as image using alternative method
-                raise ImportError("pdf2image required for PDF templates")
-            except Exception as e:
-                raise ImportError(
-                    f"Could not convert PDF to image. Please install pdf2image: pip install pdf2image. "
-                    f"Error: {e}"
-                )
-        except Exception as e:
-            raise Exception(f"Failed to convert PDF to image: {e}")
+    def _load_template_image(self, template_path: str) -> Image.Image:
+        """
+        Load the slide template as a 1920x1080 RGBA image the caller may draw on.
+        Rasterized once at that size and cached in memory and on disk (see template_cache.py).
+        """
+        return template_cache.load_template(template_path)
     
     def _get_dominant_color(self, img: Image.Image, region: tuple, exclude_colors: list = None) -> tuple:
         """Get dominant color in a region."""
@@ -245,45 +196,20 @@ class HTMLSlideGenerator:
         br = np.median(rgb[H - corner_size:H, W - corner_size:W].reshape(-1, 3), axis=0)
         bgs = np.stack([tl, tr, bl, br], axis=0).astype(np.int16)
 
-        def compute_close_mask(t):
-            diffs = rgb[None, ...] - bgs[:, None, None, :]
-            dist2 = (diffs * diffs).sum(axis=3)  # (4,H,W)
-            dist = np.sqrt(dist2.min(axis=0))    # (H,W)
-            return dist <= t
+        # Distance to the nearest corner background color
+        diffs = rgb[None, ...] - bgs[:, None, None, :]
+        dist2 = (diffs.astype(np.int32) ** 2).sum(axis=3)  # (4,H,W)
+        dist = np.sqrt(dist2.min(axis=0))    # (H,W)
 
         tol_candidates = [tol, 45, 55, 65, 75] if tol < 45 else [tol, tol + 10, tol + 20]
         best = None
 
-        from collections import deque
+        # Tolerance at which each pixel joins the edge-seeded 8-neighborhood flood fill,
+        # so each candidate below is just a threshold
+        level = mask_ops.border_level_map(dist, max(tol_candidates))
 
         for t in tol_candidates:
-            close = compute_close_mask(t)
-
-            bg_mask = np.zeros((H, W), dtype=bool)
-            q = deque()
-
-            def push(y, x):
-                # Check bounds FIRST before accessing arrays
-                if not (0 <= y < H and 0 <= x < W):
-                    return
-                if close[y, x] and not bg_mask[y, x]:
-                    bg_mask[y, x] = True
-                    q.append((y, x))
-
-            # seed edges
-            for x in range(W):
-                push(0, x); push(H - 1, x)
-            for y in range(H):
-                push(y, 0); push(y, W - 1)
-
-            # 8-neighborhood flood fill
-            while q:
-                y, x = q.popleft()
-                for dy in (-1, 0, 1):
-                    for dx in (-1, 0, 1):
-                        if dy == 0 and dx == 0:
-                            continue
-                        push(y + dy, x + dx)
+            bg_mask = level <= t
 
             removed_frac = bg_mask.mean()
             if 0.05 <= removed_frac <= 0.80:
@@ -349,39 +275,12 @@ class HTMLSlideGenerator:
         center_protection = np.zeros((H, W), dtype=bool)
         center_protection[center_y_start:center_y_end, center_x_start:center_x_end] = True
 
-        from collections import deque
+        # Only flood from borders; CRITICAL: never into the center region (protects subject).
+        # One level map serves every tolerance tried below (all <= 30)
+        level = mask_ops.border_level_map(dist, 30, barrier=center_protection)
 
         def flood(t):
-            close = dist <= t
-            bg_mask = np.zeros((H, W), dtype=bool)
-            q = deque()
-
-            def push(y, x):
-                # Check bounds FIRST before accessing arrays
-                if not (0 <= y < H and 0 <= x < W):
-                    return
-                # CRITICAL: Don't flood into center region (protects subject)
-                if center_protection[y, x]:
-                    return
-                if close[y, x] and not bg_mask[y, x]:
-                    bg_mask[y, x] = True
-                    q.append((y, x))
-
-            # Only start flood from borders (not center)
-            for x in range(W):
-                push(0, x); push(H - 1, x)
-            for y in range(H):
-                push(y, 0); push(y, W - 1)
-
-            while q:
-                y, x = q.popleft()
-                for dy in (-1, 0, 1):
-                    for dx in (-1, 0, 1):
-                        if dy == 0 and dx == 0:
-                            continue
-                        push(y + dy, x + dx)
-
-            return bg_mask
+            return level <= t
 
         # More aggressive tolerance to match rembg performance (40-50% removal for headshots)
         tol_candidates = [8, 12, 15, 18, 20, 25, 30]
@@ -453,50 +352,29 @@ class HTMLSlideGenerator:
 
     def _alpha_stats(self, im: Image.Image):
         """Return (opaque_frac, transparent_frac, mean_alpha)."""
-        a = np.array(im.split()[-1], dtype=np.uint8)
-        opaque = (a > 200).mean()
-        transparent = (a < 10).mean()
-        return float(opaque), float(transparent), float(a.mean())
+        return cutout_cache.alpha_stats(im)
 
     def _remove_bg_rembg(self, rgba_img: Image.Image) -> Optional[Image.Image]:
         """
-        Local ML segmentation using rembg (minimal, no post-processing).
-        Uses cached session to avoid reloading model on every request.
+        Local ML segmentation using rembg's U²-Net (minimal, no post-processing).
+        Runs on the process-wide segmentation service (see segmentation.py).
         """
-        try:
-            import warnings
-            # Suppress onnxruntime GPU warnings (Render doesn't have GPU)
-            warnings.filterwarnings('ignore', category=UserWarning, module='onnxruntime')
-            
-            from rembg import remove, new_session
-            
-            # Use cached session if available, otherwise create new one
-            if HTMLSlideGenerator._rembg_session is None:
-                # Suppress stderr during model loading to reduce log noise
-                import sys
-                import os
-                old_stderr = sys.stderr
-                devnull = open(os.devnull, 'w')
-                try:
-                    sys.stderr = devnull
-                    HTMLSlideGenerator._rembg_session = new_session('u2net')
-                finally:
-                    sys.stderr = old_stderr
-                    devnull.close()
-                print("   rembg session initialized (model loaded)")
-
-            buf = io.BytesIO()
-            rgba_img.save(buf, format="PNG")
-            input_data = buf.getvalue()
-
-            out = remove(input_data, session=HTMLSlideGenerator._rembg_session)
+        return self._remove_bg_rembg_batch([rgba_img])[0]
 
-            out_img = Image.open(io.BytesIO(out)).convert("RGBA")
-            out_img.load()
-            return out_img
+    def _remove_bg_rembg_batch(self, rgba_imgs) -> List[Optional[Image.Image]]:
+        """
+        _remove_bg_rembg for several images in one batched model run.
+        Entries are None if rembg/onnxruntime is unavailable or inference fails.
+        """
+        if not rgba_imgs:
+            return []
+        try:
+            service = segmentation.get_segmentation_service()
+            cutouts = service.cutouts([np.asarray(im.convert("RGBA")) for im in rgba_imgs])
+            return [Image.fromarray(cutout, "RGBA") for cutout in cutouts]
         except Exception as e:
             print(f"   rembg failed: {e}")
-            return None
+            return [None] * len(rgba_imgs)
 
     def _to_grayscale_preserve_alpha(self, img: Image.Image) -> Image.Image:
         """
@@ -564,13 +442,7 @@ class HTMLSlideGenerator:
             client = OpenAI(api_key=api_key)
             # Important: pass a file handle so mimetype is recognized (not octet-stream)
             with open(path, "rb") as f:
-                resp = client.images.edit(
-                    model="gpt-image-1",
-                    image=f,
-                    prompt="Remove the background; return transparent PNG of the person.",
-                    size="1024x1024",
-                    output_format="png",
-                )
+                resp = client.images.edit(image=f, output_format="png", **_OPENAI_CUTOUT_PARAMS)
 
             if not resp or not getattr(resp, "data", None):
                 return None
@@ -640,65 +512,17 @@ class HTMLSlideGenerator:
             print("   _fix_alpha_mask: fg still too small, skipping")
             return img
 
-        visited = np.zeros((H, W), dtype=bool)
-        best_coords = None
-        best_size = 0
-        from collections import deque
-
-        for y0 in range(H):
-            for x0 in range(W):
-                if fg[y0, x0] and not visited[y0, x0]:
-                    q = deque([(y0, x0)])
-                    visited[y0, x0] = True
-                    coords = []
-                    while q:
-                        y, x = q.popleft()
-                        coords.append((y, x))
-                        for dy in (-1, 0, 1):
-                            for dx in (-1, 0, 1):
-                                if dy == 0 and dx == 0:
-                                    continue
-                                ny, nx = y + dy, x + dx
-                                if 0 <= ny < H and 0 <= nx < W and fg[ny, nx] and not visited[ny, nx]:
-                                    visited[ny, nx] = True
-                                    q.append((ny, nx))
-                    if len(coords) > best_size:
-                        best_size = len(coords)
-                        best_coords = coords
+        # Largest 8-connected foreground blob
+        keep = mask_ops.largest_component(fg)
+        best_size = int(keep.sum())
 
         # If we failed to find a component (or it's tiny), don't touch the image
-        if not best_coords or best_size < int(0.01 * H * W):
+        if not best_size or best_size < int(0.01 * H * W):
             print(f"   _fix_alpha_mask: best component too small ({best_size}), skipping")
             return img
 
-        keep = np.zeros((H, W), dtype=bool)
-        ys, xs = zip(*best_coords)
-        keep[np.array(ys), np.array(xs)] = True
-
         # Fill holes: background regions not connected to border
-        bg = ~keep
-        hole = bg.copy()
-        q = deque()
-
-        def push(y, x):
-            if 0 <= y < H and 0 <= x < W and hole[y, x]:
-                hole[y, x] = False
-                q.append((y, x))
-
-        for x in range(W):
-            push(0, x); push(H - 1, x)
-        for y in range(H):
-            push(y, 0); push(y, W - 1)
-
-        while q:
-            y, x = q.popleft()
-            for dy in (-1, 0, 1):
-                for dx in (-1, 0, 1):
-                    if dy == 0 and dx == 0:
-                        continue
-                    push(y + dy, x + dx)
-
-        filled = keep | hole
+        filled = mask_ops.fill_holes(keep)
 
         new_a = a.copy()
         new_a[~filled] = 0
@@ -758,58 +582,310 @@ class HTMLSlideGenerator:
         img.putalpha(a)
         return img
 
+    def _lookup_cutout(self, source_sha: Optional[str], method: str, params: Dict):
+        """Cached (cutout, alpha stats) for a method, or None (also when the cache is off or failing)."""
+        cache = cutout_cache.get_cutout_cache() if source_sha else None
+        if cache is None:
+            return None
+        try:
+            cached = cache.get(source_sha, method, params)
+        except Exception as e:
+            print(f"   Cutout cache lookup failed: {e}")
+            return None
+        if cached is not None:
+            print(f"   Using cached {method} cutout")
+        return cached
+
+    def _store_cutout(self, source_sha: Optional[str], method: str, params: Dict, out: Image.Image):
+        """Cache a method's cutout; returns (cutout, alpha stats)."""
+        cache = cutout_cache.get_cutout_cache() if source_sha else None
+        if cache is not None:
+            try:
+                return out, cache.put(source_sha, method, params, out)
+            except Exception as e:
+                print(f"   Could not cache {method} cutout: {e}")
+        return out, self._alpha_stats(out)
+
+    def _cached_cutout(self, source_sha: Optional[str], method: str, params: Dict, run, store: bool = True):
+        """
+        Run one background-removal method through the cutout cache.
+
+        Args:
+            source_sha: cutout_cache.pixel_sha256 of the source image (None skips the cache)
+            method: Method name for the cache key
+            params: Everything besides the source pixels that changes the method's output
+            run: Callable returning the cutout image, or None if the method is unavailable/failed
+            store: False when run caches its own result (remove.bg via ImageProcessor)
+
+        Returns:
+            (cutout, alpha stats), or None if the method produced nothing
+        """
+        cached = self._lookup_cutout(source_sha, method, params)
+        if cached is not None:
+            return cached
+        started = time.perf_counter()
+        out = run()
+        if out is None:
+            cutout_strategies.record(method, time.perf_counter() - started, False)
+            return None
+        if store:
+            result = self._store_cutout(source_sha, method, params, out)
+        else:
+            result = out, self._alpha_stats(out)
+        cutout_strategies.record(method, time.perf_counter() - started, self._cutout_acceptable(result))
+        return result
+
+    def _uses_proxy(self, img: Image.Image, proxy_size: int) -> bool:
+        """Whether local segmentation of img runs on a proxy (and its mask is guided-upsampled back)."""
+        return 0 < proxy_size < max(img.size)
+
+    def _segmentation_proxy(self, img: Image.Image, proxy_size: int) -> Image.Image:
+        """img downscaled to fit proxy_size for local segmentation (img itself if proxy_size is 0 or larger)."""
+        if not self._uses_proxy(img, proxy_size):
+            return img
+        proxy = img.copy()
+        proxy.thumbnail((proxy_size, proxy_size), Image.Resampling.BOX)
+        return proxy
+
+    def _upsample_cutout(self, img: Image.Image, cutout: Image.Image) -> Image.Image:
+        """
+        img with the alpha of a proxy-resolution cutout, upsampled edge-aware
+        (guided by img's luminance). Returns cutout unchanged if it is already full size.
+        """
+        if cutout.size == img.size:
+            return cutout
+        alpha = mask_ops.guided_upsample(np.asarray(cutout.getchannel("A")), np.asarray(img.convert("L")))
+        out = img.convert("RGBA")
+        out.putalpha(Image.fromarray(alpha, "L"))
+        return out
+
+    def _cutout_acceptable(self, result) -> bool:
+        """Quality gate for a (cutout, alpha stats) result: enough subject kept and enough background removed."""
+        o, t, _ = result[1]
+        return o > 0.10 and t > 0.10
+
+    def _cutout_removebg(self, path: str, source_sha: Optional[str]):
+        """remove.bg through the cutout cache: (cutout, alpha stats) or None."""
+        def run():
+            from image_processor import ImageProcessor
+            print(f"   Removing background via API for {path} ...")
+            b = ImageProcessor.remove_background(path, source_sha=source_sha)
+            if not b:
+                return None
+            api_img = Image.open(io.BytesIO(b)).convert("RGBA")
+            api_img.load()
+            return api_img
+
+        try:
+            from image_processor import REMOVEBG_PARAMS
+            result = self._cached_cutout(source_sha, "removebg", REMOVEBG_PARAMS, run, store=False)
+        except Exception as e:
+            print(f"   API removal failed: {e}")
+            return None
+        if result is not None:
+            o, t, ma = result[1]
+            print(f"   API alpha stats: opaque={o:.2f}, transp={t:.2f}, meanA={ma:.0f}")
+        return result
+
+    def _cutout_openai(self, path: str, source_sha: Optional[str]):
+        """OpenAI images.edit through the cutout cache: (cutout, alpha stats) or None."""
+        result = self._cached_cutout(source_sha, "openai", _OPENAI_CUTOUT_PARAMS, lambda: self._remove_bg_openai(path))
+        if result is not None:
+            o, t, ma = result[1]
+            print(f"   OpenAI alpha stats: opaque={o:.2f}, transp={t:.2f}, meanA={ma:.0f}")
+        return result
+
+    def _cutouts_rembg(self, items, params: Dict, proxy_size: int) -> Dict[int, tuple]:
+        """
+        Local rembg for several photos: cached cutouts first, then one model run for the rest.
+
+        Args:
+            items: (key, downscaled image, source sha) per photo
+            params: Cache parameters of the local methods
+            proxy_size: SEGMENTATION_PROXY_SIZE
+
+        Returns:
+            key -> (cutout, alpha stats) for the photos that produced a cutout
+        """
+        results = {}
+        misses = []
+        for key, img, source_sha in items:
+            cached = self._lookup_cutout(source_sha, "rembg", params)
+            if cached is not None:
+                results[key] = cached
+            else:
+                misses.append((key, img, source_sha))
+        started = time.perf_counter()
+        proxies = [self._segmentation_proxy(img, proxy_size) for _, img, _ in misses]
+        for (key, img, source_sha), out in zip(misses, self._remove_bg_rembg_batch(proxies)):
+            if out is not None:
+                results[key] = self._store_cutout(source_sha, "rembg", params, self._upsample_cutout(img, out))
+        for key, _, _ in misses:
+            # Every photo in the batch waited for the whole run
+            accepted = key in results and self._cutout_acceptable(results[key])
+            cutout_strategies.record("rembg", time.perf_counter() - started, accepted)
+        for key, (_, (o, t, ma)) in results.items():
+            print(f"   rembg alpha stats: opaque={o:.2f}, transp={t:.2f}, meanA={ma:.0f}")
+        return results
+
+    def _cutout_floodfill(self, img: Image.Image, source_sha: Optional[str], params: Dict, proxy_size: int):
+        """Conservative flood fill for studio backgrounds (protects center/subject): (cutout, alpha stats)."""
+        result = self._cached_cutout(
+            source_sha, "floodfill", {"tol": 8, "feather": 1, **params},
+            lambda: self._upsample_cutout(
+                img, self._remove_background_gray(self._segmentation_proxy(img, proxy_size), tol=8, feather=1)
+            ),
+        )
+        o, t, ma = result[1]
+        print(f"   floodfill alpha stats: opaque={o:.2f}, transp={t:.2f}, meanA={ma:.0f}")
+        return result
+
     def _remove_bg_best_effort(self, path: str, use_api: bool) -> Image.Image:
         """
         Best-effort background removal:
         1) remove.bg API if available
         2) local rembg segmentation
         3) conservative grayscale flood-fill as last resort
+        Every method's result (accepted or not) is kept in the cutout cache, so
+        the same photo never goes through a paid API or the model twice.
         """
-        img = Image.open(path).convert("RGBA")
-        img.load()
+        return self._remove_bg_best_effort_batch([path], use_api)[0][0]
 
-        # Downscale before anything expensive
-        max_size = 1500
-        if max(img.size) > max_size:
-            img.thumbnail((max_size, max_size), Image.Resampling.LANCZOS)
+    def _remove_bg_best_effort_batch(self, paths, use_api: bool,
+                                     source_shas: Optional[List[str]] = None) -> List[Tuple[Image.Image, bool, str]]:
+        """
+        _remove_bg_best_effort for several headshots. Photos that need local
+        segmentation go through the model together in one batched run.
+        With BG_REMOVAL_HEDGE (default) rembg starts right away and races the
+        remote providers; otherwise methods are tried one after another.
 
-        # 1) remove.bg API (if available)
-        if use_api:
-            try:
-                from image_processor import ImageProcessor
-                print(f"   Removing background via API for {path} ...")
-                b = ImageProcessor.remove_background(path)
-                if b:
-                    api_img = Image.open(io.BytesIO(b)).convert("RGBA")
-                    api_img.load()
-                    o, t, ma = self._alpha_stats(api_img)
-                    print(f"   API alpha stats: opaque={o:.2f}, transp={t:.2f}, meanA={ma:.0f}")
-                    if o > 0.10 and t > 0.10:
-                        return api_img
-            except Exception as e:
-                print(f"   API removal failed: {e}")
+        Args:
+            paths: Headshot files
+            use_api: Whether remove.bg may be used
+            source_shas: cutout_cache.source_sha256 per path, if the caller already has them
 
-        # 2) OpenAI images.edit (optional, if key + SDK available) — now a backup
-        openai_img = self._remove_bg_openai(path)
-        if openai_img is not None:
-            o, t, ma = self._alpha_stats(openai_img)
-            print(f"   OpenAI alpha stats: opaque={o:.2f}, transp={t:.2f}, meanA={ma:.0f}")
-            if o > 0.10 and t > 0.10:
-                return openai_img
+        Returns:
+            (cutout, edges_fitted, method) per path; edges_fitted is True when the cutout
+            came from a proxy-resolution mask whose edges the guided upsampling already
+            fitted to the photo (no further edge refinement needed); method is the
+            strategy whose cutout passed the quality gate, or "floodfill" for the last resort
+        """
+        from config import Config
+        max_size = 1500
+        sources = []  # (downscaled image, source sha) per photo
+        for i, path in enumerate(paths):
+            img = Image.open(path).convert("RGBA")
+            img.load()
 
-        # 3) local rembg
-        rembg_img = self._remove_bg_rembg(img)
-        if rembg_img is not None:
-            o, t, ma = self._alpha_stats(rembg_img)
-            print(f"   rembg alpha stats: opaque={o:.2f}, transp={t:.2f}, meanA={ma:.0f}")
-            if o > 0.10 and t > 0.10:
-                return rembg_img
+            source_sha = None
+            if cutout_cache.get_cutout_cache() is not None:
+                source_sha = source_shas[i] if source_shas else cutout_cache.pixel_sha256(img)
 
-        # 4) Last resort: conservative flood-fill for studio backgrounds (protects center/subject)
-        ff = self._remove_background_gray(img, tol=8, feather=1)
-        o, t, ma = self._alpha_stats(ff)
-        print(f"   floodfill alpha stats: opaque={o:.2f}, transp={t:.2f}, meanA={ma:.0f}")
-        return ff
+            # Downscale before anything expensive
+            if max(img.size) > max_size:
+                img.thumbnail((max_size, max_size), Image.Resampling.LANCZOS)
+            sources.append((img, source_sha))
+
+        # Local methods can run on a small proxy, with the mask upsampled by a guided filter
+        proxy_size = Config.SEGMENTATION_PROXY_SIZE
+        local_params = {"max_size": max_size}
+        if proxy_size > 0:
+            local_params["proxy_size"] = proxy_size
+        rembg_params = {"model": segmentation.get_segmentation_service().model, **local_params}
+
+        # Default preference: 1) remove.bg API (if available), 2) OpenAI images.edit
+        # (optional, if key + SDK available), 3) local rembg; reordered by live stats
+        strategies = (["removebg"] if use_api else []) + ["openai", "rembg"]
+        from image_processor import REMOVEBG_PARAMS
+        params = {"removebg": REMOVEBG_PARAMS, "openai": _OPENAI_CUTOUT_PARAMS, "rembg": rembg_params}
+        context = {name: params[name] for name in strategies}
+        results = [None] * len(paths)
+        methods = [None] * len(paths)
+
+        # Re-renders: reuse the cutout that won last time (whichever strategy would finish first now)
+        cache = cutout_cache.get_cutout_cache()
+        for i, (_, source_sha) in enumerate(sources):
+            try:
+                name = cache.winner(source_sha, context) if cache is not None and source_sha else None
+            except Exception as e:
+                print(f"   Cutout cache lookup failed: {e}")
+                name = None
+            cached = self._lookup_cutout(source_sha, name, params[name]) if name else None
+            if cached is not None and self._cutout_acceptable(cached):
+                results[i], methods[i] = cached[0], name
+
+        todo = [i for i in range(len(paths)) if results[i] is None]
+        if todo and Config.BG_REMOVAL_HEDGE:
+            self._remove_bg_hedged(paths, sources, todo, strategies, rembg_params, proxy_size, results, methods)
+        elif todo:
+            pending = todo
+            for name in cutout_strategies.order(strategies):
+                if not pending:
+                    break
+                if name == "rembg":
+                    # One model run for every photo still without a cutout
+                    tried = self._cutouts_rembg([(i, *sources[i]) for i in pending], rembg_params, proxy_size)
+                else:
+                    run = self._cutout_removebg if name == "removebg" else self._cutout_openai
+                    tried = {i: run(paths[i], sources[i][1]) for i in pending}
+                for i, result in tried.items():
+                    if result is not None and self._cutout_acceptable(result):
+                        results[i], methods[i] = result[0], name
+                pending = [i for i in pending if results[i] is None]
+        for i in todo:
+            if methods[i] is not None and cache is not None and sources[i][1]:
+                try:
+                    cache.set_winner(sources[i][1], context, methods[i])
+                except Exception as e:
+                    print(f"   Could not record {methods[i]} as the cutout for {os.path.basename(paths[i])}: {e}")
+
+        # 4) Last resort: conservative flood-fill (not remembered, so a re-render tries the strategies again)
+        for i, (img, source_sha) in enumerate(sources):
+            if results[i] is None:
+                results[i], methods[i] = self._cutout_floodfill(img, source_sha, local_params, proxy_size)[0], "floodfill"
+        return [
+            (cutout, method in ("rembg", "floodfill") and self._uses_proxy(img, proxy_size), method)
+            for cutout, method, (img, _) in zip(results, methods, sources)
+        ]
+
+    def _remove_bg_hedged(self, paths, sources, todo: List[int], strategies, rembg_params: Dict,
+                          proxy_size: int, results: List, methods: List):
+        """
+        Race rembg against the remote providers for the photos in todo at once;
+        the first cutout that passes the quality gate wins and is written to
+        results/methods (left None where nothing did before
+        BG_REMOVAL_DEADLINE_SECONDS). Only the first paid provider starts right
+        away, the next joins after BG_REMOVAL_STAGGER_SECONDS or once one fails.
+        Strategies the scheduler has disabled are not started.
+        """
+        from config import Config
+        started = time.perf_counter()
+        deadline = started + Config.BG_REMOVAL_DEADLINE_SECONDS
+        names = cutout_strategies.order(strategies)
+        if not names:
+            return
+        pool = cutout_strategies.executor()
+        if "rembg" in names:
+            local = pool.submit(self._cutouts_rembg, [(i, *sources[i]) for i in todo], rembg_params, proxy_size)
+        races = {}
+        for i in todo:
+            path, source_sha = paths[i], sources[i][1]
+            # The local model first, then the paid providers in order: each one after
+            # the first waits for the stagger delay or for the one before it to fail
+            candidates = {"rembg": cutout_strategies.pick(local, i)} if "rembg" in names else {}
+            for name in (n for n in names if n != "rembg"):
+                run = self._cutout_removebg if name == "removebg" else self._cutout_openai
+                launch = functools.partial(pool.submit, run, path, source_sha)
+                deferred = len(candidates) > ("rembg" in candidates) and Config.BG_REMOVAL_STAGGER_SECONDS > 0
+                candidates[name] = launch if deferred else launch()
+            races[i] = candidates
+        for i in todo:
+            won = cutout_strategies.first_acceptable(
+                races[i], self._cutout_acceptable, deadline, started, label=os.path.basename(paths[i]),
+                stagger=Config.BG_REMOVAL_STAGGER_SECONDS,
+            )
+            if won is not None:
+                results[i], methods[i] = won[1][0], won[0]
     
     def _detect_orange_us_bbox(self, img: Image.Image):
         """
@@ -1028,9 +1104,7 @@ class HTMLSlideGenerator:
         Helper to calibrate map projection by testing known cities.
         Run this once to find the best padding values.
         """
-        template = self._pdf_to_image(template_path) if template_path.endswith('.pdf') else Image.open(template_path)
-        template.load()  # Load fully before resize to avoid memory issues
-        template = template.resize((1920, 1080), Image.Resampling.LANCZOS)
+        template = self._load_template_image(template_path)
         
         map_x, map_y, map_w, map_h = self._detect_orange_us_bbox(template)
         
@@ -1129,6 +1203,255 @@ class HTMLSlideGenerator:
         # Default to center of US
         return (0.50, 0.50)
 
+    def _render_pin(self) -> Image.Image:
+        """Yellow location pin icon (teardrop shape with circular hole and drop shadow) on a transparent square."""
+        yellow = (255, 215, 0)
+        black = (0, 0, 0)
+        
+        # Pin dimensions - larger for visibility
+        pin_width = 40  # Width of the rounded top
+        pin_height = 50  # Total height including point
+        point_length = 12  # Length of the pointed bottom
+        hole_radius = 6  # Radius of the circular hole
+        
+        # Create a temporary image for the pin to draw the teardrop shape
+        pin_img_size = max(pin_width, pin_height + point_length) + 20
+        pin_img = Image.new('RGBA', (pin_img_size, pin_img_size), (0, 0, 0, 0))
+        pin_draw = ImageDraw.Draw(pin_img)
+        
+        # Calculate center position in the pin image
+        center_x = pin_img_size // 2
+        center_y = pin_img_size // 2
+        
+        # Draw shadow first (slightly offset and darker) for depth
+        shadow_offset = 3
+        shadow_center_x = center_x + shadow_offset
+        shadow_center_y = center_y + shadow_offset
+        
+        # Shadow: rounded top (ellipse) + pointed bottom (triangle)
+        # Top ellipse for shadow
+        shadow_top_y = shadow_center_y - pin_height // 2
+        pin_draw.ellipse(
+            [(shadow_center_x - pin_width // 2, shadow_top_y - pin_width // 4),
+             (shadow_center_x + pin_width // 2, shadow_top_y + pin_width // 4)],
+            fill=(50, 50, 50, 120)
+        )
+        # Bottom triangle for shadow
+        shadow_points = [
+            (shadow_center_x - pin_width // 2, shadow_top_y + pin_width // 4),
+            (shadow_center_x + pin_width // 2, shadow_top_y + pin_width // 4),
+            (shadow_center_x, shadow_center_y + point_length + shadow_offset),
+        ]
+        pin_draw.polygon(shadow_points, fill=(50, 50, 50, 120))
+        
+        # Draw main teardrop shape (yellow)
+        # Top: rounded ellipse (the rounded part of the teardrop)
+        top_y = center_y - pin_height // 2
+        pin_draw.ellipse(
+            [(center_x - pin_width // 2, top_y - pin_width // 4),
+             (center_x + pin_width // 2, top_y + pin_width // 4)],
+            fill=yellow, outline=black, width=2
+        )
+        
+        # Bottom: triangle connecting to point (the pointed part)
+        teardrop_points = [
+            (center_x - pin_width // 2, top_y + pin_width // 4),  # Left bottom of ellipse
+            (center_x + pin_width // 2, top_y + pin_width // 4),  # Right bottom of ellipse
+            (center_x, center_y + point_length),  # Point at bottom
+        ]
+        pin_draw.polygon(teardrop_points, fill=yellow, outline=black, width=2)
+        
+        # Draw circular hole in the center (dark circle for depth)
+        hole_center_x = center_x
+        hole_center_y = top_y  # Position hole at top center
+        pin_draw.ellipse(
+            [(hole_center_x - hole_radius, hole_center_y - hole_radius),
+             (hole_center_x + hole_radius, hole_center_y + hole_radius)],
+            fill=black
+        )
+        
+        # Add inner highlight ring for 3D effect (lighter inner ring)
+        pin_draw.ellipse(
+            [(hole_center_x - hole_radius + 2, hole_center_y - hole_radius + 2),
+             (hole_center_x + hole_radius - 2, hole_center_y + hole_radius - 2)],
+            fill=(100, 100, 100)
+        )
+        
+        return pin_img
+    
+    def _render_location_label(self, location: str) -> slide_layers.Layer:
+        """City name in black on a yellow block (similar to other yellow blocks), sized to the text."""
+        yellow = (255, 215, 0)  # Yellow for the block
+        black = (0, 0, 0)  # Black text on yellow background
+        
+        # Use larger, extra-bold appearance for location text
+        location_font = self._load_font(32, bold=True)
+        location_stroke_width = 1
+        
+        # Get text dimensions with larger font
+        label_bbox = location_font.getbbox(location, stroke_width=location_stroke_width)
+        text_width = label_bbox[2] - label_bbox[0]
+        text_height = label_bbox[3] - label_bbox[1]
+        
+        # Yellow box dimensions (bigger padding for larger text)
+        box_padding_x = 24  # Increased from 20
+        box_padding_y = 12  # Increased from 10
+        box_width = text_width + box_padding_x * 2
+        box_height = text_height + box_padding_y * 2
+        
+        # Draw yellow box (similar to other section labels), rectangle corners inclusive
+        label_img = Image.new('RGBA', (box_width + 1, box_height + 1), (0, 0, 0, 0))
+        label_draw = ImageDraw.Draw(label_img)
+        label_draw.rectangle([(0, 0), (box_width, box_height)], fill=yellow)
+        
+        # Draw location text in the yellow box (with padding)
+        label_draw.text(
+            (box_padding_x, box_padding_y),
+            location,
+            fill=black,
+            font=location_font,
+            stroke_width=location_stroke_width,
+            stroke_fill=black
+        )
+        return slide_layers.Layer(label_img, (0, 0), [
+            slide_layers.RectOp((0, 0, box_width, box_height), yellow),
+            slide_layers.TextOp([location], (box_padding_x, box_padding_y), 32, bold=True, fill=black,
+                                stroke_width=location_stroke_width, stroke_fill=black),
+        ])
+    
+    def _render_logo(self, logo_path: str, logo_size: int) -> Image.Image:
+        """Logo center-cropped to a square and resized to fill a logo_size circle (transparent outside it)."""
+        logo_img = Image.open(logo_path).convert('RGBA')
+        # Load image fully before operations to avoid lazy loading issues
+        logo_img.load()
+        
+        # Create perfectly circular mask first
+        circle_mask = Image.new('L', (logo_size, logo_size), 0)
+        circle_draw = ImageDraw.Draw(circle_mask)
+        circle_draw.ellipse([(0, 0), (logo_size, logo_size)], fill=255)
+        
+        # Resize logo to fill the entire circle (no padding, fill the circle)
+        # Center crop to square first
+        logo_w, logo_h = logo_img.size
+        min_dim = min(logo_w, logo_h)
+        logo_img = logo_img.crop(((logo_w - min_dim) // 2, (logo_h - min_dim) // 2, 
+                                 (logo_w + min_dim) // 2, (logo_h + min_dim) // 2))
+        
+        # Resize to fill the entire circle (logo_size x logo_size)
+        logo_img = logo_img.resize((logo_size, logo_size), Image.Resampling.LANCZOS)
+        
+        # Apply circular mask to logo - this makes it truly circular
+        logo_masked = Image.new('RGBA', (logo_size, logo_size), (0, 0, 0, 0))
+        logo_masked.paste(logo_img, (0, 0))  # Paste at origin, no padding
+        logo_masked.putalpha(circle_mask)  # Apply circular mask to make it round
+        return logo_masked
+    
+    def _render_stage_layer(self, stage_text: str, height: int) -> slide_layers.Layer:
+        """
+        Investment stage for the top of the sidebar: black text with a dark grey outline,
+        rotated to read bottom -> top (same as SLAUSON&CO) and fitted into the sidebar.
+        """
+        # Use bigger font size for better visibility (40px), smaller only if the text would not fit the sidebar length
+        padding = 60  # Reduced padding to prevent excessive scaling
+        stage_font_size = text_fit.get_fitter().fit_size(
+            stage_text, height - 70 - padding * 2, max_size=40, min_size=24
+        )
+        sidebar_bold_font = self._load_font(stage_font_size, bold=False)  # Less bold for easier reading
+        
+        # Don't erase background - keep it transparent
+        # Use black color
+        stage_color = (0, 0, 0)  # Black color
+        stroke_color = (50, 50, 50)  # Dark grey for stroke (thicker effect)
+        
+        # Draw investment stage at the TOP of sidebar (opposite end from Slauson&Co)
+        # Align with Slauson&Co position (which is at the bottom of sidebar, left-aligned)
+        # Slauson&Co is positioned more to the left, around x=10-20 in the sidebar
+        sidebar_width = 200
+        slauson_x = 10  # More to the left to align with Slauson&Co text
+        
+        stage_top_y = 80  # Near the top of the sidebar
+        
+        # Get text dimensions first to calculate proper image size
+        bbox = sidebar_bold_font.getbbox(stage_text)
+        text_width = bbox[2] - bbox[0]
+        text_height = bbox[3] - bbox[1]
+        
+        # Create image for single-line text, rotated -90 degrees (same as SLAUSON&CO)
+        # When rotated -90 degrees, width becomes height and height becomes width
+        stage_img_width = text_height + padding * 2  # Width after rotation
+        stage_img_height = text_width + padding * 2  # Height after rotation
+        
+        # Ensure minimum size
+        stage_img_width = max(stage_img_width, 400)
+        stage_img_height = max(stage_img_height, 700)
+        
+        stage_img = Image.new('RGBA', (stage_img_width, stage_img_height), (0, 0, 0, 0))
+        
+        # Draw text normally (no word reversal) at the top of the image
+        # When rotated -90 degrees, the top becomes the right side
+        # Position text at top so after rotation it's properly positioned
+        # Center text horizontally before rotation
+        text_x = stage_img_width // 2 - text_width // 2
+        text_y = padding  # Position at top edge - becomes right edge after rotation
+        
+        # Draw text with a dark grey 3px outline (thicker effect) from the cached text layer
+        text_render.draw_text(stage_img, (text_x, text_y), stage_text, stage_font_size, bold=False,
+                              fill=stage_color, stroke_width=3, stroke_fill=stroke_color)
+        
+        # Rotate so text reads bottom -> top (same as SLAUSON&CO)
+        stage_img = stage_img.rotate(90, expand=True)
+        
+        # --- Fit the rotated image into the sidebar safely ---
+        sidebar_w = 200
+        top_margin = 55  # Adjusted for better fit
+        bottom_margin = 15  # Reduced to give more usable height
+        side_margin = 6  # Reduced to give more usable width
+        
+        max_w = sidebar_w - 2 * side_margin
+        max_h = height - top_margin - bottom_margin  # height is slide height (1080)
+        
+        final_w, final_h = stage_img.size
+        
+        # Scale DOWN if needed to fit, but don't let it get microscopic
+        scale = min(max_w / final_w, max_h / final_h, 1.0)
+        scale = max(scale, 0.85)  # Minimum scale floor to prevent tiny text
+        if scale < 1.0:
+            new_w = max(1, int(final_w * scale))
+            new_h = max(1, int(final_h * scale))
+            stage_img = stage_img.resize((new_w, new_h), Image.Resampling.LANCZOS)
+            final_w, final_h = stage_img.size
+        
+        # Same text as a vector op: rotating 90 degrees with expand maps (x, y) to (y, width - x)
+        stage_op = slide_layers.TextOp(
+            [stage_text], (text_y * scale, (stage_img_width - text_x) * scale), stage_font_size,
+            fill=stage_color, stroke_width=3, stroke_fill=stroke_color, angle=90, scale=scale
+        )
+        
+        # Compute placement
+        paste_x = 12              # align with SLAUSON&CO left
+        paste_y = top_margin + 25 # lower it
+        
+        # Clamp so it can NEVER go off-canvas
+        paste_x = max(0, min(paste_x, sidebar_w - final_w))
+        paste_y = max(0, min(paste_y, height - final_h))
+        
+        
+        return slide_layers.Layer(stage_img, (paste_x, paste_y), [stage_op])
+    
+    def _build_slide_base(self, template: Image.Image) -> slide_layers.SlideBase:
+        """
+        Template-only parts of the slide: the detected map region and the text colors
+        sampled from the template at the founders, co-investors and background blocks.
+        """
+        # Detect orange US map bounding box from template (restricted to top-right ROI)
+        map_bbox = self._detect_orange_us_bbox(template)
+        text_colors = {
+            'founders': self._get_text_color_from_template(template, 320, 415, 600, 100),
+            'investors': self._get_text_color_from_template(template, 650, 415, 600, 100),
+            'background': self._get_text_color_from_template(template, 320, 650, 700, 200),
+        }
+        return slide_layers.SlideBase(template, map_bbox, text_colors)
+    
     def create_slide(self, company_data: Dict, headshot_path: str, logo_path: str, map_path: Optional[str] = None, output_format: str = "pdf") -> bytes:
         # Check if template exists, try default locations if not found
         if not self.template_path or not os.path.exists(self.template_path):
@@ -1175,30 +1498,13 @@ class HTMLSlideGenerator:
                 )
             self.template_path = found_path
         
-        # Load template (PDF or image)
-        template_ext = os.path.splitext(self.template_path)[1].lower()
-        if template_ext == '.pdf':
-            # Convert PDF to image
-            template = self._pdf_to_image(self.template_path)
-        else:
-            # Load as image
-            template = Image.open(self.template_path).convert('RGBA')
-            template.load()  # Load fully before resize to avoid memory issues
-        
-        # Resize to standard slide size if needed
-        if template.size != (1920, 1080):
-            template = template.resize((1920, 1080), Image.Resampling.LANCZOS)
-        
-        # Create a copy to work with
-        slide = template.copy()
-        draw = ImageDraw.Draw(slide)
-        width, height = slide.size
-        
-        # Load fonts (robust fallbacks for Render)
-        name_font = self._load_font(140, bold=True)
-        body_font = self._load_font(28)
-        small_font = self._load_font(20)
-        sidebar_font = self._load_font(28)
+        # Load template (PDF or image), rasterized at 1920x1080 and cached per process,
+        # with the map region and text colors derived from it once per template.
+        # Company-specific parts are rendered as separate cached layers and composited at the end.
+        template = template_cache.get_template(self.template_path)
+        base = slide_layers.get_base(template, self._build_slide_base)
+        width, height = base.size
+        layers = []
         
         # Extract company data
         company_name = company_data.get('name', '').upper()
@@ -1233,9 +1539,9 @@ class HTMLSlideGenerator:
         founders_block_y = 400  # Approximate Y position of founders yellow block
         founders_text_x = 320  # Founders text X position
         
-        # Detect orange US map bounding box from template (restricted to top-right ROI)
-        # Do this once and reuse for both company name overlap detection and map pin placement
-        map_area_x, map_area_y, map_width, map_height = self._detect_orange_us_bbox(template)
+        # Orange US map bounding box detected from the template (once per template)
+        # Reused for both company name overlap detection and map pin placement
+        map_area_x, map_area_y, map_width, map_height = base.map_bbox
         
         # Company name position: aligned with founders but moved a bit to the left, significantly raised
         name_x = founders_text_x - 50  # Moved a bit to the left from founders position
@@ -1244,74 +1550,30 @@ class HTMLSlideGenerator:
         # Use orange color similar to the rest of the slide (lighter, more vibrant orange)
         name_color = (255, 140, 0)  # More vibrant orange, similar to slide orange
         
-        # Dynamic font sizing based on company name length to prevent overlap with map
-        # Start with base font size
+        # Dynamic font sizing based on company name length to prevent overlap with map:
+        # largest size up to 180px that fits before the map (map starts at x=1250), at least 100px
         base_font_size = 180
-        name_font_size = base_font_size
-        
-        # Calculate text width with base font to check for overlap
-        test_font = self._load_font(name_font_size, bold=True)
-        text_bbox = draw.textbbox((0, 0), company_name, font=test_font)
-        text_width = text_bbox[2] - text_bbox[0]
-        
-        # If text would overlap with map (map starts at x=1250), reduce font size
         max_allowed_width = map_area_x - name_x - 50  # Leave 50px margin before map
-        if text_width > max_allowed_width:
-            # Calculate new font size to fit
-            name_font_size = int((max_allowed_width / text_width) * base_font_size)
-            # Ensure minimum readable size
-            name_font_size = max(100, name_font_size)
+        name_font_size = text_fit.get_fitter(bold=True).fit_size(
+            company_name, max_allowed_width, max_size=base_font_size, min_size=100
+        )
+        if name_font_size < base_font_size:
             print(f"   Company name too long ({len(company_name)} chars), reducing font size to {name_font_size}px to avoid map overlap")
         
-        # Use very thick, bold font (matching the image style - extra thick and bold)
-        name_font = self._load_font(name_font_size, bold=True)
-        
-        # Draw company name with stroke (outline) to make it appear thicker
-        # First draw the stroke (outline) in the same color but slightly darker
+        # Draw company name with a slightly darker orange outline to make it appear thicker
+        # (native stroke in one pass; the rendered layer is cached per name/size)
         stroke_color = (200, 80, 30)  # Slightly darker orange for stroke
-        # Draw stroke by drawing text multiple times with slight offsets
         stroke_width = 2 if name_font_size > 150 else 1  # Adjust stroke based on font size
-        for adj in range(-stroke_width, stroke_width + 1):
-            for adj2 in range(-stroke_width, stroke_width + 1):
-                if adj != 0 or adj2 != 0:
-                    draw.text((name_x + adj, name_y + adj2), company_name, fill=stroke_color, font=name_font)
-        
-        # Then draw the main text on top
-        draw.text((name_x, name_y), company_name, fill=name_color, font=name_font)
+        layers.append(slide_layers.text((name_x, name_y), company_name, name_font_size, bold=True,
+                                        fill=name_color, stroke_width=stroke_width, stroke_fill=stroke_color))
         
         # 2. Replace logo (circular, top right) - fit within circular bounds, higher position, transparent, more circular
+        logo_x, logo_y = width - 170, 10  # Raised more (was 20, now 10) to avoid map overlap
         try:
-            logo_img = Image.open(logo_path).convert('RGBA')
-            # Load image fully before operations to avoid lazy loading issues
-            logo_img.load()
-            logo_x, logo_y = width - 170, 10  # Raised more (was 20, now 10) to avoid map overlap
-            logo_size = 130
-            
-            # Don't erase background - keep it transparent (no black box)
-            # Just paste the logo directly with circular mask
-            
-            # Create perfectly circular mask first
-            circle_mask = Image.new('L', (logo_size, logo_size), 0)
-            circle_draw = ImageDraw.Draw(circle_mask)
-            circle_draw.ellipse([(0, 0), (logo_size, logo_size)], fill=255)
-            
-            # Resize logo to fill the entire circle (no padding, fill the circle)
-            # Center crop to square first
-            logo_w, logo_h = logo_img.size
-            min_dim = min(logo_w, logo_h)
-            logo_img = logo_img.crop(((logo_w - min_dim) // 2, (logo_h - min_dim) // 2, 
-                                     (logo_w + min_dim) // 2, (logo_h + min_dim) // 2))
-            
-            # Resize to fill the entire circle (logo_size x logo_size)
-            logo_img = logo_img.resize((logo_size, logo_size), Image.Resampling.LANCZOS)
-            
-            # Apply circular mask to logo - this makes it truly circular
-            logo_masked = Image.new('RGBA', (logo_size, logo_size), (0, 0, 0, 0))
-            logo_masked.paste(logo_img, (0, 0))  # Paste at origin, no padding
-            logo_masked.putalpha(circle_mask)  # Apply circular mask to make it round
-            
-            slide.paste(logo_masked, (logo_x, logo_y), logo_masked)
-            draw = ImageDraw.Draw(slide)
+            logo_key = ("logo", file_sha256(logo_path), logo_x, logo_y)
+            layers.append(slide_layers.layer_cache.get_or_render(
+                logo_key, lambda: slide_layers.Layer(self._render_logo(logo_path, 130), (logo_x, logo_y))
+            ))
         except Exception as e:
             print(f"Warning: Could not load logo: {e}")
         
@@ -1343,105 +1605,18 @@ class HTMLSlideGenerator:
             
             print(f"   PIN: ({pin_x}, {pin_y})")
             
-            # Draw the pin (yellow location pin icon - teardrop shape with circular hole)
-            yellow = (255, 215, 0)
-            black = (0, 0, 0)
-            
-            # Pin dimensions - larger for visibility
-            pin_width = 40  # Width of the rounded top
-            pin_height = 50  # Total height including point
-            point_length = 12  # Length of the pointed bottom
-            hole_radius = 6  # Radius of the circular hole
-            
-            # Create a temporary image for the pin to draw the teardrop shape
-            pin_img_size = max(pin_width, pin_height + point_length) + 20
-            pin_img = Image.new('RGBA', (pin_img_size, pin_img_size), (0, 0, 0, 0))
-            pin_draw = ImageDraw.Draw(pin_img)
-            
-            # Calculate center position in the pin image
-            center_x = pin_img_size // 2
-            center_y = pin_img_size // 2
-            
-            # Draw shadow first (slightly offset and darker) for depth
-            shadow_offset = 3
-            shadow_center_x = center_x + shadow_offset
-            shadow_center_y = center_y + shadow_offset
-            
-            # Shadow: rounded top (ellipse) + pointed bottom (triangle)
-            # Top ellipse for shadow
-            shadow_top_y = shadow_center_y - pin_height // 2
-            pin_draw.ellipse(
-                [(shadow_center_x - pin_width // 2, shadow_top_y - pin_width // 4),
-                 (shadow_center_x + pin_width // 2, shadow_top_y + pin_width // 4)],
-                fill=(50, 50, 50, 120)
-            )
-            # Bottom triangle for shadow
-            shadow_points = [
-                (shadow_center_x - pin_width // 2, shadow_top_y + pin_width // 4),
-                (shadow_center_x + pin_width // 2, shadow_top_y + pin_width // 4),
-                (shadow_center_x, shadow_center_y + point_length + shadow_offset),
-            ]
-            pin_draw.polygon(shadow_points, fill=(50, 50, 50, 120))
-            
-            # Draw main teardrop shape (yellow)
-            # Top: rounded ellipse (the rounded part of the teardrop)
-            top_y = center_y - pin_height // 2
-            pin_draw.ellipse(
-                [(center_x - pin_width // 2, top_y - pin_width // 4),
-                 (center_x + pin_width // 2, top_y + pin_width // 4)],
-                fill=yellow, outline=black, width=2
-            )
-            
-            # Bottom: triangle connecting to point (the pointed part)
-            teardrop_points = [
-                (center_x - pin_width // 2, top_y + pin_width // 4),  # Left bottom of ellipse
-                (center_x + pin_width // 2, top_y + pin_width // 4),  # Right bottom of ellipse
-                (center_x, center_y + point_length),  # Point at bottom
-            ]
-            pin_draw.polygon(teardrop_points, fill=yellow, outline=black, width=2)
-            
-            # Draw circular hole in the center (dark circle for depth)
-            hole_center_x = center_x
-            hole_center_y = top_y  # Position hole at top center
-            pin_draw.ellipse(
-                [(hole_center_x - hole_radius, hole_center_y - hole_radius),
-                 (hole_center_x + hole_radius, hole_center_y + hole_radius)],
-                fill=black
-            )
-            
-            # Add inner highlight ring for 3D effect (lighter inner ring)
-            pin_draw.ellipse(
-                [(hole_center_x - hole_radius + 2, hole_center_y - hole_radius + 2),
-                 (hole_center_x + hole_radius - 2, hole_center_y + hole_radius - 2)],
-                fill=(100, 100, 100)
-            )
-            
             # Paste the pin onto the main slide so the bottom tip lands on (pin_x, pin_y)
+            pin = slide_layers.layer_cache.get_or_render(("pin",), lambda: slide_layers.Layer(self._render_pin(), (0, 0)))
+            pin_img_size = pin.image.width
             paste_pin_x = pin_x - pin_img_size // 2
             paste_pin_y = pin_y - pin_img_size // 2
             # Move image up so the bottom tip hits (pin_x, pin_y) instead of centering
             paste_pin_y -= int(pin_img_size * 0.20)  # Adjust 0.18-0.25 if needed
-            slide.paste(pin_img, (paste_pin_x, paste_pin_y), pin_img)
-            draw = ImageDraw.Draw(slide)
+            layers.append(pin.moved((paste_pin_x, paste_pin_y)))
             
             # Place the city name label with yellow block (similar to other yellow blocks)
-            yellow = (255, 215, 0)  # Yellow for the block
-            black = (0, 0, 0)  # Black text on yellow background
-            
-            # Use larger, extra-bold appearance for location text
-            location_font = self._load_font(32, bold=True)
-            location_stroke_width = 1
-            
-            # Get text dimensions with larger font
-            label_bbox = draw.textbbox((0, 0), location, font=location_font, stroke_width=location_stroke_width)
-            text_width = label_bbox[2] - label_bbox[0]
-            text_height = label_bbox[3] - label_bbox[1]
-            
-            # Yellow box dimensions (bigger padding for larger text)
-            box_padding_x = 24  # Increased from 20
-            box_padding_y = 12  # Increased from 10
-            box_width = text_width + box_padding_x * 2
-            box_height = text_height + box_padding_y * 2
+            label = slide_layers.layer_cache.get_or_render(("location", location), lambda: self._render_location_label(location))
+            box_width, box_height = label.image.width - 1, label.image.height - 1
             
             # Position box with more space from pin; raise significantly to avoid being too low
             box_x = pin_x + 40  # More space from pin (was 15, now 40)
@@ -1452,21 +1627,7 @@ class HTMLSlideGenerator:
                 box_x = pin_x - box_width - 40  # Move to the left if it would go outside
             if box_y + box_height > map_area_y + map_height:
                 box_y = pin_y - box_height - 20  # Move up if it would go outside
-            
-            # Draw yellow box (similar to other section labels)
-            draw.rectangle([(box_x, box_y), (box_x + box_width, box_y + box_height)], fill=yellow)
-            
-            # Draw location text in the yellow box (centered with padding)
-            text_x = box_x + box_padding_x
-            text_y = box_y + box_padding_y
-            draw.text(
-                (text_x, text_y),
-                location,
-                fill=black,
-                font=location_font,
-                stroke_width=location_stroke_width,
-                stroke_fill=black
-            )
+            layers.append(label.moved((box_x, box_y)))
             
         except Exception as e:
             print(f"Warning: Map update failed: {e}")
@@ -1476,55 +1637,54 @@ class HTMLSlideGenerator:
         founders_block_y = 400  # Approximate Y position of founders yellow block
         founders_text_y = founders_block_y + 15  # Moved down a little
         founders_text_x = 320  # Moved a little to the left (was 350)
-        founders_color = self._get_text_color_from_template(template, founders_text_x, founders_text_y, 600, 100)
+        founders_color = base.text_colors['founders']
         
         # Don't erase background - keep it transparent (no black box)
-        # Draw founders text with newlines directly
-        founders_lines = founders_text.split('\n')
-        for i, line in enumerate(founders_lines):
-            draw.text((founders_text_x, founders_text_y + i * 35), line, fill=founders_color, font=body_font)
+        # Draw founders text one name per line, shrinking long names to fit before the co-investors column
+        # (wrapped only if they still do not fit at the minimum size)
+        founders_size, founders_lines = text_fit.get_fitter().fit_block(
+            founders_text, max_width=300, max_lines=founders_text.count('\n') + 1, max_size=28, min_size=20
+        )
+        layers.append(slide_layers.text_block(
+            (founders_text_x, founders_text_y), founders_lines, founders_size,
+            line_height=round(35 * founders_size / 28), fill=founders_color
+        ))
         
         # 5. Replace Co-Investors text (separate text box, to the right of founders, aligned with founders height)
         investors_block_y = 500  # Approximate Y position of co-investors yellow block
         investors_text_y = founders_text_y  # Aligned with founders (same height)
         investors_text_x = 650  # Moved to the right of founders (founders is at 320, so co-investors at 650)
-        investors_color = self._get_text_color_from_template(template, investors_text_x, investors_text_y, 600, 100)
+        investors_color = base.text_colors['investors']
         
         # Don't erase background - keep it transparent (no black box)
-        # Draw co-investors text with newlines directly (separate text box)
-        investors_lines = co_investors_text.split('\n')
-        for i, line in enumerate(investors_lines):
-            draw.text((investors_text_x, investors_text_y + i * 35), line, fill=investors_color, font=body_font)
+        # Draw co-investors text with newlines (separate text box), fitted to the space before the map
+        investors_size, investors_lines = text_fit.get_fitter().fit_block(
+            co_investors_text, max_width=max(200, map_area_x - investors_text_x - 30),
+            max_lines=co_investors_text.count('\n') + 1, max_size=28, min_size=20
+        )
+        layers.append(slide_layers.text_block(
+            (investors_text_x, investors_text_y), investors_lines, investors_size,
+            line_height=round(35 * investors_size / 28), fill=investors_color
+        ))
         
         # 6. Replace Background text (aligned with founders, wider text area, bigger font, transparent background)
         bg_block_y = 600  # Approximate Y position of background yellow block
         bg_text_y = bg_block_y + 50  # Text starts below yellow block
         bg_text_x = founders_text_x  # Aligned with founders (moved left from 400 to match founders at 320)
         bg_text_width = 700  # Wider text area (was 500) to fill space more
-        words = background_text.split()
-        lines = []
-        current_line = []
-        for word in words:
-            test_line = ' '.join(current_line + [word])
-            bbox = draw.textbbox((0, 0), test_line, font=body_font)
-            if bbox[2] - bbox[0] < bg_text_width:  # Wider width for background
-                current_line.append(word)
-            else:
-                if current_line:
-                    lines.append(' '.join(current_line))
-                current_line = [word]
-        if current_line:
-            lines.append(' '.join(current_line))
         
         # Get text color from template (don't erase background - keep it transparent)
-        bg_color = self._get_text_color_from_template(template, bg_text_x, bg_text_y, bg_text_width, 200)
+        bg_color = base.text_colors['background']
         
-        # Use slightly bigger font for background text
-        bg_font = self._load_font(32)
+        # Slightly bigger font for background text (32px), shrunk only if it would need more than 10 lines
+        bg_size, lines = text_fit.get_fitter().fit_block(
+            background_text, max_width=bg_text_width, max_lines=10, max_size=32, min_size=24
+        )
         
-        # Draw text directly without erasing background (transparent)
-        for i, line in enumerate(lines[:10]):
-            draw.text((bg_text_x, bg_text_y + i * 36), line, fill=bg_color, font=bg_font)  # Slightly more spacing
+        # Draw text directly without erasing background (transparent), slightly more spacing
+        layers.append(slide_layers.text_block(
+            (bg_text_x, bg_text_y), lines[:10], bg_size, line_height=round(36 * bg_size / 32), fill=bg_color
+        ))
         
         # 7. Replace headshots (below map, moved left, bigger size, transparent)
         headshot_processed = False
@@ -1571,7 +1731,10 @@ class HTMLSlideGenerator:
                 headshot_area_x = map_area_x + (map_width - headshot_area_width) // 2 - 50  # Centered under map, slightly left
                 headshot_area_y = map_area_y + map_height + 55  # Position below map with larger gap (lowered)
 
-                def load_process_headshot(path: str) -> Optional[Image.Image]:
+                fallbacks = []  # Headshots that ended up on the map background fallback
+
+                def load_process_headshot(path: str, cutout: Optional[Image.Image] = None,
+                                          edges_fitted: bool = False) -> Optional[Image.Image]:
                     try:
                         print(f"    Processing headshot: {path}")
                         
@@ -1627,6 +1790,7 @@ class HTMLSlideGenerator:
                         
                         def make_map_background(img_in):
                             print("    Applying Transparent Background Fallback...")
+                            fallbacks.append(path)
                             # 1. Create a square canvas based on smallest dimension
                             w, h = img_in.size
                             d = min(w, h)
@@ -1667,36 +1831,10 @@ class HTMLSlideGenerator:
                                 center_protection = np.zeros((H, W), dtype=bool)
                                 center_protection[center_y_start:center_y_end, center_x_start:center_x_end] = True
                                 
-                                from collections import deque
+                                level = mask_ops.border_level_map(dist, 8, barrier=center_protection)
+                                
                                 def flood(t):
-                                    close = dist <= t
-                                    bg_mask = np.zeros((H, W), dtype=bool)
-                                    q = deque()
-                                    
-                                    def push(y, x):
-                                        # Check bounds FIRST before accessing arrays
-                                        if not (0 <= y < H and 0 <= x < W):
-                                            return
-                                        if center_protection[y, x]:
-                                            return
-                                        if close[y, x] and not bg_mask[y, x]:
-                                            bg_mask[y, x] = True
-                                            q.append((y, x))
-                                    
-                                    for x in range(W):
-                                        push(0, x); push(H - 1, x)
-                                    for y in range(H):
-                                        push(y, 0); push(y, W - 1)
-                                    
-                                    while q:
-                                        y, x = q.popleft()
-                                        for dy in (-1, 0, 1):
-                                            for dx in (-1, 0, 1):
-                                                if dy == 0 and dx == 0:
-                                                    continue
-                                                push(y + dy, x + dx)
-                                    
-                                    return bg_mask
+                                    return level <= t
                                 
                                 # Try very low tolerance (3-8) to only remove obvious background
                                 best_mask = None
@@ -1737,8 +1875,8 @@ class HTMLSlideGenerator:
                                 gray = img_sq.convert("L")
                                 return Image.merge("RGBA", (gray, gray, gray, mask))
 
-                        # 1) Attempt Background Removal
-                        img = self._remove_bg_best_effort(path, use_api=use_api_removal)
+                        # 1) Attempt Background Removal (normally already done for all headshots at once)
+                        img = cutout if cutout is not None else self._remove_bg_best_effort(path, use_api=use_api_removal)
                         
                         # Check if background removal returned None
                         if img is None:
@@ -1786,7 +1924,9 @@ class HTMLSlideGenerator:
 
                         # 5) Standard Processing (Grayscale + Edges)
                         img = self._to_grayscale_preserve_alpha(img)
-                        img = self._refine_edges(img, erode_size=1, blur_radius=0.5)
+                        if not edges_fitted:
+                            # Proxy segmentation already fitted its edges to the photo (guided upsampling)
+                            img = self._refine_edges(img, erode_size=1, blur_radius=0.5)
                         
                         # 6) Harden alpha channel - ensure background is fully transparent (0) and foreground is fully opaque (255)
                         # This prevents semi-transparent halos when compositing
@@ -1816,6 +1956,7 @@ class HTMLSlideGenerator:
                         print(f"Warning: failed headshot {path}: {e}")
                         import traceback
                         traceback.print_exc()
+                        fallbacks.append(path)
                         # Final safety: Return original with map background
                         try:
                             orig = Image.open(path).convert("RGBA")
@@ -1823,48 +1964,57 @@ class HTMLSlideGenerator:
                         except:
                             return None
 
-                imgs = [load_process_headshot(p) for p in headshot_paths[:2]]
-                imgs = [im for im in imgs if im is not None]
-
-                if len(imgs) == 1:
-                    im = imgs[0]
-                    # Ensure image has alpha channel for transparency
-                    if im.mode != 'RGBA':
-                        im = im.convert('RGBA')
-                    im = self._resize_cover(im, headshot_area_width, headshot_area_height)
-                    # Paste with alpha mask to preserve transparency
-                    if im.mode == 'RGBA':
-                        slide.paste(im, (headshot_area_x, headshot_area_y), im.split()[3])
-                    else:
-                        slide.paste(im, (headshot_area_x, headshot_area_y))
-                    draw = ImageDraw.Draw(slide)
-                elif len(imgs) == 2:
-                    gap = 30
-                    each_w = (headshot_area_width - gap) // 2
-                    each_h = headshot_area_height
-                    left, right = imgs
-                    # Ensure both images have alpha channel for transparency
-                    if left.mode != 'RGBA':
-                        left = left.convert('RGBA')
-                    if right.mode != 'RGBA':
-                        right = right.convert('RGBA')
-                    left = self._resize_cover(left, each_w, each_h)
-                    right = self._resize_cover(right, each_w, each_h)
-
-                    left_x = headshot_area_x
-                    right_x = headshot_area_x + each_w + gap
-                    y = headshot_area_y
-
-                    # Paste with alpha mask to preserve transparency
-                    if left.mode == 'RGBA':
-                        slide.paste(left, (left_x, y), left.split()[3])
-                    else:
-                        slide.paste(left, (left_x, y))
-                    if right.mode == 'RGBA':
-                        slide.paste(right, (right_x, y), right.split()[3])
-                    else:
-                        slide.paste(right, (right_x, y))
-                draw = ImageDraw.Draw(slide)
+                # Background removal is the slow part: reuse the rendered layer while the
+                # headshot pixels, the settings that pick and shape the cutout, and the
+                # placement are unchanged
+                source_shas = [cutout_cache.source_sha256(p) for p in headshot_paths[:2]]
+                headshot_key = (
+                    "headshots", tuple(source_shas), use_api_removal,
+                    Config.SEGMENTATION_MODEL, Config.SEGMENTATION_PROXY_SIZE,
+                    Config.BG_REMOVAL_HEDGE, Config.BG_REMOVAL_STAGGER_SECONDS, Config.BG_REMOVAL_ADAPTIVE,
+                    headshot_area_x, headshot_area_y, headshot_area_width, headshot_area_height,
+                )
+                headshot_layer = slide_layers.layer_cache.get(headshot_key)
+                if headshot_layer is not None:
+                    print("   Reusing rendered headshot layer")
+                else:
+                    try:
+                        cutouts = self._remove_bg_best_effort_batch(headshot_paths[:2], use_api=use_api_removal,
+                                                                    source_shas=source_shas)
+                    except Exception as e:
+                        print(f"Warning: batched background removal failed: {e}")
+                        cutouts = [(None, False, None)] * len(headshot_paths[:2])
+                    imgs = [load_process_headshot(p, c, fitted) for p, (c, fitted, _) in zip(headshot_paths[:2], cutouts)]
+                    imgs = [im for im in imgs if im is not None]
+                    # Only a layer built from accepted cutouts is reused: after a flood-fill, map
+                    # background or failed removal (e.g. a provider outage) the next render retries
+                    cacheable = (len(imgs) == len(cutouts) and not fallbacks
+                                 and all(method in ("removebg", "openai", "rembg") for _, _, method in cutouts))
+                    headshot_canvas = Image.new('RGBA', (headshot_area_width, headshot_area_height), (0, 0, 0, 0))
+                    
+                    if len(imgs) == 1:
+                        # Ensure image has alpha channel for transparency
+                        im = imgs[0].convert('RGBA')
+                        im = self._resize_cover(im, headshot_area_width, headshot_area_height)
+                        headshot_canvas.alpha_composite(im, (0, 0))
+                    elif len(imgs) == 2:
+                        gap = 30
+                        each_w = (headshot_area_width - gap) // 2
+                        each_h = headshot_area_height
+                        # Ensure both images have alpha channel for transparency
+                        left, right = (im.convert('RGBA') for im in imgs)
+                        left = self._resize_cover(left, each_w, each_h)
+                        right = self._resize_cover(right, each_w, each_h)
+                        headshot_canvas.alpha_composite(left, (0, 0))
+                        headshot_canvas.alpha_composite(right, (each_w + gap, 0))
+                    
+                    if imgs:
+                        headshot_layer = slide_layers.Layer(headshot_canvas, (headshot_area_x, headshot_area_y))
+                        if cacheable:
+                            slide_layers.layer_cache.put(headshot_key, headshot_layer)
+                        else:
+                            print("   Not caching headshot layer (fallback cutout), next render retries background removal")
+                layers.append(headshot_layer)
         except Exception as e:
             print(f"Warning: Could not load headshot: {e}")
             import traceback
@@ -1885,95 +2035,21 @@ class HTMLSlideGenerator:
         else:
             stage_text = investment_stage.upper()
         
-        # Use bigger font size for better visibility (36-46pt range)
-        stage_font_size = 40
-        sidebar_bold_font = self._load_font(stage_font_size, bold=False)  # Less bold for easier reading
-        
-        # Don't erase background - keep it transparent
-        # Use black color
-        stage_color = (0, 0, 0)  # Black color
-        stroke_color = (50, 50, 50)  # Dark grey for stroke (thicker effect)
-        
-        # Draw investment stage at the TOP of sidebar (opposite end from Slauson&Co)
-        # Align with Slauson&Co position (which is at the bottom of sidebar, left-aligned)
-        # Slauson&Co is positioned more to the left, around x=10-20 in the sidebar
-        sidebar_width = 200
-        slauson_x = 10  # More to the left to align with Slauson&Co text
-        
-        stage_top_y = 80  # Near the top of the sidebar
-        
-        # Get text dimensions first to calculate proper image size
-        temp_img = Image.new('RGBA', (1000, 1000), (0, 0, 0, 0))
-        temp_draw = ImageDraw.Draw(temp_img)
-        bbox = temp_draw.textbbox((0, 0), stage_text, font=sidebar_bold_font)
-        text_width = bbox[2] - bbox[0]
-        text_height = bbox[3] - bbox[1]
-        
-        # Create image for single-line text, rotated -90 degrees (same as SLAUSON&CO)
-        # When rotated -90 degrees, width becomes height and height becomes width
-        padding = 60  # Reduced padding to prevent excessive scaling
-        stage_img_width = text_height + padding * 2  # Width after rotation
-        stage_img_height = text_width + padding * 2  # Height after rotation
-        
-        # Ensure minimum size
-        stage_img_width = max(stage_img_width, 400)
-        stage_img_height = max(stage_img_height, 700)
-        
-        stage_img = Image.new('RGBA', (stage_img_width, stage_img_height), (0, 0, 0, 0))
-        stage_draw = ImageDraw.Draw(stage_img)
-        
-        # Draw text normally (no word reversal) at the top of the image
-        # When rotated -90 degrees, the top becomes the right side
-        # Position text at top so after rotation it's properly positioned
-        # Center text horizontally before rotation
-        text_x = stage_img_width // 2 - text_width // 2
-        text_y = padding  # Position at top edge - becomes right edge after rotation
-        
-        # Draw stroke by drawing text multiple times with slight offsets (thicker effect)
-        for adj in range(-3, 4):  # slightly less bold
-            for adj2 in range(-3, 4):
-                if adj != 0 or adj2 != 0:
-                    stage_draw.text((text_x + adj, text_y + adj2), stage_text, fill=stroke_color, font=sidebar_bold_font)
-        
-        # Then draw the main text on top
-        stage_draw.text((text_x, text_y), stage_text, fill=stage_color, font=sidebar_bold_font)
-        
-        # Rotate so text reads bottom -> top (same as SLAUSON&CO)
-        stage_img = stage_img.rotate(90, expand=True)
-        
-        # --- Fit the rotated image into the sidebar safely ---
-        sidebar_w = 200
-        top_margin = 55  # Adjusted for better fit
-        bottom_margin = 15  # Reduced to give more usable height
-        side_margin = 6  # Reduced to give more usable width
-        
-        max_w = sidebar_w - 2 * side_margin
-        max_h = height - top_margin - bottom_margin  # height is slide height (1080)
-        
-        final_w, final_h = stage_img.size
-        
-        # Scale DOWN if needed to fit, but don't let it get microscopic
-        scale = min(max_w / final_w, max_h / final_h, 1.0)
-        scale = max(scale, 0.85)  # Minimum scale floor to prevent tiny text
-        if scale < 1.0:
-            new_w = max(1, int(final_w * scale))
-            new_h = max(1, int(final_h * scale))
-            stage_img = stage_img.resize((new_w, new_h), Image.Resampling.LANCZOS)
-            final_w, final_h = stage_img.size
-        
-        # Compute placement
-        paste_x = 12              # align with SLAUSON&CO left
-        paste_y = top_margin + 25 # lower it
-        
-        # Clamp so it can NEVER go off-canvas
-        paste_x = max(0, min(paste_x, sidebar_w - final_w))
-        paste_y = max(0, min(paste_y, height - final_h))
+        # Rendered once per stage text (rotated and fitted into the sidebar)
+        layers.append(slide_layers.layer_cache.get_or_render(
+            ("stage", stage_text, height), lambda: self._render_stage_layer(stage_text, height)
+        ))
         
-        slide.paste(stage_img, (paste_x, paste_y), stage_img)
+        # Vector PDF: template page reused as-is, text as real PDF text, only small images embedded
+        from config import Config
+        if output_format.lower() == "pdf" and Config.SLIDE_PDF_MODE == "vector":
+            try:
+                return vector_pdf.render_slide(base, layers, self.template_path)
+            except Exception as e:
+                print(f"Warning: Vector PDF failed ({e}), falling back to raster PDF")
         
-        # Convert to RGB for PDF
-        slide_rgb = Image.new('RGB', slide.size, (42, 42, 42))
-        slide_rgb.paste(slide, mask=slide.split()[3] if slide.mode == 'RGBA' else None)
+        # Composite every layer onto one copy of the template base
+        slide = slide_layers.compose(base, layers)
         
         # Return based on output format
         if output_format.lower() == "pptx":
@@ -1982,30 +2058,19 @@ class HTMLSlideGenerator:
                 map_area_x, map_area_y, map_width, map_height
             )
         
-        # Default: Convert to PDF (flattened, not editable)
-        # Convert to RGB for PDF
-        slide_rgb = Image.new('RGB', slide.size, (42, 42, 42))
-        slide_rgb.paste(slide, mask=slide.split()[3] if slide.mode == 'RGBA' else None)
-        
-        # Convert to PDF
-        # Use temporary file to avoid PIL's fileno() issue with BytesIO
-        import tempfile
-        with tempfile.NamedTemporaryFile(suffix='.png', delete=False) as tmp_file:
-            try:
-                slide_rgb.save(tmp_file.name, format='PNG', optimize=False)
-                with open(tmp_file.name, 'rb') as f:
-                    img_bytes = f.read()
-                pdf_bytes = img2pdf.convert(img_bytes)
-                return pdf_bytes
-            except Exception as e:
-                print(f"Error: {e}")
-                return None
-            finally:
-                # Clean up temporary file
-                try:
-                    os.unlink(tmp_file.name)
-                except:
-                    pass
+        # Default: Convert to PDF (flattened, not editable), encoded in memory with the configured codec
+        codec = Config.SLIDE_IMAGE_CODEC
+        try:
+            started = time.perf_counter()
+            pdf_bytes = slide_encode.encode_slide(
+                base, layers, codec=codec, jpeg_quality=Config.SLIDE_JPEG_QUALITY,
+                compress_level=Config.SLIDE_PNG_COMPRESS_LEVEL, slide=slide
+            )
+            print(f"   Encoded slide PDF ({codec}): {len(pdf_bytes) / 1024:.0f} KB in {(time.perf_counter() - started) * 1000:.0f} ms")
+            return pdf_bytes
+        except Exception as e:
+            print(f"Error: {e}")
+            return None
     
     def _create_pptx_from_slide(
         self, 
@@ -2153,16 +2218,12 @@ class HTMLSlideGenerator:
             name_x_px = 320 - 50  # 270
             name_y_px = 120
             
-            # Calculate font size (same logic as PIL)
+            # Calculate font size (same logic as PIL): largest size that fits before the map
             base_font_size = 180
-            name_font_size = base_font_size
-            # Check for overlap with map
             max_allowed_width = map_area_x - name_x_px - 50
-            # Estimate text width (rough calculation)
-            estimated_width = len(company_name) * (name_font_size * 0.6)  # Rough estimate
-            if estimated_width > max_allowed_width:
-                name_font_size = int((max_allowed_width / estimated_width) * base_font_size)
-                name_font_size = max(100, name_font_size)
+            name_font_size = text_fit.get_fitter(bold=True).fit_size(
+                company_name, max_allowed_width, max_size=base_font_size, min_size=100
+            )
             
             textbox = slide_pptx.shapes.add_textbox(
                 Inches(name_x_px * px_to_inch),
@@ -0,0 +1,140 @@
+"""
+Fingerprints for idempotent webhook processing.
+Zapier re-fires the same Notion row on every edit and retries on timeout;
+these fingerprints let the job queue recognise work it has already done.
+"""
+import hashlib
+import json
+from typing import Dict, Iterable, Optional
+from urllib.parse import urlparse, parse_qsl, urlencode, urlunparse
+
+
+# Payload fields that carry images (inline base64, URLs or upload: references)
+IMAGE_FIELDS = ("headshot", "headshot_url", "logo", "logo_url")
+
+# company_data keys that are derived during processing or carry image data
+_EXCLUDED_COMPANY_KEYS = {"map_image", "headshot", "headshot_url", "logo", "logo_url", "headshots"}
+
+# Query parameters of pre-signed URLs (Notion S3 files, GCS) that change on every fetch
+_VOLATILE_QUERY_PREFIXES = ("x-amz-", "x-goog-")
+_VOLATILE_QUERY_KEYS = {"expires", "signature", "awsaccesskeyid", "response-content-disposition"}
+
+
+def _normalize_value(value):
+    if isinstance(value, str):
+        return " ".join(value.split())
+    if isinstance(value, (list, tuple)):
+        return [_normalize_value(v) for v in value]
+    if isinstance(value, dict):
+        return {str(k): _normalize_value(v) for k, v in sorted(value.items())}
+    return value
+
+
+def normalize_company_data(company_data: Dict) -> Dict:
+    """Return company data with whitespace collapsed and image/derived keys removed."""
+    return {
+        key: _normalize_value(value)
+        for key, value in sorted(company_data.items())
+        if key not in _EXCLUDED_COMPANY_KEYS and not isinstance(value, (bytes, bytearray))
+    }
+
+
+def normalize_image_url(url: str) -> str:
+    """Strip signature/expiry query parameters so re-signed URLs compare equal."""
+    parsed = urlparse(url.strip())
+    query = [
+        (k, v) for k, v in parse_qsl(parsed.query, keep_blank_values=True)
+        if k.lower() not in _VOLATILE_QUERY_KEYS and not k.lower().startswith(_VOLATILE_QUERY_PREFIXES)
+    ]
+    return urlunparse(parsed._replace(query=urlencode(sorted(query)), fragment=""))
+
+
+def _image_token(value) -> Optional[str]:
+    """
+    Stable token for an image field: normalized URL, or hash of the image bytes.
+    Multipart uploads are already named by that hash, so the same image sent
+    inline or as a file part gets the same token.
+    """
+    if not isinstance(value, str) or not value:
+        return None
+    if value.startswith(("http://", "https://")):
+        return "url:" + normalize_image_url(value)
+    if value.startswith("upload:"):
+        return "sha256:" + value[len("upload:"):]
+    from image_ingest import iter_base64_decode
+    h = hashlib.sha256()
+    try:
+        for chunk in iter_base64_decode(value):
+            h.update(chunk)
+    except Exception:
+        h = hashlib.sha256(value.encode("utf-8"))
+    return "sha256:" + h.hexdigest()
+
+
+def _digest(obj) -> str:
+    encoded = json.dumps(obj, sort_keys=True, separators=(",", ":"), default=str).encode("utf-8")
+    return hashlib.sha256(encoded).hexdigest()
+
+
+def payload_fingerprint(data: Dict, company_data: Dict) -> str:
+    """
+    Fingerprint a webhook payload before any work is done.
+
+    Args:
+        data: Raw webhook payload
+        company_data: Output of extract_company_data(data)
+
+    Returns:
+        Hex digest identifying this request
+    """
+    images = {field: _image_token(data.get(field)) for field in IMAGE_FIELDS}
+    images.update({
+        f"company_data.{field}": _image_token(company_data.get(field)) for field in IMAGE_FIELDS
+    })
+    extra = company_data.get("headshots")
+    if isinstance(extra, list):
+        images["company_data.headshots"] = [_image_token(h) for h in extra]
+    return _digest({
+        "company_data": normalize_company_data(company_data),
+        "images": images,
+        "notion_page_id": data.get("notion_page_id"),
+        "notion_last_edited": data.get("notion_last_edited"),
+    })
+
+
+def file_sha256(path: str, chunk_size: int = 1024 * 1024) -> str:
+    """SHA-256 of a file's contents, read in chunks."""
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def content_fingerprint(
+    company_data: Dict,
+    image_paths: Iterable[Optional[str]],
+    last_edited: Optional[str],
+    notion_page_id: Optional[str] = None
+) -> str:
+    """
+    Fingerprint the actual inputs of a render once images have been ingested.
+    Catches re-fires whose image URLs differ but whose bytes are identical.
+
+    Args:
+        company_data: Normalized company data
+        image_paths: Downloaded image files (None for missing images)
+        last_edited: notion_last_edited from the payload
+        notion_page_id: notion_page_id from the payload
+
+    Returns:
+        Hex digest of the render inputs
+    """
+    extra = company_data.get("headshots")
+    return _digest({
+        "company_data": normalize_company_data(company_data),
+        "images": [file_sha256(p) if p else None for p in image_paths],
+        "extra_headshots": [_image_token(h) for h in extra] if isinstance(extra, list) else None,
+        "notion_page_id": notion_page_id,
+        "notion_last_edited": last_edited,
+    })
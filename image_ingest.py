@@ -0,0 +1,422 @@
+"""
+Image ingestion for onboarding webhooks.
+Fetches headshots and logos (URLs, base64 or multipart uploads) concurrently
+through a shared keep-alive session, with per-URL timeouts, a byte cap and
+content sniffing so HTML error pages fail fast instead of reaching PIL.
+"""
+import os
+import re
+import time
+import base64
+import binascii
+import hashlib
+import shutil
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Sequence, Tuple
+from urllib.parse import urljoin
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from config import Config
+
+
+class ImageIngestError(ValueError):
+    """Raised when an image cannot be fetched or is not a usable image."""
+
+
+# Magic numbers of formats PIL can open
+_IMAGE_SIGNATURES = [
+    (b"\x89PNG\r\n\x1a\n", "image/png"),
+    (b"\xff\xd8\xff", "image/jpeg"),
+    (b"GIF87a", "image/gif"),
+    (b"GIF89a", "image/gif"),
+    (b"BM", "image/bmp"),
+    (b"II*\x00", "image/tiff"),
+    (b"MM\x00*", "image/tiff"),
+]
+
+_session = None
+_session_lock = threading.Lock()
+
+
+def get_session() -> requests.Session:
+    """Shared keep-alive session (connection pool reused across requests and threads)."""
+    global _session
+    with _session_lock:
+        if _session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=8, pool_maxsize=max(8, Config.IMAGE_FETCH_CONCURRENCY * 2))
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            session.headers["User-Agent"] = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"
+            _session = session
+        return _session
+
+
+def sniff_image_type(head: bytes) -> Optional[str]:
+    """
+    Identify an image from its first bytes.
+
+    Args:
+        head: First bytes of the file (16 is enough)
+
+    Returns:
+        MIME type, or None if this does not look like an image
+    """
+    for signature, mime in _IMAGE_SIGNATURES:
+        if head.startswith(signature):
+            return mime
+    if head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+        return "image/webp"
+    if head[4:8] == b"ftyp" and head[8:12] in (b"heic", b"heix", b"mif1", b"avif"):
+        return "image/heif"
+    return None
+
+
+def _looks_like_html(head: bytes) -> bool:
+    snippet = head.lstrip()[:64].lower()
+    return snippet.startswith((b"<!doctype", b"<html", b"<head", b"<?xml", b"<body"))
+
+
+def normalize_drive_url(url: str) -> str:
+    """
+    Convert Google Drive share links to direct-download links.
+    confirm=t skips the virus-scan interstitial so large files need one request, not two.
+    """
+    if "drive.google.com" not in url:
+        return url
+    match = re.search(r"[?&]id=([a-zA-Z0-9_-]+)", url) or re.search(r"/file/d/([a-zA-Z0-9_-]+)", url)
+    if not match:
+        return url
+    file_id = match.group(1)
+    print(f"  Converting Google Drive URL to direct download: {file_id}")
+    return f"https://drive.google.com/uc?export=download&id={file_id}&confirm=t"
+
+
+def _drive_confirm_url(html: str, base_url: str) -> Optional[str]:
+    """Extract the real download URL from a Drive virus-scan warning page."""
+    match = re.search(r'href="(/uc\?export=download[^"]+)"', html)
+    if match:
+        return urljoin("https://drive.google.com", match.group(1).replace("&amp;", "&"))
+    form = re.search(r'<form[^>]+action="([^"]+)"[^>]*>(.*?)</form>', html, re.S)
+    if form:
+        inputs = re.findall(r'<input[^>]+name="([^"]+)"[^>]+value="([^"]*)"', form.group(2))
+        if inputs:
+            query = "&".join(f"{k}={v}" for k, v in inputs)
+            return urljoin(base_url, form.group(1).replace("&amp;", "&")) + "?" + query
+    return None
+
+
+def fetch_url(url: str, output_path: str, timeout: Optional[Tuple[float, float]] = None,
+              max_bytes: Optional[int] = None, headers: Optional[Dict[str, str]] = None) -> Dict:
+    """
+    Stream an image URL to disk.
+
+    Args:
+        url: Image URL (Notion file URL, Google Drive link, any HTTP URL)
+        output_path: Path to save file
+        timeout: (connect, read) timeout in seconds
+        max_bytes: Abort once the body exceeds this many bytes
+        headers: Extra request headers (e.g. If-None-Match for revalidation)
+
+    Returns:
+        Dictionary with status (200, or 304 when nothing was written), mime,
+        etag and last_modified
+
+    Raises:
+        ImageIngestError: On HTTP errors, oversize bodies or non-image content
+    """
+    timeout = timeout or (Config.IMAGE_FETCH_CONNECT_TIMEOUT, Config.IMAGE_FETCH_READ_TIMEOUT)
+    max_bytes = max_bytes or Config.IMAGE_MAX_BYTES
+    url = normalize_drive_url(url)
+    session = get_session()
+
+    for attempt in range(2):
+        try:
+            response = session.get(url, stream=True, timeout=timeout, allow_redirects=True, headers=headers)
+            response.raise_for_status()
+        except requests.RequestException as e:
+            raise ImageIngestError(f"Download failed for {url[:100]}: {e}") from e
+
+        with response:
+            validators = {
+                "etag": response.headers.get("ETag"),
+                "last_modified": response.headers.get("Last-Modified"),
+            }
+            if response.status_code == 304:
+                return {"status": 304, "mime": None, **validators}
+
+            length = response.headers.get("Content-Length")
+            if length and length.isdigit() and int(length) > max_bytes:
+                raise ImageIngestError(f"Image too large ({int(length)} bytes > {max_bytes}): {url[:100]}")
+
+            chunks = response.iter_content(chunk_size=64 * 1024)
+            first = b""
+            for chunk in chunks:
+                first += chunk
+                if len(first) >= 16:
+                    break
+
+            mime = sniff_image_type(first)
+            if mime is None:
+                content_type = response.headers.get("Content-Type", "")
+                if attempt == 0 and "drive.google.com" in url and ("text/html" in content_type or _looks_like_html(first)):
+                    # Drive interstitial: read at most 512 KB of HTML to find the confirm link
+                    html = first
+                    for chunk in chunks:
+                        html += chunk
+                        if len(html) > 512 * 1024:
+                            break
+                    confirm_url = _drive_confirm_url(html.decode("utf-8", "ignore"), response.url)
+                    if confirm_url:
+                        print("  Found download link after virus scan warning, retrying...")
+                        url = confirm_url
+                        continue
+                kind = "HTML page" if ("text/html" in content_type or _looks_like_html(first)) else (content_type or "unknown content")
+                raise ImageIngestError(f"URL did not return an image ({kind}): {url[:100]}")
+
+            total = len(first)
+            with open(output_path, "wb") as f:
+                f.write(first)
+                for chunk in chunks:
+                    total += len(chunk)
+                    if total > max_bytes:
+                        break
+                    f.write(chunk)
+            if total > max_bytes:
+                os.unlink(output_path)
+                raise ImageIngestError(f"Image too large (> {max_bytes} bytes): {url[:100]}")
+            return {"status": 200, "mime": mime, **validators}
+
+    raise ImageIngestError(f"Could not resolve Google Drive download: {url[:100]}")
+
+
+# Decode this many base64 characters at a time (multiple of 4)
+_BASE64_CHUNK_CHARS = 256 * 1024
+# b64decode's default (non-validating) mode discards these before decoding
+_BASE64_NOISE = re.compile(r"[^A-Za-z0-9+/=]")
+
+
+def iter_base64_decode(image_data: str, start: int = 0, chunk_chars: int = _BASE64_CHUNK_CHARS):
+    """
+    Decode base64 text piecewise so the decoded bytes never exist as one copy.
+    Yields the same bytes as base64.b64decode(image_data[start:]).
+
+    Raises:
+        binascii.Error: On invalid padding
+    """
+    carry = ""
+    for offset in range(start, len(image_data), chunk_chars):
+        piece = carry + _BASE64_NOISE.sub("", image_data[offset:offset + chunk_chars])
+        usable = len(piece) - len(piece) % 4
+        carry = piece[usable:]
+        if usable:
+            yield base64.b64decode(piece[:usable])
+    if carry:
+        yield base64.b64decode(carry)
+
+
+def decode_base64_image(image_data: str, output_path: str, max_bytes: Optional[int] = None) -> str:
+    """
+    Decode a base64 (optionally data: URI) image to disk in chunks.
+
+    Returns:
+        Sniffed MIME type of the saved image
+    """
+    max_bytes = max_bytes or Config.IMAGE_MAX_BYTES
+    head = image_data[:512]
+    start = len(head) - len(head.lstrip())
+    if head.lstrip().startswith("data:"):
+        comma = image_data.find(",", start, start + 512)
+        if comma != -1:
+            start = comma + 1
+    mime, total = None, 0
+    try:
+        with open(output_path, "wb") as f:
+            for chunk in iter_base64_decode(image_data, start):
+                if mime is None:
+                    mime = sniff_image_type(chunk[:16])
+                    if mime is None:
+                        raise ImageIngestError("Base64 data is not a recognised image format")
+                total += len(chunk)
+                if total > max_bytes:
+                    raise ImageIngestError(f"Image too large (> {max_bytes} bytes)")
+                f.write(chunk)
+        if mime is None:
+            raise ImageIngestError("Base64 data is not a recognised image format")
+    except (binascii.Error, ValueError) as e:
+        os.unlink(output_path)
+        if isinstance(e, ImageIngestError):
+            raise
+        raise ImageIngestError(f"Invalid base64 image data: {e}") from e
+    return mime
+
+
+# Multipart uploads are stored as UPLOAD_DIR/<sha256> and referenced as "upload:<sha256>"
+UPLOAD_PREFIX = "upload:"
+_UPLOAD_NAME = re.compile(r"^[0-9a-f]{64}$")
+_last_upload_sweep = 0.0
+_upload_sweep_lock = threading.Lock()
+
+
+def _upload_dir() -> str:
+    os.makedirs(Config.UPLOAD_DIR, exist_ok=True)
+    return Config.UPLOAD_DIR
+
+
+def new_upload_file():
+    """
+    Temp file for one multipart file part, created in UPLOAD_DIR so store_upload
+    can hard-link it into place. Removed when the request closes it.
+    """
+    return tempfile.NamedTemporaryFile(dir=_upload_dir(), prefix="upload-", suffix=".part")
+
+
+def upload_path(reference: str) -> Optional[str]:
+    """Path of an "upload:<sha256>" reference, or None if it is not one."""
+    if not isinstance(reference, str) or not reference.startswith(UPLOAD_PREFIX):
+        return None
+    name = reference[len(UPLOAD_PREFIX):]
+    if not _UPLOAD_NAME.match(name):
+        raise ImageIngestError(f"Invalid upload reference: {reference[:100]}")
+    return os.path.join(Config.UPLOAD_DIR, name)
+
+
+def store_upload(stream, max_bytes: Optional[int] = None) -> str:
+    """
+    Keep an uploaded image (a file part of a multipart request) until its job runs.
+    The file is hashed from disk and hard-linked under its SHA-256, so the body is
+    never held in memory and identical uploads share one file.
+
+    Args:
+        stream: File object of the upload (from new_upload_file, or any readable file)
+        max_bytes: Reject uploads larger than this
+
+    Returns:
+        "upload:<sha256>" reference accepted by ingest_image
+
+    Raises:
+        ImageIngestError: On oversize or non-image uploads
+    """
+    max_bytes = max_bytes or Config.IMAGE_MAX_BYTES
+    stream.seek(0)
+    head = stream.read(16)
+    if sniff_image_type(head) is None:
+        raise ImageIngestError("Uploaded file is not a recognised image format")
+    h = hashlib.sha256(head)
+    total = len(head)
+    for chunk in iter(lambda: stream.read(1024 * 1024), b""):
+        total += len(chunk)
+        if total > max_bytes:
+            raise ImageIngestError(f"Image too large (> {max_bytes} bytes)")
+        h.update(chunk)
+
+    digest = h.hexdigest()
+    path = os.path.join(_upload_dir(), digest)
+    if os.path.exists(path):
+        os.utime(path)
+    else:
+        source = getattr(stream, "name", None)
+        try:
+            os.link(source, path)
+        except (OSError, TypeError):
+            # Not a file in UPLOAD_DIR (or no hard links here): copy it instead
+            partial = f"{path}.{threading.get_ident()}.tmp"
+            stream.seek(0)
+            with open(partial, "wb") as f:
+                shutil.copyfileobj(stream, f, 1024 * 1024)
+            os.replace(partial, path)
+    _sweep_uploads()
+    return UPLOAD_PREFIX + digest
+
+
+def _sweep_uploads():
+    """Delete uploads older than UPLOAD_RETENTION_SECONDS (at most once an hour per process)."""
+    global _last_upload_sweep
+    now = time.time()
+    with _upload_sweep_lock:
+        if now - _last_upload_sweep < 3600:
+            return
+        _last_upload_sweep = now
+    cutoff = now - Config.UPLOAD_RETENTION_SECONDS
+    for entry in os.scandir(Config.UPLOAD_DIR):
+        try:
+            if _UPLOAD_NAME.match(entry.name) and entry.stat().st_mtime < cutoff:
+                os.unlink(entry.path)
+        except OSError:
+            pass
+
+
+def ingest_image(image_data, output_path: str) -> str:
+    """
+    Save one image input (URL, upload reference or base64 string) to output_path.
+
+    Returns:
+        output_path
+    """
+    if not isinstance(image_data, str) or not image_data or image_data.isspace():
+        raise ImageIngestError("Empty image input")
+    head = image_data[:512].lstrip()
+    if not head.startswith((UPLOAD_PREFIX, "http://", "https://")):
+        # Inline base64 can be megabytes: decode without making stripped copies
+        decode_base64_image(image_data, output_path)
+        return output_path
+    image_data = image_data.strip()
+    uploaded = upload_path(image_data)
+    if uploaded:
+        try:
+            shutil.copyfile(uploaded, output_path)
+        except FileNotFoundError as e:
+            raise ImageIngestError(f"Uploaded image no longer available: {image_data}") from e
+    elif image_data.startswith(("http://", "https://")):
+        if Config.ASSET_CACHE_ENABLED:
+            from asset_cache import get_asset_cache
+            get_asset_cache().fetch(image_data, output_path)
+        else:
+            fetch_url(image_data, output_path)
+    return output_path
+
+
+def ingest_images(slots: Dict[str, Tuple[Sequence, str]], temp_dir: str,
+                  max_workers: Optional[int] = None) -> Tuple[Dict[str, Optional[str]], Dict[str, List[str]]]:
+    """
+    Fetch several images concurrently.
+
+    Args:
+        slots: name -> (candidate inputs, filename). Candidates are tried in order
+               (e.g. payload field first, then company_data field) until one succeeds.
+        temp_dir: Directory to save files into
+        max_workers: Thread pool size (default IMAGE_FETCH_CONCURRENCY)
+
+    Returns:
+        (paths, errors): name -> saved path (None if every candidate failed),
+                         name -> list of error messages
+    """
+    def run(name: str, candidates: Sequence, filename: str):
+        errors = []
+        output_path = os.path.join(temp_dir, filename)
+        for candidate in candidates:
+            if not candidate:
+                continue
+            try:
+                return ingest_image(candidate, output_path), errors
+            except Exception as e:
+                errors.append(str(e))
+                print(f"Warning: Failed to ingest {name}: {e}")
+        return None, errors
+
+    # Drop empty and repeated candidates (flat payloads repeat fields inside company_data)
+    slots = {name: (list(dict.fromkeys(x for x in c if x)), f) for name, (c, f) in slots.items()}
+    slots = {name: value for name, value in slots.items() if value[0]}
+    if not slots:
+        return {}, {}
+    workers = max(1, min(max_workers or Config.IMAGE_FETCH_CONCURRENCY, len(slots)))
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="ingest") as pool:
+        futures = {name: pool.submit(run, name, c, f) for name, (c, f) in slots.items()}
+    paths, errors = {}, {}
+    for name, future in futures.items():
+        paths[name], errors[name] = future.result()
+    return paths, errors
@@ -5,23 +5,31 @@ Uses Gemini 3 Pro for advanced image processing.
 """
 import io
 import requests
-import base64
-from PIL import Image, ImageEnhance, ImageFont
+from PIL import Image
 from typing import Optional, List
 from config import Config
+import cutout_cache
+import font_registry
+
+
+REMOVEBG_PARAMS = {'size': 'auto'}  # Sent to Remove.bg; part of the cutout cache key
 
 
 class ImageProcessor:
     """Process images for portfolio slides."""
     
     @staticmethod
-    def remove_background(image_path: str, output_path: Optional[str] = None) -> bytes:
+    def remove_background(image_path: str, output_path: Optional[str] = None,
+                          source_sha: Optional[str] = None) -> bytes:
         """
         Remove background from image using Remove.bg API.
+        Successful results are kept in the cutout cache, so the same photo is
+        only sent to Remove.bg once.
         
         Args:
             image_path: Path to input image or image URL
             output_path: Optional path to save output image
+            source_sha: cutout_cache.source_sha256 of image_path, if the caller already has it
             
         Returns:
             Bytes of processed image
@@ -38,6 +46,24 @@ class ImageProcessor:
             with open(image_path, 'rb') as f:
                 return f.read()
         
+        cache = cutout_cache.get_cutout_cache()
+        if cache is not None:
+            try:
+                source_sha = source_sha or cutout_cache.source_sha256(image_path)
+                cached = cache.get(source_sha, "removebg", REMOVEBG_PARAMS)
+            except Exception as e:
+                print(f"Warning: Cutout cache lookup failed: {e}")
+                cache, cached = None, None
+            if cached is not None:
+                print("Using cached Remove.bg cutout")
+                buffer = io.BytesIO()
+                cached[0].save(buffer, format='PNG')
+                image_bytes = buffer.getvalue()
+                if output_path:
+                    with open(output_path, 'wb') as out_file:
+                        out_file.write(image_bytes)
+                return image_bytes
+        
         api_url = "https://api.remove.bg/v1.0/removebg"
         
         try:
@@ -45,13 +71,18 @@ class ImageProcessor:
                 response = requests.post(
                     api_url,
                     files={'image_file': image_file},
-                    data={'size': 'auto'},
+                    data=REMOVEBG_PARAMS,
                     headers={'X-Api-Key': Config.REMOVEBG_API_KEY},
                     timeout=15  # 15 second timeout to prevent hanging
                 )
             
             if response.status_code == 200:
                 image_bytes = response.content
+                if cache is not None:
+                    try:
+                        cache.put(source_sha, "removebg", REMOVEBG_PARAMS, image_bytes)
+                    except Exception as e:
+                        print(f"Warning: Could not cache Remove.bg cutout: {e}")
                 if output_path:
                     with open(output_path, 'wb') as out_file:
                         out_file.write(image_bytes)
@@ -474,13 +505,7 @@ The headshots should be arranged horizontally with slight overlap, maintaining t
         )
         
         # Add location text in bold black
-        try:
-            font = ImageFont.truetype("/System/Library/Fonts/Helvetica-Bold.ttc", 18)
-        except:
-            try:
-                font = ImageFont.truetype("/System/Library/Fonts/Helvetica.ttc", 18)
-            except:
-                font = ImageFont.load_default()
+        font = font_registry.get_font(18, bold=True)
         
         # Center text in box
         text_x = text_box_x + text_box_width // 2
@@ -0,0 +1,355 @@
+"""
+Durable background job queue for onboarding webhooks.
+Payloads are persisted to a local SQLite file so they survive worker restarts,
+and a pool of background threads drains the queue.
+"""
+import os
+import json
+import time
+import uuid
+import sqlite3
+import threading
+from typing import Callable, Dict, Optional, Tuple
+
+
+# Job states
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+
+# Stage states
+STAGE_RUNNING = "running"
+STAGE_DONE = "done"
+STAGE_FAILED = "failed"
+STAGE_SKIPPED = "skipped"
+
+
+class JobQueue:
+    """SQLite-backed job queue with a pool of worker threads."""
+
+    def __init__(self, db_path: str, workers: int = 2, lease_seconds: int = 900, poll_interval: float = 1.0,
+                 max_attempts: int = 3):
+        """
+        Initialize the queue (creates the database if needed).
+
+        Args:
+            db_path: Path to the SQLite file
+            workers: Number of background worker threads to start
+            lease_seconds: How long a job may stay "running" before it is re-queued. Leases are
+                not renewed while a job runs, so this must exceed the worst-case run time
+                (slowest render plus uploads); a shorter lease hands a live job to a second worker.
+            poll_interval: Seconds between polls when idle (picks up jobs queued by other processes)
+            max_attempts: Runs a job gets before an expired lease marks it failed instead of
+                re-queuing it (stops a job that crashes or hangs its worker from looping forever)
+        """
+        self.db_path = db_path
+        self.workers = max(1, int(workers))
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max(1, int(max_attempts))
+        self.poll_interval = poll_interval
+        self._wakeup = threading.Event()
+        self._stop = threading.Event()
+        self._threads = []
+        self._start_lock = threading.Lock()
+        self._local = threading.local()
+        self._init_db()
+
+    def _connect(self) -> sqlite3.Connection:
+        """Return a per-thread connection (sqlite3 connections are not thread-safe)."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            directory = os.path.dirname(os.path.abspath(self.db_path))
+            os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _init_db(self):
+        conn = self._connect()
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS jobs (
+                id TEXT PRIMARY KEY,
+                status TEXT NOT NULL,
+                payload TEXT NOT NULL,
+                stages TEXT NOT NULL DEFAULT '{}',
+                result TEXT,
+                error TEXT,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                created_at REAL NOT NULL,
+                started_at REAL,
+                finished_at REAL,
+                fingerprint TEXT,
+                content_fingerprint TEXT
+            )
+            """
+        )
+        # Databases created before idempotency support lack the fingerprint columns
+        columns = {row["name"] for row in conn.execute("PRAGMA table_info(jobs)")}
+        for column in ("fingerprint", "content_fingerprint"):
+            if column not in columns:
+                conn.execute(f"ALTER TABLE jobs ADD COLUMN {column} TEXT")
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs (status, created_at)")
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_fingerprint ON jobs (fingerprint)")
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_content_fingerprint ON jobs (content_fingerprint)")
+
+    def enqueue(self, payload: Dict, fingerprint: Optional[str] = None) -> str:
+        """
+        Persist a payload and return its job ID.
+
+        Args:
+            payload: JSON-serializable webhook payload
+            fingerprint: Optional idempotency key (see idempotency.payload_fingerprint)
+
+        Returns:
+            Job ID
+        """
+        job_id = uuid.uuid4().hex
+        self._connect().execute(
+            "INSERT INTO jobs (id, status, payload, created_at, fingerprint) VALUES (?, ?, ?, ?, ?)",
+            (job_id, QUEUED, json.dumps(payload), time.time(), fingerprint),
+        )
+        self._wakeup.set()
+        return job_id
+
+    def enqueue_unique(self, payload: Dict, fingerprint: str) -> Tuple[str, bool]:
+        """
+        Enqueue a payload unless a job with the same fingerprint is queued, running or succeeded.
+        The check and insert happen in one transaction, so concurrent duplicates
+        (even from other gunicorn workers) collapse into a single job.
+
+        Args:
+            payload: JSON-serializable webhook payload
+            fingerprint: Idempotency key
+
+        Returns:
+            (job_id, created) - created is False when an existing job was returned
+        """
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute(
+                "SELECT id FROM jobs WHERE fingerprint = ? AND status IN (?, ?, ?) "
+                "ORDER BY created_at DESC LIMIT 1",
+                (fingerprint, QUEUED, RUNNING, SUCCEEDED),
+            ).fetchone()
+            if row is not None:
+                conn.execute("COMMIT")
+                return row["id"], False
+            job_id = uuid.uuid4().hex
+            conn.execute(
+                "INSERT INTO jobs (id, status, payload, created_at, fingerprint) VALUES (?, ?, ?, ?, ?)",
+                (job_id, QUEUED, json.dumps(payload), time.time(), fingerprint),
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        self._wakeup.set()
+        return job_id, True
+
+    def record_completed(self, payload: Dict, fingerprint: str, result: Dict) -> str:
+        """
+        Store the result of work done outside the queue (ONBOARDING_SYNC mode)
+        so later duplicates can be answered from it.
+
+        Returns:
+            Job ID of the stored record
+        """
+        job_id = uuid.uuid4().hex
+        now = time.time()
+        self._connect().execute(
+            "INSERT INTO jobs (id, status, payload, result, created_at, started_at, finished_at, fingerprint) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            (job_id, SUCCEEDED if result.get("success") else FAILED, json.dumps(payload),
+             json.dumps(result, default=str), now, now, now, fingerprint),
+        )
+        return job_id
+
+    def set_content_fingerprint(self, job_id: str, content_fingerprint: str):
+        """Attach the post-ingestion fingerprint (image bytes) to a job."""
+        self._connect().execute(
+            "UPDATE jobs SET content_fingerprint = ? WHERE id = ?", (content_fingerprint, job_id)
+        )
+
+    def find_succeeded(self, fingerprint: Optional[str] = None, content_fingerprint: Optional[str] = None,
+                       exclude_job_id: Optional[str] = None) -> Optional[Dict]:
+        """
+        Find the most recent succeeded job matching a payload or content fingerprint.
+
+        Returns:
+            Public job view (see get()), or None
+        """
+        if fingerprint:
+            column, value = "fingerprint", fingerprint
+        elif content_fingerprint:
+            column, value = "content_fingerprint", content_fingerprint
+        else:
+            return None
+        row = self._connect().execute(
+            f"SELECT id FROM jobs WHERE {column} = ? AND status = ? AND id != ? "
+            "ORDER BY finished_at DESC LIMIT 1",
+            (value, SUCCEEDED, exclude_job_id or ""),
+        ).fetchone()
+        return self.get(row["id"]) if row else None
+
+    def get(self, job_id: str) -> Optional[Dict]:
+        """
+        Get the public view of a job (status, per-stage status and result).
+
+        Args:
+            job_id: Job ID
+
+        Returns:
+            Dictionary describing the job, or None if not found
+        """
+        row = self._connect().execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        if row is None:
+            return None
+        return {
+            "job_id": row["id"],
+            "status": row["status"],
+            "stages": json.loads(row["stages"] or "{}"),
+            "result": json.loads(row["result"]) if row["result"] else None,
+            "error": row["error"],
+            "attempts": row["attempts"],
+            "created_at": row["created_at"],
+            "started_at": row["started_at"],
+            "finished_at": row["finished_at"],
+            "fingerprint": row["fingerprint"],
+        }
+
+    def update_stage(self, job_id: str, stage: str, status: str, detail: Optional[str] = None):
+        """
+        Record the status of one pipeline stage.
+
+        Args:
+            job_id: Job ID
+            stage: Stage name (e.g. "render", "drive")
+            status: One of STAGE_RUNNING / STAGE_DONE / STAGE_FAILED / STAGE_SKIPPED
+            detail: Optional short message (error text, skip reason)
+        """
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute("SELECT stages FROM jobs WHERE id = ?", (job_id,)).fetchone()
+            if row is None:
+                conn.execute("ROLLBACK")
+                return
+            stages = json.loads(row["stages"] or "{}")
+            entry = stages.get(stage, {})
+            now = time.time()
+            if status == STAGE_RUNNING:
+                entry = {"status": status, "started_at": now}
+            else:
+                entry["status"] = status
+                entry["finished_at"] = now
+                if entry.get("started_at"):
+                    entry["duration_seconds"] = round(now - entry["started_at"], 3)
+            if detail:
+                entry["detail"] = detail
+            stages[stage] = entry
+            conn.execute("UPDATE jobs SET stages = ? WHERE id = ?", (json.dumps(stages), job_id))
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    def _claim(self) -> Optional[sqlite3.Row]:
+        """Atomically move the oldest queued job to running (safe across processes)."""
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            # Re-queue jobs whose worker died mid-run (e.g. gunicorn restarted the process),
+            # unless they already used up their attempts
+            now = time.time()
+            expired = now - self.lease_seconds
+            conn.execute(
+                "UPDATE jobs SET status = ?, error = ?, finished_at = ? "
+                "WHERE status = ? AND started_at < ? AND attempts >= ?",
+                (FAILED, f"Lease expired on each of {self.max_attempts} attempt(s)", now,
+                 RUNNING, expired, self.max_attempts),
+            )
+            conn.execute(
+                "UPDATE jobs SET status = ? WHERE status = ? AND started_at < ?",
+                (QUEUED, RUNNING, expired),
+            )
+            row = conn.execute(
+                "SELECT * FROM jobs WHERE status = ? ORDER BY created_at LIMIT 1", (QUEUED,)
+            ).fetchone()
+            if row is not None:
+                conn.execute(
+                    "UPDATE jobs SET status = ?, started_at = ?, attempts = attempts + 1 WHERE id = ?",
+                    (RUNNING, time.time(), row["id"]),
+                )
+            conn.execute("COMMIT")
+            return row
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    def _finish(self, job_id: str, status: str, result: Optional[Dict] = None, error: Optional[str] = None):
+        self._connect().execute(
+            "UPDATE jobs SET status = ?, result = ?, error = ?, finished_at = ? WHERE id = ?",
+            (status, json.dumps(result, default=str) if result is not None else None, error, time.time(), job_id),
+        )
+
+    def start(self, handler: Callable[[str, Dict], Dict]):
+        """
+        Start the worker threads (idempotent, safe to call from every request).
+
+        Args:
+            handler: Called as handler(job_id, payload) and returns the result dict.
+                     The job is marked failed if it raises or returns success=False.
+        """
+        with self._start_lock:
+            self._threads = [t for t in self._threads if t.is_alive()]
+            for i in range(len(self._threads), self.workers):
+                t = threading.Thread(
+                    target=self._worker_loop,
+                    args=(handler,),
+                    name=f"onboarding-worker-{i}",
+                    daemon=True,
+                )
+                t.start()
+                self._threads.append(t)
+
+    def stop(self):
+        """Signal worker threads to exit after their current job."""
+        self._stop.set()
+        self._wakeup.set()
+
+    def _worker_loop(self, handler: Callable[[str, Dict], Dict]):
+        while not self._stop.is_set():
+            try:
+                row = self._claim()
+            except sqlite3.OperationalError as e:
+                print(f"⚠️  Job queue busy, retrying: {e}")
+                row = None
+            if row is None:
+                self._wakeup.wait(self.poll_interval)
+                self._wakeup.clear()
+                continue
+
+            job_id = row["id"]
+            print(f"▶️  Starting job {job_id} (attempt {row['attempts'] + 1})")
+            try:
+                result = handler(job_id, json.loads(row["payload"]))
+                ok = bool(result and result.get("success"))
+                errors = (result or {}).get("errors") or []
+                self._finish(
+                    job_id,
+                    SUCCEEDED if ok else FAILED,
+                    result=result,
+                    error=None if ok else ("; ".join(str(e) for e in errors) or "Job failed"),
+                )
+                print(f"{'✓' if ok else '❌'} Job {job_id} {'succeeded' if ok else 'failed'}")
+            except Exception as e:
+                import traceback
+                traceback.print_exc()
+                self._finish(job_id, FAILED, error=str(e))
+                print(f"❌ Job {job_id} failed: {e}")
@@ -0,0 +1,60 @@
+"""
+Deferred imports for heavy optional modules.
+The web app binds integration classes to LazyObject stand-ins so a worker only
+imports Canva, Drive, Notion, PDF or imaging code when a request first uses it.
+"""
+import importlib
+import threading
+from typing import Callable, Optional
+
+
+class LazyObject:
+    """Stand-in for `from module import attr` that performs the import on first use."""
+
+    def __init__(self, module_name: str, attr: Optional[str] = None, on_load: Optional[Callable[[], None]] = None):
+        """
+        Args:
+            module_name: Module to import
+            attr: Attribute of the module to stand in for (None for the module itself)
+            on_load: Called once after the import (e.g. to instrument newly loaded HTTP clients)
+        """
+        object.__setattr__(self, "_module_name", module_name)
+        object.__setattr__(self, "_attr", attr)
+        object.__setattr__(self, "_on_load", on_load)
+        object.__setattr__(self, "_target", None)
+        object.__setattr__(self, "_lock", threading.Lock())
+
+    def _resolve(self):
+        target = self._target
+        if target is None:
+            with self._lock:
+                target = self._target
+                if target is None:
+                    module = importlib.import_module(self._module_name)
+                    target = getattr(module, self._attr) if self._attr else module
+                    if self._on_load:
+                        self._on_load()
+                    object.__setattr__(self, "_target", target)
+        return target
+
+    @property
+    def loaded(self) -> bool:
+        return self._target is not None
+
+    def __call__(self, *args, **kwargs):
+        return self._resolve()(*args, **kwargs)
+
+    def __getattr__(self, name):
+        return getattr(self._resolve(), name)
+
+    def __setattr__(self, name, value):
+        setattr(self._resolve(), name, value)
+
+    def __repr__(self):
+        what = f"{self._module_name}.{self._attr}" if self._attr else self._module_name
+        return f"<LazyObject {what} ({'loaded' if self.loaded else 'not loaded'})>"
+
+
+def lazy(module_name: str, attr: Optional[str] = None, on_load: Optional[Callable[[], None]] = None) -> LazyObject:
+    """Shorthand for LazyObject(module_name, attr, on_load)."""
+    return LazyObject(module_name, attr, on_load)
@@ -0,0 +1,279 @@
+"""
+Latency instrumentation for the onboarding pipeline.
+Wall-clock and CPU histograms per pipeline stage and per outbound integration
+HTTP call, rendered in the Prometheus text format for the /metrics route.
+Metrics are per process; with several gunicorn workers each scrape sees one worker.
+"""
+import sys
+import time
+import threading
+from contextlib import contextmanager
+from typing import Callable, Dict, Optional, Sequence, Tuple
+from urllib.parse import urlparse
+
+
+STAGE_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 30, 60, 120)
+HTTP_BUCKETS = (0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+
+class Histogram:
+    """Cumulative-bucket histogram with labels (Prometheus semantics)."""
+
+    def __init__(self, name: str, help_text: str, label_names: Sequence[str], buckets: Sequence[float]):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = tuple(label_names)
+        self.buckets = tuple(sorted(buckets))
+        self._series: Dict[Tuple[str, ...], list] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels):
+        """Record one observation for the given label values."""
+        key = tuple(str(labels.get(name, "")) for name in self.label_names)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                # [bucket counts..., sum, count]
+                series = self._series[key] = [0] * len(self.buckets) + [0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[i] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    def render(self) -> str:
+        """Prometheus text exposition of this histogram."""
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            items = sorted((k, list(v)) for k, v in self._series.items())
+        for key, series in items:
+            base = [f'{n}="{_escape(v)}"' for n, v in zip(self.label_names, key)]
+            bounds = [str(b) for b in self.buckets] + ["+Inf"]
+            counts = series[:len(self.buckets)] + [series[-1]]
+            for bound, count in zip(bounds, counts):
+                labels = ",".join(base + ['le="%s"' % bound])
+                lines.append(f"{self.name}_bucket{{{labels}}} {count}")
+            label_str = "{" + ",".join(base) + "}" if base else ""
+            lines.append(f"{self.name}_sum{label_str} {series[-2]:.6f}")
+            lines.append(f"{self.name}_count{label_str} {series[-1]}")
+        return "\n".join(lines)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+STAGE_WALL = Histogram(
+    "onboarding_stage_duration_seconds",
+    "Wall-clock time per onboarding pipeline stage.",
+    ("stage", "status"), STAGE_BUCKETS,
+)
+STAGE_CPU = Histogram(
+    "onboarding_stage_cpu_seconds",
+    "CPU time of the worker thread per onboarding pipeline stage (total: sum over the job's stages).",
+    ("stage", "status"), STAGE_BUCKETS,
+)
+HTTP_WALL = Histogram(
+    "onboarding_http_request_duration_seconds",
+    "Wall-clock time of outbound HTTP requests (until response headers), by integration.",
+    ("integration", "method", "status"), HTTP_BUCKETS,
+)
+HTTP_CPU = Histogram(
+    "onboarding_http_request_cpu_seconds",
+    "CPU time of the calling thread spent in outbound HTTP requests, by integration.",
+    ("integration", "method", "status"), HTTP_BUCKETS,
+)
+
+SEGMENTATION_WALL = Histogram(
+    "onboarding_segmentation_inference_seconds",
+    "Wall-clock time of one local segmentation model run, by model and batch size.",
+    ("model", "batch"), HTTP_BUCKETS,
+)
+
+REGISTRY = [STAGE_WALL, STAGE_CPU, HTTP_WALL, HTTP_CPU, SEGMENTATION_WALL]
+
+
+def observe_stage(stage: str, wall: float, cpu: float, status: str = "done"):
+    """Record one stage timing."""
+    STAGE_WALL.observe(wall, stage=stage, status=status)
+    STAGE_CPU.observe(cpu, stage=stage, status=status)
+
+
+def observe_segmentation(model: str, batch: int, wall: float):
+    """Record one segmentation model run."""
+    SEGMENTATION_WALL.observe(wall, model=model, batch=batch)
+
+
+@contextmanager
+def stage_timer(stage: str):
+    """Time a block as a stage; status is "failed" if the block raises."""
+    wall, cpu = time.perf_counter(), time.thread_time()
+    status = "failed"
+    try:
+        yield
+        status = "done"
+    finally:
+        observe_stage(stage, time.perf_counter() - wall, time.thread_time() - cpu, status)
+
+
+class TimedProgress:
+    """
+    run_onboarding progress callback wrapper that records every stage reporting
+    "running" and then a terminal status in the stage histograms. Stages run on
+    pipeline threads, so each stage's CPU is measured on the thread reporting it
+    and the job's CPU is the sum over its stages.
+    """
+
+    def __init__(self, progress: Callable):
+        """
+        Args:
+            progress: Callback progress(stage, status, detail=None)
+        """
+        self.progress = progress
+        self._started: Dict[str, Tuple[float, float]] = {}
+        self._cpu = 0.0
+        self._lock = threading.Lock()
+
+    def __call__(self, stage: str, status: str, detail: Optional[str] = None):
+        if status == "running":
+            with self._lock:
+                self._started[stage] = (time.perf_counter(), time.thread_time())
+        else:
+            with self._lock:
+                started = self._started.pop(stage, None)
+            if started is not None:
+                wall, cpu = time.perf_counter() - started[0], time.thread_time() - started[1]
+                with self._lock:
+                    self._cpu += cpu
+                observe_stage(stage, wall, cpu, status)
+        return self.progress(stage, status, detail)
+
+    @property
+    def cpu_seconds(self) -> float:
+        """CPU seconds of the stages finished so far."""
+        with self._lock:
+            return self._cpu
+
+
+def timed_progress(progress: Callable) -> TimedProgress:
+    """
+    Wrap a run_onboarding progress callback so its stages are recorded in the
+    stage histograms (see TimedProgress).
+
+    Args:
+        progress: Callback progress(stage, status, detail=None)
+
+    Returns:
+        Callback with the same signature, with the job's stage CPU in cpu_seconds
+    """
+    return TimedProgress(progress)
+
+
+# Host suffix -> integration label (first match wins; keeps label cardinality bounded)
+_INTEGRATION_HOSTS = [
+    ("generativelanguage.googleapis.com", "gemini"),
+    ("oauth2.googleapis.com", "google_auth"),
+    ("googleapis.com", "google_drive"),
+    ("api.notion.com", "notion"),
+    ("api.canva.com", "canva"),
+    ("api.docsend.com", "docsend"),
+    ("api.remove.bg", "removebg"),
+    ("api.openai.com", "openai"),
+    ("drive.google.com", "image_download"),
+    ("googleusercontent.com", "image_download"),
+    ("amazonaws.com", "image_download"),
+    ("notion.so", "image_download"),
+    ("notion-static.com", "image_download"),
+]
+
+
+def integration_for_url(url) -> str:
+    """Map a request URL to the integration label used in HTTP histograms."""
+    host = (urlparse(str(url)).hostname or "").lower()
+    for suffix, name in _INTEGRATION_HOSTS:
+        if host == suffix or host.endswith("." + suffix):
+            return name
+    return "other"
+
+
+def observe_http(url, method: str, status, wall: float, cpu: float):
+    """Record one outbound HTTP request."""
+    labels = dict(integration=integration_for_url(url), method=(method or "GET").upper(), status=str(status))
+    HTTP_WALL.observe(wall, **labels)
+    HTTP_CPU.observe(cpu, **labels)
+
+
+_instrumented = set()
+_instrument_lock = threading.Lock()
+
+
+def _instrument_requests(requests):
+    original_send = requests.Session.send
+
+    def send(self, req, **kwargs):
+        wall, cpu, status = time.perf_counter(), time.thread_time(), "error"
+        try:
+            response = original_send(self, req, **kwargs)
+            status = response.status_code
+            return response
+        finally:
+            observe_http(req.url, req.method, status, time.perf_counter() - wall, time.thread_time() - cpu)
+
+    requests.Session.send = send
+
+
+def _instrument_httpx(httpx):
+    original_send = httpx.Client.send
+
+    def send(self, req, *args, **kwargs):
+        wall, cpu, status = time.perf_counter(), time.thread_time(), "error"
+        try:
+            response = original_send(self, req, *args, **kwargs)
+            status = response.status_code
+            return response
+        finally:
+            observe_http(req.url, req.method, status, time.perf_counter() - wall, time.thread_time() - cpu)
+
+    httpx.Client.send = send
+
+
+def _instrument_httplib2(httplib2):
+    original_request = httplib2.Http.request
+
+    def request(self, uri, method="GET", *args, **kwargs):
+        wall, cpu, status = time.perf_counter(), time.thread_time(), "error"
+        try:
+            response, content = original_request(self, uri, method, *args, **kwargs)
+            status = response.status
+            return response, content
+        finally:
+            observe_http(uri, method, status, time.perf_counter() - wall, time.thread_time() - cpu)
+
+    httplib2.Http.request = request
+
+
+_HTTP_LIBRARIES = {
+    "requests": _instrument_requests,  # Canva, DocSend, remove.bg, image downloads
+    "httpx": _instrument_httpx,  # notion-client, OpenAI
+    "httplib2": _instrument_httplib2,  # Google Drive API client
+}
+
+
+def instrument_http():
+    """
+    Time every outbound HTTP request made through requests, httpx and httplib2.
+    Only libraries that are already imported are patched, so this never pulls in
+    a client stack by itself; call it again after lazily importing an integration
+    (lazy_import does this via on_load). Safe to call any number of times.
+    """
+    with _instrument_lock:
+        for name, patch in _HTTP_LIBRARIES.items():
+            module = sys.modules.get(name)
+            if module is not None and name not in _instrumented:
+                patch(module)
+                _instrumented.add(name)
+
+
+def render() -> str:
+    """All metrics in the Prometheus text exposition format."""
+    return "\n".join(h.render() for h in REGISTRY) + "\n"
@@ -0,0 +1,209 @@
+"""
+Local headshot segmentation (rembg's U²-Net models on ONNX Runtime).
+One inference session per process, created with explicit intra-op/inter-op
+thread counts instead of rembg's defaults. Images go in and out as NumPy
+arrays (no PNG round trip), several headshots are normalized into one batch
+tensor and run together, and callers are serialized on a lock: a single run
+already uses every intra-op thread, so concurrent runs would only contend.
+Each inference is timed into the /metrics segmentation histogram.
+"""
+import threading
+import time
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+from PIL import Image
+
+import metrics
+from config import Config
+
+
+# rembg models that share U²-Net's input size and normalization
+U2NET_MODELS = ("u2net", "u2netp", "u2net_human_seg", "silueta")
+
+_INPUT_SIZE = (320, 320)
+_MEAN = np.array([0.485, 0.456, 0.406], dtype=np.float32)
+_STD = np.array([0.229, 0.224, 0.225], dtype=np.float32)
+
+
+def _to_rgb(image: np.ndarray) -> np.ndarray:
+    if image.ndim == 2:
+        return np.repeat(image[..., None], 3, axis=2)
+    return image[..., :3]
+
+
+def _to_rgba(image: np.ndarray) -> np.ndarray:
+    if image.ndim == 2:
+        image = np.repeat(image[..., None], 3, axis=2)
+    if image.shape[2] == 4:
+        return image
+    return np.dstack([image, np.full(image.shape[:2], 255, dtype=np.uint8)])
+
+
+class SegmentationService:
+    """Process-wide U²-Net session: batched, serialized inference on NumPy images."""
+
+    def __init__(self, model: str = "u2net", intra_op_threads: int = 0, inter_op_threads: int = 1,
+                 max_batch: int = 4):
+        """
+        Args:
+            model: rembg model name (one of U2NET_MODELS)
+            intra_op_threads: Threads inside one operator (0 = one per core, onnxruntime's default)
+            inter_op_threads: Threads running independent operators in parallel
+            max_batch: Largest number of images sent through the model in one run
+        """
+        if model not in U2NET_MODELS:
+            raise ValueError(f"Unsupported segmentation model {model!r} (expected one of {', '.join(U2NET_MODELS)})")
+        self.model = model
+        self.intra_op_threads = intra_op_threads
+        self.inter_op_threads = inter_op_threads
+        self.max_batch = max(1, max_batch)
+        self._session = None
+        self._batched = False  # Whether the model accepts more than one image per run
+        self._lock = threading.Lock()
+        self._runs = 0
+        self._images = 0
+        self._seconds = 0.0
+        self._last_seconds = None
+
+    def _model_path(self) -> str:
+        """Path of the model file, downloaded by rembg on first use."""
+        from rembg.sessions import sessions_class
+        for session_class in sessions_class:
+            if session_class.name() == self.model:
+                return str(session_class.download_models())
+        raise ValueError(f"rembg has no model named {self.model!r}")
+
+    def _load(self):
+        """Create the session (call with the lock held)."""
+        if self._session is not None:
+            return self._session
+        import warnings
+        # Suppress onnxruntime GPU warnings (Render doesn't have GPU)
+        warnings.filterwarnings('ignore', category=UserWarning, module='onnxruntime')
+        import onnxruntime as ort
+
+        options = ort.SessionOptions()
+        options.intra_op_num_threads = self.intra_op_threads
+        options.inter_op_num_threads = self.inter_op_threads
+        options.execution_mode = ort.ExecutionMode.ORT_SEQUENTIAL if self.inter_op_threads <= 1 \
+            else ort.ExecutionMode.ORT_PARALLEL
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        options.log_severity_level = 3  # Errors only
+
+        started = time.perf_counter()
+        session = ort.InferenceSession(self._model_path(), sess_options=options,
+                                       providers=["CPUExecutionProvider"])
+        batch_dim = session.get_inputs()[0].shape[0]
+        self._batched = not isinstance(batch_dim, int) or batch_dim > 1
+        self._session = session
+        print(f"   Segmentation model {self.model} loaded in {time.perf_counter() - started:.1f}s "
+              f"(intra_op={self.intra_op_threads or 'auto'}, inter_op={self.inter_op_threads}, "
+              f"batched={self._batched})")
+        return session
+
+    def load(self):
+        """Load the model now instead of on the first request (warm-up)."""
+        with self._lock:
+            self._load()
+
+    @staticmethod
+    def _preprocess(image: np.ndarray) -> np.ndarray:
+        """HxWxC uint8 image -> 3x320x320 float32 model input (rembg's U²-Net normalization)."""
+        resized = np.asarray(Image.fromarray(_to_rgb(image)).resize(_INPUT_SIZE, Image.Resampling.LANCZOS),
+                             dtype=np.float32)
+        resized /= max(float(resized.max()), 1e-6)
+        return ((resized - _MEAN) / _STD).transpose(2, 0, 1)
+
+    @staticmethod
+    def _postprocess(prediction: np.ndarray, size) -> np.ndarray:
+        """320x320 model output -> uint8 mask at the source size (width, height)."""
+        lo, hi = float(prediction.min()), float(prediction.max())
+        scaled = (prediction - lo) / (hi - lo) if hi > lo else np.zeros_like(prediction)
+        mask = Image.fromarray((scaled.clip(0, 1) * 255).astype(np.uint8), "L")
+        return np.asarray(mask.resize(size, Image.Resampling.LANCZOS))
+
+    def _run(self, session, batch: np.ndarray) -> np.ndarray:
+        """One timed inference (call with the lock held)."""
+        started = time.perf_counter()
+        output = session.run(None, {session.get_inputs()[0].name: batch})[0][:, 0]
+        elapsed = time.perf_counter() - started
+        self._runs += 1
+        self._images += len(batch)
+        self._seconds += elapsed
+        self._last_seconds = elapsed
+        metrics.observe_segmentation(self.model, len(batch), elapsed)
+        print(f"   Segmentation inference ({self.model}): {len(batch)} image(s) in {elapsed * 1000:.0f} ms")
+        return output
+
+    def masks(self, images: Sequence[np.ndarray]) -> List[np.ndarray]:
+        """
+        Foreground masks for images.
+
+        Args:
+            images: HxW, HxWx3 or HxWx4 uint8 arrays (alpha is ignored)
+
+        Returns:
+            HxW uint8 masks (255 = foreground), one per image
+
+        Raises:
+            ImportError: If rembg/onnxruntime are not installed
+        """
+        if not images:
+            return []
+        inputs = np.stack([self._preprocess(image) for image in images]).astype(np.float32)
+        with self._lock:
+            session = self._load()
+            step = self.max_batch if self._batched else 1
+            predictions = np.concatenate([self._run(session, inputs[i:i + step])
+                                          for i in range(0, len(inputs), step)])
+        return [self._postprocess(prediction, (image.shape[1], image.shape[0]))
+                for prediction, image in zip(predictions, images)]
+
+    def cutouts(self, images: Sequence[np.ndarray]) -> List[np.ndarray]:
+        """
+        RGBA cutouts: every channel of each image scaled by its mask, as
+        rembg.remove's default (naive) cutout does.
+
+        Args:
+            images: HxW, HxWx3 or HxWx4 uint8 arrays
+
+        Returns:
+            HxWx4 uint8 arrays, one per image
+        """
+        results = []
+        for image, mask in zip(images, self.masks(images)):
+            rgba = _to_rgba(image).astype(np.uint16)
+            results.append(((rgba * mask[..., None].astype(np.uint16) + 127) // 255).astype(np.uint8))
+        return results
+
+    def stats(self) -> Dict:
+        """Inference counters for this process."""
+        with self._lock:
+            return {
+                "model": self.model,
+                "loaded": self._session is not None,
+                "batched": self._batched,
+                "runs": self._runs,
+                "images": self._images,
+                "mean_ms_per_run": round(self._seconds / self._runs * 1000, 1) if self._runs else None,
+                "last_ms": round(self._last_seconds * 1000, 1) if self._last_seconds is not None else None,
+            }
+
+
+_service: Optional[SegmentationService] = None
+_service_lock = threading.Lock()
+
+
+def get_segmentation_service() -> SegmentationService:
+    """Return the process-wide segmentation service (the model itself loads on first use)."""
+    global _service
+    with _service_lock:
+        if _service is None:
+            _service = SegmentationService(
+                Config.SEGMENTATION_MODEL,
+                intra_op_threads=Config.SEGMENTATION_INTRA_OP_THREADS,
+                inter_op_threads=Config.SEGMENTATION_INTER_OP_THREADS,
+                max_batch=Config.SEGMENTATION_MAX_BATCH,
+            )
+        return _service
@@ -0,0 +1,138 @@
+"""
+In-memory slide PDF encoding.
+Encodes the composited slide straight into PDF bytes (no temporary PNG on disk)
+with a selectable embedded codec:
+  png   - lossless; img2pdf embeds the PNG's compressed data without re-encoding
+  jpeg  - one JPEG at the given quality; smallest and fastest for photographic templates
+  mixed - JPEG of the template and image layers (photographic content) with the
+          text/shape layers as a lossless transparent overlay, so text stays sharp
+"""
+import io
+import threading
+from contextlib import contextmanager
+from typing import Iterable, Optional
+
+from PIL import Image
+
+import slide_layers
+import text_render
+
+
+CODECS = ("png", "jpeg", "mixed")
+MATTE = (42, 42, 42)  # Shown where the slide is transparent
+
+_a85_lock = threading.Lock()
+_a85_users = 0
+_a85_saved = None
+
+
+@contextmanager
+def binary_streams():
+    """
+    Turn off reportlab's ASCII85 stream filter while slide PDFs are built
+    (ASCII85 adds 25% and is slow without rl_accel). reportlab only has the
+    process-wide rl_config.useA85, read while drawing and while saving, so it is
+    switched off for as long as any slide canvas is open and restored after the
+    last one is saved; other reportlab users see their setting outside that window.
+    """
+    global _a85_users, _a85_saved
+    from reportlab import rl_config
+
+    with _a85_lock:
+        if _a85_users == 0:
+            _a85_saved = rl_config.useA85
+            rl_config.useA85 = 0
+        _a85_users += 1
+    try:
+        yield
+    finally:
+        with _a85_lock:
+            _a85_users -= 1
+            if _a85_users == 0:
+                rl_config.useA85 = _a85_saved
+
+
+def _flatten(slide: Image.Image) -> Image.Image:
+    """RGB slide on the matte color (PDF images have no alpha)."""
+    if slide.mode == 'RGB':
+        return slide
+    flat = Image.new('RGB', slide.size, MATTE)
+    flat.paste(slide, mask=slide.split()[3] if slide.mode == 'RGBA' else None)
+    return flat
+
+
+def _png_bytes(image: Image.Image, compress_level: int) -> bytes:
+    buffer = io.BytesIO()
+    image.save(buffer, format='PNG', compress_level=compress_level)
+    return buffer.getvalue()
+
+
+def _jpeg_bytes(image: Image.Image, quality: int) -> bytes:
+    buffer = io.BytesIO()
+    image.save(buffer, format='JPEG', quality=quality, optimize=True)
+    return buffer.getvalue()
+
+
+def _image_pdf(image_bytes: bytes) -> bytes:
+    import img2pdf
+    return img2pdf.convert(image_bytes)
+
+
+def _mixed_pdf(base: slide_layers.SlideBase, layers, jpeg_quality: int, compress_level: int) -> bytes:
+    """Page with a JPEG photographic background and a lossless text/shape overlay on top."""
+    from reportlab.lib.utils import ImageReader
+    from reportlab.pdfgen import canvas
+
+    layers = [layer for layer in layers if layer is not None]
+    photo = _flatten(slide_layers.compose(base, [layer for layer in layers if not layer.ops]))
+    overlay = Image.new('RGBA', base.size, (0, 0, 0, 0))
+    for layer in layers:
+        if layer.ops:
+            text_render.composite(overlay, layer.image, (layer.x, layer.y))
+
+    # Same page size as img2pdf gives the png/jpeg codecs (96 dpi)
+    scale = 72 / 96
+    width, height = base.size[0] * scale, base.size[1] * scale
+    buffer = io.BytesIO()
+    with binary_streams():
+        c = canvas.Canvas(buffer, pagesize=(width, height), pageCompression=compress_level > 0)
+        # JPEG bytes are passed through as DCT data; the overlay is Flate-compressed with its alpha as SMask
+        c.drawImage(ImageReader(io.BytesIO(_jpeg_bytes(photo, jpeg_quality))), 0, 0, width=width, height=height)
+        bbox = overlay.getbbox()
+        if bbox:
+            cropped = overlay.crop(bbox)
+            c.drawImage(ImageReader(cropped), bbox[0] * scale, height - bbox[3] * scale,
+                        width=cropped.width * scale, height=cropped.height * scale, mask='auto')
+        c.showPage()
+        c.save()
+    return buffer.getvalue()
+
+
+def encode_slide(base: slide_layers.SlideBase, layers: Iterable[Optional[slide_layers.Layer]],
+                 codec: str = "png", jpeg_quality: int = 90, compress_level: int = 6,
+                 slide: Optional[Image.Image] = None) -> bytes:
+    """
+    Encode a layered slide as a single-page PDF, entirely in memory.
+
+    Args:
+        base: Template base the layers were laid out on
+        layers: Layers in drawing order (None entries are skipped)
+        codec: "png", "jpeg" or "mixed" (see module docstring)
+        jpeg_quality: JPEG quality 1-95 for jpeg/mixed
+        compress_level: zlib level 0-9 for the png codec (0 = fastest, 9 = smallest);
+            for mixed, 0 turns off page stream compression
+        slide: Already composited slide, to skip compositing for png/jpeg
+
+    Returns:
+        PDF bytes
+    """
+    codec = codec.lower()
+    if codec not in CODECS:
+        raise ValueError(f"Unknown slide codec {codec!r} (expected one of {', '.join(CODECS)})")
+    if codec == "mixed":
+        return _mixed_pdf(base, layers, jpeg_quality, compress_level)
+    flat = _flatten(slide if slide is not None else slide_layers.compose(base, layers))
+    if codec == "jpeg":
+        return _image_pdf(_jpeg_bytes(flat, jpeg_quality))
+    return _image_pdf(_png_bytes(flat, compress_level))
+
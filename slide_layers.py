@@ -0,0 +1,169 @@
+"""
+Layered slide compositing.
+A slide is an immutable per-template base (the template raster plus what is
+derived from it once: map region, sampled text colors) and small per-company
+RGBA layers (name, logo, pin, text blocks, headshots, stage). Layers are cached
+by the inputs that determine them, so re-rendering a company after a text-only
+edit re-renders just the changed layer, and everything is alpha-composited onto
+one copy of the base in a single final pass. Layers may also describe
+themselves as text and rectangles so vector_pdf can draw them as real PDF text.
+"""
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, Hashable, Iterable, Optional, Sequence, Tuple
+
+from PIL import Image
+
+import text_render
+
+
+_MAX_LAYERS = 128  # Per-company layers kept per process (headshot layers are ~1 MB)
+
+
+class TextOp:
+    """
+    Lines of text drawn as ImageDraw.text draws them at (x, y) (top-left of the
+    ascender line), relative to the layer origin, then rotated counterclockwise
+    by angle degrees about that point and scaled by scale.
+    """
+
+    __slots__ = ("lines", "x", "y", "size", "bold", "fill", "line_height",
+                 "stroke_width", "stroke_fill", "angle", "scale")
+
+    def __init__(self, lines: Sequence[str], xy: Tuple[float, float], size: int, bold: bool = False,
+                 fill=(0, 0, 0), line_height: int = 0, stroke_width: int = 0, stroke_fill=None,
+                 angle: int = 0, scale: float = 1.0):
+        self.lines = tuple(lines)
+        self.x, self.y = xy
+        self.size = size
+        self.bold = bold
+        self.fill = tuple(fill)
+        self.line_height = line_height
+        self.stroke_width = stroke_width
+        self.stroke_fill = tuple(stroke_fill) if stroke_fill else None
+        self.angle = angle
+        self.scale = scale
+
+
+class RectOp:
+    """Filled rectangle with inclusive corners (x0, y0)-(x1, y1) relative to the layer origin."""
+
+    __slots__ = ("x0", "y0", "x1", "y1", "fill")
+
+    def __init__(self, box: Tuple[float, float, float, float], fill):
+        self.x0, self.y0, self.x1, self.y1 = box
+        self.fill = tuple(fill)
+
+
+class Layer:
+    """
+    RGBA image placed with its top-left corner at (x, y) on the slide.
+    ops, when given, draw the same content as vectors (vector_pdf uses them
+    instead of embedding the image).
+    """
+
+    __slots__ = ("image", "x", "y", "ops")
+
+    def __init__(self, image: Image.Image, xy: Tuple[int, int], ops: Sequence = ()):
+        self.image = image
+        self.x, self.y = int(xy[0]), int(xy[1])
+        self.ops = tuple(ops)
+
+    def moved(self, xy: Tuple[int, int]) -> "Layer":
+        """The same layer placed at xy."""
+        return Layer(self.image, xy, self.ops)
+
+
+class SlideBase:
+    """
+    Everything about a slide that depends only on the template.
+    Shared between renders: never draw on image.
+    """
+
+    def __init__(self, image: Image.Image, map_bbox: Tuple[int, int, int, int], text_colors: Dict[str, tuple]):
+        self.image = image
+        self.size = image.size
+        self.map_bbox = map_bbox
+        self.text_colors = text_colors
+
+
+_bases: Dict[Tuple[int, int], SlideBase] = {}  # template size -> base of the most recent template raster
+_bases_lock = threading.Lock()
+
+
+def get_base(template: Image.Image, build: Callable[[Image.Image], SlideBase]) -> SlideBase:
+    """
+    SlideBase for a template raster from template_cache, built once per raster.
+    template_cache returns the same image object until the template file changes,
+    so the base is rebuilt exactly when the template is.
+    """
+    with _bases_lock:
+        base = _bases.get(template.size)
+        if base is None or base.image is not template:
+            base = _bases[template.size] = build(template)
+        return base
+
+
+class LayerCache:
+    """Bounded LRU of rendered layers keyed by the inputs that determine them."""
+
+    def __init__(self, max_entries: int = _MAX_LAYERS):
+        self.max_entries = max_entries
+        self._layers: "OrderedDict[Hashable, Optional[Layer]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, default=None):
+        with self._lock:
+            if key not in self._layers:
+                return default
+            self._layers.move_to_end(key)
+            return self._layers[key]
+
+    def put(self, key: Hashable, layer: Optional[Layer]):
+        with self._lock:
+            self._layers[key] = layer
+            self._layers.move_to_end(key)
+            while len(self._layers) > self.max_entries:
+                self._layers.popitem(last=False)
+
+    def get_or_render(self, key: Hashable, render: Callable[[], Optional[Layer]]) -> Optional[Layer]:
+        """Cached layer for key, rendering it (outside the lock) on a miss."""
+        missing = object()
+        layer = self.get(key, missing)
+        if layer is missing:
+            layer = render()
+            self.put(key, layer)
+        return layer
+
+    def clear(self):
+        with self._lock:
+            self._layers.clear()
+
+
+layer_cache = LayerCache()
+
+
+def text(xy: Tuple[int, int], value: str, size: int, bold: bool = False, fill=(0, 0, 0),
+         stroke_width: int = 0, stroke_fill=None) -> Layer:
+    """Layer with one line of text as ImageDraw.text would place it at xy."""
+    image, (dx, dy) = text_render.text_layer(value, size, bold, fill, stroke_width, stroke_fill)
+    op = TextOp([value], (-dx, -dy), size, bold, fill, stroke_width=stroke_width, stroke_fill=stroke_fill)
+    return Layer(image, (xy[0] + dx, xy[1] + dy), [op])
+
+
+def text_block(xy: Tuple[int, int], lines, size: int, line_height: int, bold: bool = False, fill=(0, 0, 0)) -> Layer:
+    """Layer with lines of text, the first placed as ImageDraw.text would place it at xy."""
+    image, (dx, dy) = text_render.text_block(lines, size, bold, fill, line_height)
+    op = TextOp(lines, (-dx, -dy), size, bold, fill, line_height=line_height)
+    return Layer(image, (xy[0] + dx, xy[1] + dy), [op])
+
+
+def compose(base: SlideBase, layers: Iterable[Optional[Layer]]) -> Image.Image:
+    """Copy the base once and alpha-composite the layers onto it in order (None entries are skipped)."""
+    slide = base.image.copy()
+    if slide.mode != 'RGBA':
+        slide = slide.convert('RGBA')
+    for layer in layers:
+        if layer is not None:
+            text_render.composite(slide, layer.image, (layer.x, layer.y))
+    return slide
@@ -0,0 +1,137 @@
+"""
+Rasterized slide templates.
+Renders each template once at exactly the output resolution (instead of 300 dpi
+followed by a LANCZOS downscale), keeps it in memory per process and persists it
+as an .npy sidecar keyed by the file's SHA-256 so new workers skip pdf2image.
+"""
+import io
+import os
+import threading
+from typing import Tuple
+
+import numpy as np
+from PIL import Image
+
+from config import Config
+from idempotency import file_sha256
+
+
+SLIDE_SIZE = (1920, 1080)
+
+_cache = {}  # (abspath, size) -> (mtime_ns, sha256, RGBA image)
+_lock = threading.Lock()
+
+
+def _rasterize_pdf(pdf_path: str, size: Tuple[int, int]) -> Image.Image:
+    """Render the first page of a PDF straight to size."""
+    try:
+        from pdf2image import convert_from_path
+    except ImportError:
+        convert_from_path = None
+    if convert_from_path is not None:
+        try:
+            images = convert_from_path(pdf_path, size=size, first_page=1, last_page=1)
+        except Exception as e:
+            raise Exception(f"Failed to convert PDF to image: {e}")
+        if images:
+            return images[0].convert('RGBA')
+        raise Exception(f"Failed to convert PDF to image: no pages in {pdf_path}")
+
+    # Fallback: PyPDF2 can only extract an embedded raster image
+    try:
+        from PyPDF2 import PdfReader
+        page = PdfReader(pdf_path).pages[0]
+        if '/XObject' in page['/Resources']:
+            x_object = page['/Resources']['/XObject'].get_object()
+            for obj in x_object:
+                if x_object[obj]['/Subtype'] == '/Image':
+                    return Image.open(io.BytesIO(x_object[obj].get_data())).convert('RGBA')
+        raise ImportError("pdf2image required for PDF templates")
+    except Exception as e:
+        raise ImportError(
+            f"Could not convert PDF to image. Please install pdf2image: pip install pdf2image. "
+            f"Error: {e}"
+        )
+
+
+def _rasterize(path: str, size: Tuple[int, int]) -> Image.Image:
+    if path.lower().endswith('.pdf'):
+        image = _rasterize_pdf(path, size)
+    else:
+        image = Image.open(path)
+        image.draft('RGB', size)  # JPEG: decode at reduced scale when the source is larger
+        image = image.convert('RGBA')
+    if image.size != size:
+        image = image.resize(size, Image.Resampling.LANCZOS)
+    return image
+
+
+def _sidecar_path(sha256: str, size: Tuple[int, int]) -> str:
+    return os.path.join(Config.TEMPLATE_CACHE_DIR, f"{sha256}-{size[0]}x{size[1]}.npy")
+
+
+def _load_sidecar(sha256: str, size: Tuple[int, int]):
+    if not Config.TEMPLATE_CACHE_DIR:
+        return None
+    path = _sidecar_path(sha256, size)
+    try:
+        pixels = np.load(path, allow_pickle=False)
+    except (OSError, ValueError):
+        return None
+    if pixels.shape != (size[1], size[0], 4) or pixels.dtype != np.uint8:
+        return None
+    return Image.fromarray(pixels, 'RGBA')
+
+
+def _save_sidecar(sha256: str, size: Tuple[int, int], image: Image.Image):
+    if not Config.TEMPLATE_CACHE_DIR:
+        return
+    path = _sidecar_path(sha256, size)
+    partial = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        os.makedirs(Config.TEMPLATE_CACHE_DIR, exist_ok=True)
+        with open(partial, "wb") as f:
+            np.save(f, np.asarray(image), allow_pickle=False)
+        os.replace(partial, path)
+    except OSError as e:
+        print(f"Warning: could not write template cache {path}: {e}")
+        if os.path.exists(partial):
+            os.unlink(partial)
+
+
+def get_template(path: str, size: Tuple[int, int] = SLIDE_SIZE) -> Image.Image:
+    """
+    Return the cached RGBA raster of a template. Callers must not draw on it;
+    use load_template for a copy.
+
+    Args:
+        path: Template PDF or image
+        size: Output resolution
+
+    Returns:
+        RGBA image of exactly size
+    """
+    abspath = os.path.abspath(path)
+    mtime_ns = os.stat(abspath).st_mtime_ns
+    key = (abspath, tuple(size))
+    with _lock:
+        cached = _cache.get(key)
+        if cached is not None and cached[0] == mtime_ns:
+            return cached[2]
+
+        sha256 = file_sha256(abspath)
+        if cached is not None and cached[1] == sha256:
+            # Touched but unchanged
+            image = cached[2]
+        else:
+            image = _load_sidecar(sha256, key[1])
+            if image is None:
+                image = _rasterize(abspath, key[1])
+                _save_sidecar(sha256, key[1], image)
+        _cache[key] = (mtime_ns, sha256, image)
+        return image
+
+
+def load_template(path: str, size: Tuple[int, int] = SLIDE_SIZE) -> Image.Image:
+    """Copy of the cached template raster that the caller may draw on."""
+    return get_template(path, size).copy()
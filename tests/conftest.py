@@ -0,0 +1,8 @@
+"""
+Shared pytest setup: the modules live at the repository root, so put it on
+sys.path for the tests in this directory.
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
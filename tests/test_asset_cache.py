@@ -0,0 +1,113 @@
+"""
+AssetCache: URL normalization, TTL hits, conditional revalidation and LRU eviction.
+"""
+import os
+import time
+
+import pytest
+
+import image_ingest
+from asset_cache import AssetCache
+
+
+class FakeServer:
+    """Stands in for image_ingest.fetch_url."""
+
+    def __init__(self):
+        self.bodies = {}
+        self.requests = []
+
+    def fetch_url(self, url, output_path, timeout=None, max_bytes=None, headers=None):
+        self.requests.append((url, headers))
+        body, etag = self.bodies[url.split("?")[0]]
+        if headers and headers.get("If-None-Match") == etag:
+            return {"status": 304, "mime": None, "etag": etag, "last_modified": None}
+        with open(output_path, "wb") as f:
+            f.write(body)
+        return {"status": 200, "mime": "image/png", "etag": etag, "last_modified": None}
+
+
+@pytest.fixture
+def server(monkeypatch):
+    server = FakeServer()
+    monkeypatch.setattr(image_ingest, "fetch_url", server.fetch_url)
+    return server
+
+
+def _cache(tmp_path, max_bytes=1 << 20, ttl_seconds=3600):
+    return AssetCache(str(tmp_path / "assets"), max_bytes=max_bytes, ttl_seconds=ttl_seconds)
+
+
+def _read(path):
+    with open(path, "rb") as f:
+        return f.read()
+
+
+def test_url_key_ignores_signature_parameters():
+    a = AssetCache.url_key("https://files.example/a.png?X-Amz-Signature=abc&X-Amz-Expires=60&v=2")
+    b = AssetCache.url_key("https://files.example/a.png?v=2&X-Amz-Signature=def&X-Amz-Expires=90")
+    assert a == b
+    assert a != AssetCache.url_key("https://files.example/a.png?v=3")
+
+
+def test_fresh_entry_is_served_without_a_request(tmp_path, server):
+    server.bodies["https://files.example/a.png"] = (b"a" * 100, '"1"')
+    cache = _cache(tmp_path)
+    out = str(tmp_path / "out.png")
+
+    cache.fetch("https://files.example/a.png?X-Amz-Signature=one", out)
+    cache.fetch("https://files.example/a.png?X-Amz-Signature=two", out)
+
+    assert len(server.requests) == 1
+    assert _read(out) == b"a" * 100
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 1
+
+
+def test_stale_entry_is_revalidated(tmp_path, server):
+    server.bodies["https://files.example/a.png"] = (b"a" * 100, '"1"')
+    cache = _cache(tmp_path, ttl_seconds=0)
+    out = str(tmp_path / "out.png")
+
+    cache.fetch("https://files.example/a.png", out)
+    os.unlink(out)
+    cache.fetch("https://files.example/a.png", out)
+
+    assert server.requests[1][1] == {"If-None-Match": '"1"'}
+    assert _read(out) == b"a" * 100
+    assert cache.stats()["revalidated"] == 1
+
+
+def test_identical_bytes_share_one_blob(tmp_path, server):
+    server.bodies["https://files.example/a.png"] = (b"same" * 10, None)
+    server.bodies["https://files.example/b.png"] = (b"same" * 10, None)
+    cache = _cache(tmp_path)
+
+    cache.fetch("https://files.example/a.png", str(tmp_path / "a.png"))
+    cache.fetch("https://files.example/b.png", str(tmp_path / "b.png"))
+
+    assert cache.stats()["entries"] == 2
+    assert cache.total_bytes() == 40
+
+
+def test_least_recently_used_entry_is_evicted(tmp_path, server):
+    for name in "abc":
+        server.bodies[f"https://files.example/{name}.png"] = (name.encode() * 100, None)
+    cache = _cache(tmp_path, max_bytes=250)
+    out = str(tmp_path / "out.png")
+
+    cache.fetch("https://files.example/a.png", out)
+    time.sleep(0.01)
+    cache.fetch("https://files.example/b.png", out)
+    time.sleep(0.01)
+    cache.fetch("https://files.example/a.png", out)  # a is now more recent than b
+    time.sleep(0.01)
+    cache.fetch("https://files.example/c.png", out)
+
+    assert cache.total_bytes() <= 250
+    assert cache.stats()["evictions"] == 1
+    requests = len(server.requests)
+    cache.fetch("https://files.example/a.png", out)
+    assert len(server.requests) == requests
+    cache.fetch("https://files.example/b.png", out)
+    assert len(server.requests) == requests + 1
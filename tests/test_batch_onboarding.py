@@ -0,0 +1,89 @@
+"""
+Batch onboarding publishes through the same Canva path as a single onboarding:
+the batch's slides are appended to the static design, not imported as a new one.
+"""
+import io
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from PyPDF2 import PdfReader, PdfWriter
+
+import webhook_listener
+from config import Config
+
+
+def _pdf(pages):
+    writer = PdfWriter()
+    for _ in range(pages):
+        writer.add_blank_page(width=100, height=100)
+    buf = io.BytesIO()
+    writer.write(buf)
+    return buf.getvalue()
+
+
+class FakeDrive:
+    def __init__(self, deck):
+        self.deck = deck
+
+    def download_file(self, file_id):
+        return self.deck
+
+    def overwrite_pdf(self, file_id, pdf_bytes):
+        self.deck = pdf_bytes
+        return f"https://drive.example/{file_id}"
+
+
+class FakeCanva:
+    def __init__(self):
+        self.appended = []
+        self.imported = []
+
+    def append_slide_to_design(self, design_id, slide_pdf_bytes, filename, existing_pdf_bytes=None):
+        self.appended.append((design_id, slide_pdf_bytes, existing_pdf_bytes))
+        return "DAGnew"
+
+    def upload_pdf_asset(self, pdf_bytes, filename):
+        self.imported.append(pdf_bytes)
+        return "DAGimported"
+
+
+@pytest.fixture
+def batch_env(monkeypatch):
+    drive, canva = FakeDrive(_pdf(3)), FakeCanva()
+    pool = ThreadPoolExecutor(max_workers=2)
+    monkeypatch.setattr(webhook_listener, "get_render_pool", lambda: pool)
+    monkeypatch.setattr(webhook_listener, "render_onboarding_slide",
+                        lambda payload: {"success": True, "slide_pdf_bytes": _pdf(1), "errors": []})
+    monkeypatch.setattr(webhook_listener, "resolve_drive_target", lambda progress: {
+        "drive": drive, "drive_folder_id": "folder", "static_file_name": "deck.pdf",
+        "static_target_file_id": "deck", "drive_error": None,
+    })
+    monkeypatch.setattr(webhook_listener, "prepare_canva", lambda progress: {"canva": canva})
+    monkeypatch.setattr(webhook_listener, "_update_env_var", lambda key, value: None)
+    monkeypatch.setattr(webhook_listener, "_should_delete_previous_design", lambda: False)
+    monkeypatch.setattr(Config, "NOTION_API_KEY", None)
+    monkeypatch.setattr(Config, "DOCSEND_API_KEY", None)
+    monkeypatch.setattr(Config, "CANVA_API_KEY", "key")
+    monkeypatch.setattr(Config, "CANVA_TEMPLATE_ID", "template")
+    monkeypatch.setattr(Config, "CANVA_STATIC_DESIGN_ID", "DAGold", raising=False)
+    monkeypatch.delenv("CANVA_STATIC_DESIGN_ID", raising=False)
+    yield drive, canva
+    pool.shutdown()
+
+
+def _company(name):
+    return {"company_data": {"name": name, "description": "Robots", "address": "Los Angeles, CA"}}
+
+
+def test_batch_appends_to_static_canva_design(batch_env):
+    drive, canva = batch_env
+    results = webhook_listener.run_batch_onboarding([_company("Acme"), _company("Beta")])
+
+    assert results["success"], results
+    assert len(PdfReader(io.BytesIO(drive.deck)).pages) == 5
+    assert canva.imported == []
+    [(design_id, slide_bytes, existing_bytes)] = canva.appended
+    assert design_id == "DAGold"
+    assert len(PdfReader(io.BytesIO(slide_bytes)).pages) == 2
+    assert len(PdfReader(io.BytesIO(existing_bytes)).pages) == 3
+    assert results["canva_design_id"] == "DAGnew"
@@ -0,0 +1,108 @@
+"""
+CutoutCache: keys, round trips, LRU eviction and remembered winners.
+"""
+import io
+import os
+import time
+
+import numpy as np
+from PIL import Image
+
+from cutout_cache import CutoutCache, pixel_sha256, source_sha256
+
+
+def _cutout(value=200, size=(40, 30)):
+    rgba = np.zeros((size[1], size[0], 4), dtype=np.uint8)
+    rgba[..., :3] = value
+    rgba[5:25, 10:30, 3] = 255
+    return Image.fromarray(rgba, "RGBA")
+
+
+def _cache(tmp_path, max_bytes=1 << 20):
+    return CutoutCache(str(tmp_path / "cutouts"), max_bytes=max_bytes)
+
+
+def test_key_depends_on_method_and_params_not_their_order():
+    key = CutoutCache.key("sha", "rembg", {"model": "u2net", "max_size": 1500})
+    assert key == CutoutCache.key("sha", "rembg", {"max_size": 1500, "model": "u2net"})
+    assert key != CutoutCache.key("sha", "floodfill", {"model": "u2net", "max_size": 1500})
+    assert key != CutoutCache.key("sha", "rembg", {"model": "u2netp", "max_size": 1500})
+    assert CutoutCache.key("sha", "removebg") == CutoutCache.key("sha", "removebg", {})
+
+
+def test_pixel_hash_ignores_file_format(tmp_path):
+    image = _cutout().convert("RGB")
+    png, bmp = str(tmp_path / "a.png"), str(tmp_path / "a.bmp")
+    image.save(png)
+    image.save(bmp)
+    assert source_sha256(png) == source_sha256(bmp)
+    assert pixel_sha256(_cutout(1)) != pixel_sha256(_cutout(2))
+
+
+def test_put_then_get_round_trips_with_stats(tmp_path):
+    cache = _cache(tmp_path)
+    stats = cache.put("sha", "rembg", {"model": "u2net"}, _cutout())
+
+    image, cached_stats = cache.get("sha", "rembg", {"model": "u2net"})
+    assert np.array_equal(np.asarray(image), np.asarray(_cutout()))
+    assert cached_stats == stats
+    opaque, transparent, _ = stats
+    assert abs(opaque - 400 / 1200) < 1e-9
+    assert abs(transparent - 800 / 1200) < 1e-9
+    assert cache.get("sha", "rembg", {"model": "u2netp"}) is None
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 1
+
+
+def test_png_bytes_are_stored_as_given(tmp_path):
+    cache = _cache(tmp_path)
+    buffer = io.BytesIO()
+    _cutout().save(buffer, format="PNG")
+    cache.put("sha", "removebg", {"size": "auto"}, buffer.getvalue())
+    assert cache.total_bytes() == len(buffer.getvalue())
+
+
+def test_missing_blob_is_a_miss(tmp_path):
+    cache = _cache(tmp_path)
+    cache.put("sha", "rembg", {}, _cutout())
+    key = CutoutCache.key("sha", "rembg", {})
+    os.unlink(os.path.join(cache.directory, key[:2], key + ".png"))
+    assert cache.get("sha", "rembg", {}) is None
+    assert cache.stats()["entries"] == 0
+
+
+def test_least_recently_used_cutout_is_evicted(tmp_path):
+    probe = _cache(tmp_path / "probe")
+    probe.put("x", "rembg", {}, _cutout())
+    size = probe.total_bytes()
+
+    cache = _cache(tmp_path, max_bytes=2 * size + size // 2)
+    cache.put("a", "rembg", {}, _cutout())
+    time.sleep(0.01)
+    cache.put("b", "rembg", {}, _cutout())
+    time.sleep(0.01)
+    assert cache.get("a", "rembg", {}) is not None  # a is now more recent than b
+    time.sleep(0.01)
+    cache.put("c", "rembg", {}, _cutout())
+
+    assert cache.stats()["evictions"] == 1
+    assert cache.get("b", "rembg", {}) is None
+    assert cache.get("a", "rembg", {}) is not None
+    assert cache.get("c", "rembg", {}) is not None
+
+
+def test_winner_is_remembered_per_context_and_dropped_on_eviction(tmp_path):
+    probe = _cache(tmp_path / "probe")
+    probe.put("x", "rembg", {}, _cutout())
+    size = probe.total_bytes()
+
+    cache = _cache(tmp_path, max_bytes=size)
+    context = {"rembg": {"model": "u2net"}, "openai": {}}
+    cache.put("a", "rembg", {}, _cutout())
+    cache.set_winner("a", context, "rembg")
+    assert cache.winner("a", context) == "rembg"
+    assert cache.winner("a", {"rembg": {"model": "u2net"}}) is None
+
+    time.sleep(0.01)
+    cache.put("b", "rembg", {}, _cutout())  # evicts a's cutout
+    assert cache.winner("a", context) is None
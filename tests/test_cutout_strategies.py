@@ -0,0 +1,65 @@
+"""
+Hedged strategy races: staggered paid providers and the first-acceptable rule.
+"""
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from cutout_strategies import first_acceptable
+
+
+@pytest.fixture
+def pool():
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        yield pool
+
+
+def _slow(seconds, result, started_log, name):
+    started_log[name] = time.perf_counter()
+    time.sleep(seconds)
+    return result
+
+
+def _race(pool, plan, stagger, deadline=5.0):
+    """plan: name -> (seconds, result, deferred)"""
+    log = {}
+    started = time.perf_counter()
+    candidates = {}
+    for name, (seconds, result, deferred) in plan.items():
+        launch = lambda s=seconds, r=result, n=name: pool.submit(_slow, s, r, log, n)
+        candidates[name] = launch if deferred else launch()
+    won = first_acceptable(candidates, lambda r: r == "ok", started + deadline, started, stagger=stagger)
+    return won, {name: at - started for name, at in log.items()}
+
+
+def test_deferred_candidate_waits_for_stagger(pool):
+    won, starts = _race(pool, {
+        "removebg": (0.3, "ok", False),
+        "openai": (0.01, "ok", True),
+    }, stagger=5.0)
+    assert won[0] == "removebg"
+    assert "openai" not in starts
+
+
+def test_deferred_candidate_starts_when_previous_fails(pool):
+    won, starts = _race(pool, {
+        "removebg": (0.05, None, False),
+        "openai": (0.05, "ok", True),
+    }, stagger=5.0)
+    assert won[0] == "openai"
+    assert starts["openai"] < 1.0
+
+
+def test_deferred_candidate_starts_after_stagger(pool):
+    won, starts = _race(pool, {
+        "removebg": (2.0, "ok", False),
+        "openai": (0.05, "ok", True),
+    }, stagger=0.2)
+    assert won[0] == "openai"
+    assert 0.2 <= starts["openai"] < 1.0
+
+
+def test_nothing_acceptable(pool):
+    won, _ = _race(pool, {"removebg": (0.01, "bad", False), "openai": (0.01, None, True)}, stagger=5.0)
+    assert won is None
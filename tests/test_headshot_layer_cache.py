@@ -0,0 +1,108 @@
+"""
+The rendered headshot layer is only reused when every headshot got an accepted
+model/API cutout; fallbacks are rendered again next time so removal is retried.
+"""
+import pytest
+from PIL import Image, ImageDraw
+
+import slide_layers
+from config import Config
+from html_slide_generator import HTMLSlideGenerator
+
+
+def _cutout(size=(400, 400)):
+    """
+    Person-shaped cutout that passes the headshot safety checks. Returned with
+    edges_fitted so no MinFilter(1) edge pass runs (crashes some Pillow builds).
+    """
+    image = Image.new("RGBA", size, (0, 0, 0, 0))
+    ImageDraw.Draw(image).ellipse((40, 20, size[0] - 40, size[1] + 200), fill=(120, 90, 70, 255))
+    return image
+
+
+@pytest.fixture
+def slide_files(tmp_path, monkeypatch):
+    monkeypatch.setattr(Config, "SLIDE_PDF_MODE", "raster", raising=False)
+    monkeypatch.setattr(Config, "CUTOUT_CACHE_ENABLED", False, raising=False)
+    monkeypatch.setattr(Config, "REMOVEBG_API_KEY", "", raising=False)
+    template = tmp_path / "template.png"
+    Image.new("RGB", (1920, 1080), (30, 30, 30)).save(template)
+    headshot = tmp_path / "headshot.png"
+    Image.new("RGB", (400, 400), (200, 200, 200)).save(headshot)
+    logo = tmp_path / "logo.png"
+    Image.new("RGBA", (100, 100), (255, 0, 0, 255)).save(logo)
+    return str(template), str(headshot), str(logo)
+
+
+@pytest.fixture
+def generator(slide_files):
+    generator = HTMLSlideGenerator()
+    generator.template_path = slide_files[0]
+    return generator
+
+
+def _render(generator, slide_files, removal):
+    """Render a slide with removal standing in for _remove_bg_best_effort_batch; returns its call count."""
+    calls = []
+
+    def fake_batch(paths, use_api, source_shas=None):
+        calls.append(paths)
+        return removal(paths)
+
+    generator._remove_bg_best_effort_batch = fake_batch
+    _, headshot, logo = slide_files
+    generator.create_slide({"name": "Acme", "founders": "Ada", "location": "Los Angeles"}, headshot, logo)
+    return len(calls)
+
+
+_stored = []  # Headshot layer keys put into the layer cache
+
+
+def _headshot_entries():
+    return list(_stored)
+
+
+@pytest.fixture(autouse=True)
+def empty_layer_cache(monkeypatch):
+    cache = slide_layers.layer_cache
+    put = cache.put
+
+    def recording_put(key, layer):
+        if key and key[0] == "headshots":
+            _stored.append(key)
+        put(key, layer)
+
+    monkeypatch.setattr(cache, "put", recording_put)
+    cache.clear()
+    _stored.clear()
+    yield
+    cache.clear()
+
+
+def test_accepted_cutout_layer_is_reused(generator, slide_files):
+    removal = lambda paths: [(_cutout(), True, "rembg") for _ in paths]
+    assert _render(generator, slide_files, removal) == 1
+    assert len(_headshot_entries()) == 1
+    assert _render(generator, slide_files, removal) == 0
+
+
+@pytest.mark.parametrize("removal", [
+    lambda paths: [(_cutout(), True, "floodfill") for _ in paths],
+    lambda paths: [(Image.new("RGBA", (400, 400)), True, "rembg") for _ in paths],  # Map background fallback
+], ids=["floodfill", "map-background"])
+def test_fallback_layer_is_not_cached(generator, slide_files, removal):
+    assert _render(generator, slide_files, removal) == 1
+    assert _headshot_entries() == []
+    assert _render(generator, slide_files, removal) == 1
+
+
+def test_failed_removal_is_retried(generator, slide_files):
+    def outage(paths):
+        raise RuntimeError("provider outage")
+
+    generator._remove_bg_best_effort = lambda path, use_api: None
+    assert _render(generator, slide_files, outage) == 1
+    assert _headshot_entries() == []
+    recovered = lambda paths: [(_cutout(), True, "removebg") for _ in paths]
+    assert _render(generator, slide_files, recovered) == 1
+    assert len(_headshot_entries()) == 1
@@ -0,0 +1,108 @@
+"""
+JobQueue claiming, lease expiry and fingerprint dedup.
+"""
+import json
+import time
+
+import pytest
+
+from job_queue import FAILED, QUEUED, RUNNING, SUCCEEDED, JobQueue
+
+
+@pytest.fixture
+def queue(tmp_path):
+    return JobQueue(str(tmp_path / "jobs.db"), workers=1, lease_seconds=60, max_attempts=2)
+
+
+def _expire_lease(queue, job_id):
+    queue._connect().execute("UPDATE jobs SET started_at = ? WHERE id = ?",
+                             (time.time() - queue.lease_seconds - 1, job_id))
+
+
+def test_expired_lease_requeues_until_max_attempts(queue):
+    job_id = queue.enqueue({"n": 1})
+
+    assert queue._claim()["id"] == job_id
+    _expire_lease(queue, job_id)
+    row = queue._claim()
+    assert row["id"] == job_id
+    assert queue.get(job_id)["attempts"] == 2
+
+    _expire_lease(queue, job_id)
+    assert queue._claim() is None
+    job = queue.get(job_id)
+    assert job["status"] == FAILED
+    assert "Lease expired" in job["error"]
+    assert job["finished_at"] is not None
+
+
+def test_live_lease_is_not_requeued(queue):
+    job_id = queue.enqueue({"n": 1})
+    assert queue._claim()["id"] == job_id
+    assert queue._claim() is None
+    assert queue.get(job_id)["status"] == RUNNING
+
+
+def test_claim_takes_oldest_queued_job(queue):
+    first = queue.enqueue({"n": 1})
+    time.sleep(0.01)
+    second = queue.enqueue({"n": 2})
+
+    row = queue._claim()
+    assert row["id"] == first
+    assert json.loads(row["payload"]) == {"n": 1}
+    assert queue.get(first)["status"] == RUNNING
+    assert queue._claim()["id"] == second
+    assert queue._claim() is None
+
+
+def test_enqueue_unique_collapses_live_and_succeeded_jobs(queue):
+    job_id, created = queue.enqueue_unique({"n": 1}, "fp")
+    assert created
+    assert queue.enqueue_unique({"n": 1}, "fp") == (job_id, False)  # queued
+
+    queue._claim()
+    assert queue.enqueue_unique({"n": 1}, "fp") == (job_id, False)  # running
+
+    queue._finish(job_id, SUCCEEDED, result={"success": True})
+    assert queue.enqueue_unique({"n": 1}, "fp") == (job_id, False)  # succeeded
+    assert queue.find_succeeded(fingerprint="fp")["job_id"] == job_id
+
+
+def test_failed_job_does_not_block_a_retry(queue):
+    job_id, _ = queue.enqueue_unique({"n": 1}, "fp")
+    queue._claim()
+    queue._finish(job_id, FAILED, error="boom")
+
+    retry_id, created = queue.enqueue_unique({"n": 1}, "fp")
+    assert created
+    assert retry_id != job_id
+    assert queue.find_succeeded(fingerprint="fp") is None
+
+
+def test_find_succeeded_by_content_fingerprint_excludes_the_asking_job(queue):
+    done = queue.record_completed({"n": 1}, "fp", {"success": True, "link": "x"})
+    queue.set_content_fingerprint(done, "content")
+    running = queue.enqueue({"n": 1}, "fp-2")
+    queue.set_content_fingerprint(running, "content")
+
+    found = queue.find_succeeded(content_fingerprint="content", exclude_job_id=running)
+    assert found["job_id"] == done
+    assert found["result"] == {"success": True, "link": "x"}
+    assert queue.find_succeeded(content_fingerprint="content", exclude_job_id=done) is None
+
+
+def test_worker_runs_handler_and_records_result(tmp_path):
+    queue = JobQueue(str(tmp_path / "jobs.db"), workers=1, poll_interval=0.05)
+    ok = queue.enqueue({"n": 1})
+    bad = queue.enqueue({"n": 2})
+    queue.start(lambda job_id, payload: {"success": payload["n"] == 1, "errors": ["nope"]})
+    try:
+        deadline = time.time() + 10
+        while time.time() < deadline and queue.get(bad)["status"] in (QUEUED, RUNNING):
+            time.sleep(0.05)
+    finally:
+        queue.stop()
+    assert queue.get(ok)["status"] == SUCCEEDED
+    assert queue.get(bad)["status"] == FAILED
+    assert queue.get(bad)["error"] == "nope"
@@ -0,0 +1,121 @@
+"""
+mask_ops against straightforward per-pixel BFS references on random masks.
+"""
+from collections import deque
+
+import numpy as np
+import pytest
+
+import mask_ops
+
+
+NEIGHBORS = [(dy, dx) for dy in (-1, 0, 1) for dx in (-1, 0, 1) if dy or dx]
+
+
+def naive_border_connected(allowed):
+    H, W = allowed.shape
+    reached = np.zeros_like(allowed)
+    queue = deque()
+    for y in range(H):
+        for x in range(W):
+            if (y in (0, H - 1) or x in (0, W - 1)) and allowed[y, x]:
+                reached[y, x] = True
+                queue.append((y, x))
+    while queue:
+        y, x = queue.popleft()
+        for dy, dx in NEIGHBORS:
+            ny, nx = y + dy, x + dx
+            if 0 <= ny < H and 0 <= nx < W and allowed[ny, nx] and not reached[ny, nx]:
+                reached[ny, nx] = True
+                queue.append((ny, nx))
+    return reached
+
+
+def naive_label(mask):
+    H, W = mask.shape
+    labels = np.zeros(mask.shape, dtype=np.int32)
+    count = 0
+    for y in range(H):
+        for x in range(W):
+            if not mask[y, x] or labels[y, x]:
+                continue
+            count += 1
+            labels[y, x] = count
+            queue = deque([(y, x)])
+            while queue:
+                cy, cx = queue.popleft()
+                for dy, dx in NEIGHBORS:
+                    ny, nx = cy + dy, cx + dx
+                    if 0 <= ny < H and 0 <= nx < W and mask[ny, nx] and not labels[ny, nx]:
+                        labels[ny, nx] = count
+                        queue.append((ny, nx))
+    return labels, count
+
+
+def random_masks():
+    rng = np.random.default_rng(1234)
+    shapes = [(1, 1), (1, 9), (7, 1), (12, 17), (31, 24), (40, 40)]
+    for shape in shapes:
+        for density in (0.1, 0.4, 0.55, 0.7, 0.95):
+            yield rng.random(shape) < density
+
+
+@pytest.mark.parametrize("mask", list(random_masks()))
+def test_border_connected_matches_flood_fill(mask):
+    np.testing.assert_array_equal(mask_ops.border_connected(mask), naive_border_connected(mask))
+
+
+@pytest.mark.parametrize("mask", list(random_masks()))
+def test_label_matches_bfs_labeling(mask):
+    labels, count = mask_ops.label(mask)
+    expected, expected_count = naive_label(mask)
+    assert count == expected_count
+    np.testing.assert_array_equal(labels, expected)
+
+
+@pytest.mark.parametrize("mask", list(random_masks()))
+def test_fill_holes_and_largest_component(mask):
+    np.testing.assert_array_equal(mask_ops.fill_holes(mask), ~naive_border_connected(~mask))
+    labels, count = naive_label(mask)
+    largest = mask_ops.largest_component(mask)
+    if count == 0:
+        assert not largest.any()
+    else:
+        sizes = np.bincount(labels.ravel(), minlength=count + 1)
+        sizes[0] = 0
+        np.testing.assert_array_equal(largest, labels == int(np.argmax(sizes)))
+
+
+@pytest.mark.parametrize("seed", range(8))
+def test_border_level_map_matches_flood_fill_per_tolerance(seed):
+    rng = np.random.default_rng(seed)
+    shape = (int(rng.integers(1, 30)), int(rng.integers(1, 30)))
+    dist = rng.random(shape) * 12
+    barrier = rng.random(shape) < 0.15 if seed % 2 else None
+    max_level = 8
+    level = mask_ops.border_level_map(dist, max_level, barrier=barrier)
+    for t in range(max_level + 1):
+        allowed = dist <= t
+        if barrier is not None:
+            allowed &= ~barrier
+        np.testing.assert_array_equal(level <= t, naive_border_connected(allowed), err_msg=f"tolerance {t}")
+
+
+def test_box_mean_matches_window_average():
+    rng = np.random.default_rng(7)
+    x = rng.random((9, 13)).astype(np.float32)
+    radius = 2
+    expected = np.empty_like(x)
+    for y in range(x.shape[0]):
+        for c in range(x.shape[1]):
+            expected[y, c] = x[max(0, y - radius):y + radius + 1, max(0, c - radius):c + radius + 1].mean()
+    np.testing.assert_allclose(mask_ops.box_mean(x, radius), expected, rtol=1e-5)
+
+
+def test_guided_upsample_keeps_flat_masks():
+    guide = np.random.default_rng(3).integers(0, 256, (64, 48), dtype=np.uint8)
+    for value in (0, 255):
+        mask = np.full((16, 12), value, dtype=np.uint8)
+        out = mask_ops.guided_upsample(mask, guide)
+        assert out.shape == guide.shape
+        assert np.abs(out.astype(int) - value).max() <= 1
@@ -0,0 +1,48 @@
+"""
+Stage timing: CPU is measured on the thread running each stage and summed for the job.
+"""
+import threading
+import time
+
+import metrics
+
+
+def _spin(seconds):
+    end = time.thread_time() + seconds
+    while time.thread_time() < end:
+        pass
+
+
+def test_job_cpu_sums_stages_on_other_threads(monkeypatch):
+    observed = []
+    monkeypatch.setattr(metrics, "observe_stage", lambda stage, wall, cpu, status="done": observed.append((stage, cpu)))
+    calls = []
+    progress = metrics.timed_progress(lambda stage, status, detail=None: calls.append((stage, status)))
+
+    def stage(name):
+        progress(name, "running")
+        _spin(0.05)
+        progress(name, "done")
+
+    caller_cpu = time.thread_time()
+    threads = [threading.Thread(target=stage, args=(name,)) for name in ("headshots", "map")]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    caller_cpu = time.thread_time() - caller_cpu
+
+    assert sorted(stage for stage, _ in observed) == ["headshots", "map"]
+    assert all(cpu >= 0.05 for _, cpu in observed)
+    assert progress.cpu_seconds == sum(cpu for _, cpu in observed)
+    assert progress.cpu_seconds > caller_cpu
+    assert len(calls) == 4
+
+
+def test_stage_without_running_is_not_recorded(monkeypatch):
+    observed = []
+    monkeypatch.setattr(metrics, "observe_stage", lambda *args, **kwargs: observed.append(args))
+    progress = metrics.timed_progress(lambda stage, status, detail=None: None)
+    progress("canva", "skipped", "Credentials not configured")
+    assert observed == []
+    assert progress.cpu_seconds == 0.0
@@ -0,0 +1,74 @@
+"""
+Forced re-submits of an onboarding payload must render again instead of
+being answered from the previous job's result.
+"""
+import time
+
+import pytest
+
+import webhook_listener
+from config import Config
+from job_queue import JobQueue, SUCCEEDED
+
+
+PAYLOAD = {
+    "company_data": {
+        "name": "Acme Robotics",
+        "description": "Warehouse robots",
+        "address": "Los Angeles, CA",
+    },
+}
+
+
+@pytest.fixture
+def app_with_queue(tmp_path, monkeypatch):
+    renders = []
+
+    def fake_run_onboarding(payload, company_data, progress=None, find_duplicate=None):
+        duplicate = find_duplicate("content-fingerprint") if find_duplicate else None
+        if duplicate:
+            return duplicate
+        renders.append(payload)
+        return {"success": True, "render": len(renders)}
+
+    queue = JobQueue(str(tmp_path / "jobs.db"), workers=1, poll_interval=0.05)
+    monkeypatch.setattr(Config, "ONBOARDING_SYNC", False)
+    monkeypatch.setattr(webhook_listener, "_job_queue", queue)
+    monkeypatch.setattr(webhook_listener, "run_onboarding", fake_run_onboarding)
+    yield webhook_listener.app.test_client(), queue, renders
+    queue.stop()
+
+
+def _wait_for(queue, job_id, timeout=10.0):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        job = queue.get(job_id)
+        if job["status"] == SUCCEEDED:
+            return job
+        time.sleep(0.05)
+    raise AssertionError(f"job {job_id} did not finish: {queue.get(job_id)}")
+
+
+def test_plain_resubmit_is_deduplicated(app_with_queue):
+    client, queue, renders = app_with_queue
+    first = client.post("/webhook/onboarding", json=PAYLOAD).get_json()
+    _wait_for(queue, first["job_id"])
+
+    again = client.post("/webhook/onboarding", json=PAYLOAD)
+    assert again.status_code == 200
+    assert again.get_json()["deduplicated"] is True
+    assert len(renders) == 1
+
+
+def test_forced_resubmit_renders_again(app_with_queue):
+    client, queue, renders = app_with_queue
+    first = client.post("/webhook/onboarding", json=PAYLOAD).get_json()
+    _wait_for(queue, first["job_id"])
+
+    forced = client.post("/webhook/onboarding?force=1", json=PAYLOAD)
+    assert forced.status_code == 202
+    job = _wait_for(queue, forced.get_json()["job_id"])
+
+    assert "deduplicated_from" not in job["result"]
+    assert len(renders) == 2
+    assert renders[-1]["force"] is True
@@ -0,0 +1,71 @@
+"""
+Slide PDF encoding: reportlab's process-wide ASCII85 setting is only changed while slides are built.
+"""
+import io
+
+import pytest
+from PIL import Image
+
+pytest.importorskip("reportlab")
+from reportlab import rl_config
+
+import slide_encode
+import vector_pdf
+from slide_layers import Layer, SlideBase, TextOp
+
+
+@pytest.fixture
+def base():
+    return SlideBase(Image.new("RGBA", (320, 180), "white"), (0, 0, 10, 10), {})
+
+
+@pytest.fixture
+def layers():
+    text = Layer(Image.new("RGBA", (120, 40)), (20, 20),
+                 [TextOp(["Acme"], (0, 0), 24, bold=True, stroke_width=2, stroke_fill=(255, 255, 255))])
+    photo = Layer(Image.new("RGBA", (40, 40), (0, 200, 0, 128)), (200, 100))
+    return [text, None, photo]
+
+
+def test_binary_streams_restores_setting():
+    assert rl_config.useA85
+    with slide_encode.binary_streams():
+        with slide_encode.binary_streams():
+            assert rl_config.useA85 == 0
+        assert rl_config.useA85 == 0  # Outer slide still being built
+    assert rl_config.useA85
+
+
+def test_binary_streams_restores_setting_on_error():
+    with pytest.raises(RuntimeError):
+        with slide_encode.binary_streams():
+            raise RuntimeError("render failed")
+    assert rl_config.useA85
+
+
+def test_mixed_codec_leaves_reportlab_setting(base, layers):
+    pdf = slide_encode.encode_slide(base, layers, codec="mixed")
+    assert pdf.startswith(b"%PDF")
+    assert b"ASCII85Decode" not in pdf
+    assert rl_config.useA85
+
+
+def test_vector_pdf_template_xobject(base, layers, tmp_path):
+    from PyPDF2 import PdfReader
+    from reportlab.pdfgen import canvas
+
+    template = tmp_path / "template.pdf"
+    c = canvas.Canvas(str(template), pagesize=(240, 135))
+    c.drawString(10, 100, "TEMPLATE")
+    c.showPage()
+    c.save()
+
+    pdf = vector_pdf.render_slide(base, layers, str(template))
+    assert b"ASCII85Decode" not in pdf
+    assert rl_config.useA85
+    page = PdfReader(io.BytesIO(pdf)).pages[0]
+    assert page["/Resources"]["/XObject"].raw_get(vector_pdf.TEMPLATE_XOBJECT).idnum  # Indirect stream
+    contents = page.get_contents().get_data()
+    assert b"/SlideTemplate Do" in contents
+    assert b"/Artifact BMC" in contents
+    assert "TEMPLATE" in page.extract_text()
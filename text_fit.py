@@ -0,0 +1,117 @@
+"""
+Text fitting for slide rendering.
+Finds the largest font size at which text fits a box by binary search over
+widths computed from a cached glyph advance table, so probing a size costs a
+few additions instead of loading a font and rasterizing into a scratch image.
+Advances are measured once at a reference size and scale linearly with size;
+the chosen size is checked once against the real font (kerning, hinting).
+"""
+import threading
+from typing import Dict, List, Tuple
+
+import font_registry
+
+
+_REFERENCE_SIZE = 200
+
+
+class TextFitter:
+    """Width estimates and size fitting for one font weight from the font registry."""
+
+    def __init__(self, bold: bool = False):
+        self.bold = bold
+        self._advances: Dict[str, float] = {}  # char -> advance at _REFERENCE_SIZE
+        self._lock = threading.Lock()
+
+    def _advance(self, char: str) -> float:
+        advance = self._advances.get(char)
+        if advance is None:
+            font = font_registry.get_font(_REFERENCE_SIZE, self.bold)
+            advance = font.getlength(char)
+            with self._lock:
+                self._advances[char] = advance
+        return advance
+
+    def width(self, text: str, size: int) -> float:
+        """Estimated rendered width of one line of text at size."""
+        return sum(self._advance(c) for c in text) * size / _REFERENCE_SIZE
+
+    def real_width(self, text: str, size: int) -> float:
+        """Exact width of one line of text at size (uses the cached font)."""
+        return font_registry.get_font(size, self.bold).getlength(text)
+
+    def fit_size(self, text: str, max_width: float, max_size: int, min_size: int = 1) -> int:
+        """
+        Largest size in [min_size, max_size] at which text fits on one line.
+
+        Returns:
+            min_size when even that does not fit
+        """
+        if not text:
+            return max_size
+        lo, hi = min_size, max_size
+        while lo < hi:
+            mid = (lo + hi + 1) // 2
+            if self.width(text, mid) <= max_width:
+                lo = mid
+            else:
+                hi = mid - 1
+        while lo > min_size and self.real_width(text, lo) > max_width:
+            lo -= 1
+        return lo
+
+    def wrap(self, text: str, size: int, max_width: float) -> List[str]:
+        """Greedy word wrap; words wider than max_width get a line of their own."""
+        space = self.width(" ", size)
+        lines, current, current_width = [], [], 0.0
+        for word in text.split():
+            word_width = self.width(word, size)
+            if current and current_width + space + word_width > max_width:
+                lines.append(" ".join(current))
+                current, current_width = [], 0.0
+            current_width += (space if current else 0.0) + word_width
+            current.append(word)
+        if current:
+            lines.append(" ".join(current))
+        return lines
+
+    def fit_block(self, text: str, max_width: float, max_lines: int, max_size: int,
+                  min_size: int = 1) -> Tuple[int, List[str]]:
+        """
+        Largest size at which text, word-wrapped (explicit newlines kept), fits
+        max_width and at most max_lines lines.
+
+        Returns:
+            (size, lines); at min_size the lines may still exceed max_lines
+        """
+        def layout(size):
+            lines = []
+            for paragraph in text.split("\n"):
+                lines.extend(self.wrap(paragraph, size, max_width) or [""])
+            return lines
+
+        def fits(size):
+            lines = layout(size)
+            return len(lines) <= max_lines and all(self.width(line, size) <= max_width for line in lines)
+
+        lo, hi = min_size, max_size
+        while lo < hi:
+            mid = (lo + hi + 1) // 2
+            if fits(mid):
+                lo = mid
+            else:
+                hi = mid - 1
+        return lo, layout(lo)
+
+
+_fitters: Dict[bool, TextFitter] = {}
+_fitters_lock = threading.Lock()
+
+
+def get_fitter(bold: bool = False) -> TextFitter:
+    """Process-wide TextFitter for the weight (advance tables are shared)."""
+    with _fitters_lock:
+        fitter = _fitters.get(bold)
+        if fitter is None:
+            fitter = _fitters[bold] = TextFitter(bold)
+        return fitter
@@ -0,0 +1,100 @@
+"""
+Cached text layers for slide rendering.
+Outlined text is drawn once with Pillow's native stroke (instead of one redraw per
+stroke offset) into a tight RGBA layer, cached by text, font, size and colors,
+and alpha-composited onto the slide.
+"""
+from functools import lru_cache
+from typing import Optional, Tuple
+
+from PIL import Image, ImageDraw
+
+import font_registry
+
+
+Color = Tuple[int, ...]
+
+
+@lru_cache(maxsize=256)
+def _text_layer(text: str, font_path: Optional[str], size: int, fill: Color,
+                stroke_width: int, stroke_fill: Optional[Color]) -> Tuple[Image.Image, Tuple[int, int]]:
+    font = font_registry.truetype(font_path, size)
+    left, top, right, bottom = font.getbbox(text, stroke_width=stroke_width)
+    layer = Image.new("RGBA", (max(1, right - left), max(1, bottom - top)), (0, 0, 0, 0))
+    ImageDraw.Draw(layer).text(
+        (-left, -top), text, fill=fill, font=font,
+        stroke_width=stroke_width, stroke_fill=stroke_fill if stroke_width else None,
+    )
+    return layer, (left, top)
+
+
+def text_layer(text: str, size: int, bold: bool = False, fill: Color = (0, 0, 0),
+               stroke_width: int = 0, stroke_fill: Optional[Color] = None) -> Tuple[Image.Image, Tuple[int, int]]:
+    """
+    Rendered text on a transparent layer. Shared between calls: do not draw on it.
+
+    Args:
+        text: Single line of text
+        size: Font size in pixels (font from font_registry)
+        bold: Bold weight
+        fill: Text color
+        stroke_width: Outline width in pixels (0 for none)
+        stroke_fill: Outline color (defaults to fill)
+
+    Returns:
+        (layer, offset): offset is where the layer's top-left sits relative to the
+        point draw.text would be given
+    """
+    return _text_layer(text, font_registry.font_path(bold), size, tuple(fill),
+                       stroke_width, tuple(stroke_fill) if stroke_fill else None)
+
+
+@lru_cache(maxsize=256)
+def _block_layer(lines: Tuple[str, ...], font_path: Optional[str], size: int, fill: Color,
+                 line_height: int) -> Tuple[Image.Image, Tuple[int, int]]:
+    font = font_registry.truetype(font_path, size)
+    boxes = [(i, font.getbbox(line)) for i, line in enumerate(lines) if line]
+    if not boxes:
+        return Image.new("RGBA", (1, 1), (0, 0, 0, 0)), (0, 0)
+    left = min(box[0] for _, box in boxes)
+    top = min(box[1] + i * line_height for i, box in boxes)
+    right = max(box[2] for _, box in boxes)
+    bottom = max(box[3] + i * line_height for i, box in boxes)
+    layer = Image.new("RGBA", (max(1, right - left), max(1, bottom - top)), (0, 0, 0, 0))
+    draw = ImageDraw.Draw(layer)
+    for i, _ in boxes:
+        draw.text((-left, i * line_height - top), lines[i], fill=fill, font=font)
+    return layer, (left, top)
+
+
+def text_block(lines, size: int, bold: bool = False, fill: Color = (0, 0, 0),
+               line_height: int = 0) -> Tuple[Image.Image, Tuple[int, int]]:
+    """
+    Several lines of text, line i drawn line_height * i below the first, on one
+    transparent layer. Cached like text_layer; do not draw on it.
+
+    Returns:
+        (layer, offset) as for text_layer
+    """
+    return _block_layer(tuple(lines), font_registry.font_path(bold), size, tuple(fill), line_height)
+
+
+def composite(canvas: Image.Image, layer: Image.Image, xy: Tuple[int, int]):
+    """Alpha-composite an RGBA layer onto an RGBA canvas in place, clipping at the edges."""
+    x, y = int(xy[0]), int(xy[1])
+    crop_left, crop_top = max(0, -x), max(0, -y)
+    if crop_left or crop_top:
+        layer = layer.crop((crop_left, crop_top, layer.width, layer.height))
+        x, y = x + crop_left, y + crop_top
+    if x >= canvas.width or y >= canvas.height or layer.width == 0 or layer.height == 0:
+        return
+    if x + layer.width > canvas.width or y + layer.height > canvas.height:
+        layer = layer.crop((0, 0, min(layer.width, canvas.width - x), min(layer.height, canvas.height - y)))
+    canvas.alpha_composite(layer, (x, y))
+
+
+def draw_text(canvas: Image.Image, xy: Tuple[int, int], text: str, size: int, bold: bool = False,
+              fill: Color = (0, 0, 0), stroke_width: int = 0, stroke_fill: Optional[Color] = None):
+    """ImageDraw.text equivalent (default anchor) that composites a cached text layer onto an RGBA canvas."""
+    layer, (dx, dy) = text_layer(text, size, bold, fill, stroke_width, stroke_fill)
+    composite(canvas, layer, (xy[0] + dx, xy[1] + dy))
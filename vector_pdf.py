@@ -0,0 +1,190 @@
+"""
+Vector slide PDFs.
+Instead of flattening the slide to a full-page bitmap, places the original
+template PDF page as a form XObject, draws the company text as real PDF text
+(same font files as the raster path, via the font registry) and embeds only the
+small image layers (logo, headshots, pin). Geometry comes from the same
+slide_layers used for raster output, so both modes lay out identically.
+"""
+import io
+import os
+import threading
+from typing import Dict, Iterable, Optional, Tuple
+
+import font_registry
+import slide_encode
+from slide_layers import Layer, RectOp, SlideBase, TextOp
+
+
+TEMPLATE_XOBJECT = "/SlideTemplate"
+
+_font_names: Dict[Optional[str], str] = {}  # font file -> registered reportlab font name
+_fonts_lock = threading.Lock()
+
+
+def _font_name(bold: bool) -> str:
+    """reportlab font name for the registry font of the weight (registered once per process)."""
+    path = font_registry.font_path(bold)
+    with _fonts_lock:
+        name = _font_names.get(path)
+        if name is None:
+            name = "Helvetica-Bold" if bold else "Helvetica"
+            if path:
+                from reportlab.pdfbase import pdfmetrics
+                from reportlab.pdfbase.ttfonts import TTFont
+                candidate = "Slide-" + os.path.splitext(os.path.basename(path))[0]
+                try:
+                    pdfmetrics.registerFont(TTFont(candidate, path))
+                    name = candidate
+                except Exception as e:
+                    print(f"Warning: Could not embed font {path} in vector PDF ({e}), using {name}")
+            _font_names[path] = name
+        return name
+
+
+def _ascent(size: int, bold: bool) -> float:
+    """Distance from the ImageDraw.text anchor (ascender line) to the baseline, in pixels."""
+    try:
+        return font_registry.get_font(size, bold).getmetrics()[0]
+    except AttributeError:
+        return size * 0.8  # PIL bitmap default font has no metrics
+
+
+def _rgb(color) -> Tuple[float, float, float]:
+    return tuple(channel / 255 for channel in color[:3])
+
+
+def _draw_text(c, op: TextOp):
+    font_name = _font_name(op.bold)
+    ascent = _ascent(op.size, op.bold)
+    c.saveState()
+    c.translate(op.x, -op.y)
+    c.rotate(op.angle)
+    c.scale(op.scale, op.scale)
+    c.setFont(font_name, op.size)
+    c.setFillColorRGB(*_rgb(op.fill))
+    if op.stroke_width:
+        # Pillow strokes outward by stroke_width and fills on top: stroke at double width, then fill
+        c.setStrokeColorRGB(*_rgb(op.stroke_fill or op.fill))
+        c.setLineWidth(op.stroke_width * 2)
+        c.setLineJoin(1)
+    for i, line in enumerate(op.lines):
+        if not line:
+            continue
+        baseline = -(ascent + i * op.line_height)
+        if op.stroke_width:
+            # Outline pass marked as an artifact so copy/search see the text once
+            c.addLiteral("/Artifact BMC")
+            c.drawString(0, baseline, line, mode=1)
+            c.addLiteral("EMC")
+        c.drawString(0, baseline, line, mode=0)
+    c.restoreState()
+
+
+def _draw_layer(c, layer: Layer, page_height: float, sx: float, sy: float):
+    """Draw one layer; inside the layer, units are slide pixels with y pointing up from the layer origin."""
+    c.saveState()
+    c.translate(layer.x * sx, page_height - layer.y * sy)
+    c.scale(sx, sy)
+    if layer.ops:
+        for op in layer.ops:
+            if isinstance(op, RectOp):
+                c.setFillColorRGB(*_rgb(op.fill))
+                c.rect(op.x0, -(op.y1 + 1), op.x1 - op.x0 + 1, op.y1 - op.y0 + 1, stroke=0, fill=1)
+            else:
+                _draw_text(c, op)
+    else:
+        from reportlab.lib.utils import ImageReader
+        w, h = layer.image.size
+        c.drawImage(ImageReader(layer.image), 0, -h, width=w, height=h, mask='auto')
+    c.restoreState()
+
+
+def _template_page(template_path: str):
+    """First page of a PDF template, or None for image templates."""
+    if not template_path.lower().endswith('.pdf'):
+        return None
+    from PyPDF2 import PdfReader
+    return PdfReader(template_path).pages[0]
+
+
+def _with_template(overlay_pdf: bytes, template_page) -> bytes:
+    """Put the template page under the overlay page as a form XObject."""
+    from PyPDF2 import PdfReader, PdfWriter
+    from PyPDF2.generic import ArrayObject, DecodedStreamObject, DictionaryObject, FloatObject, NameObject
+
+    writer = PdfWriter()
+    writer.add_page(PdfReader(io.BytesIO(overlay_pdf)).pages[0])
+    page = writer.pages[0]
+
+    x0, y0, x1, y1 = (float(v) for v in template_page.mediabox)
+    contents = template_page.get_contents()
+    form = DecodedStreamObject()
+    form.set_data(contents.get_data() if contents is not None else b"")
+    form = form.flate_encode()  # Returns a new stream with only /Filter set, so add the keys after
+    form.update({
+        NameObject("/Type"): NameObject("/XObject"),
+        NameObject("/Subtype"): NameObject("/Form"),
+        NameObject("/BBox"): ArrayObject([FloatObject(v) for v in (x0, y0, x1, y1)]),
+        NameObject("/Matrix"): ArrayObject([FloatObject(v) for v in (1, 0, 0, 1, -x0, -y0)]),
+        # Cloned into the writer so the template's fonts, images and states get new object numbers
+        NameObject("/Resources"): template_page.get("/Resources", DictionaryObject()).clone(writer),
+    })
+    # PyPDF2 3.0 has no public call to add an indirect object, and streams written as direct
+    # values under the page's resources stay direct (invalid PDF); requirements.txt pins 3.0.x
+    form_ref = writer._add_object(form)
+
+    resources = page["/Resources"].get_object()
+    if "/XObject" not in resources:
+        resources[NameObject("/XObject")] = DictionaryObject()
+    resources["/XObject"].get_object()[NameObject(TEMPLATE_XOBJECT)] = form_ref
+
+    overlay = page.get_contents()
+    content = DecodedStreamObject()
+    content.set_data(f"q {TEMPLATE_XOBJECT} Do Q\n".encode() + (overlay.get_data() if overlay is not None else b""))
+    page[NameObject("/Contents")] = writer._add_object(content.flate_encode())
+
+    out = io.BytesIO()
+    writer.write(out)
+    return out.getvalue()
+
+
+def render_slide(base: SlideBase, layers: Iterable[Optional[Layer]], template_path: str) -> bytes:
+    """
+    Single-page vector PDF of a slide.
+
+    Args:
+        base: Slide base whose image is the template raster the layers were laid out on
+        layers: Layers in drawing order (None entries are skipped)
+        template_path: Template file; PDF pages are reused as vectors, image
+            templates are embedded as the page background
+
+    Returns:
+        PDF bytes with the page size of the template page (96 dpi for image templates)
+    """
+    from reportlab.pdfgen import canvas
+
+    template_page = _template_page(template_path)
+    width, height = base.size
+    if template_page is not None:
+        x0, y0, x1, y1 = (float(v) for v in template_page.mediabox)
+        page_width, page_height = x1 - x0, y1 - y0
+    else:
+        page_width, page_height = width * 0.75, height * 0.75
+    sx, sy = page_width / width, page_height / height
+
+    buffer = io.BytesIO()
+    with slide_encode.binary_streams():
+        c = canvas.Canvas(buffer, pagesize=(page_width, page_height), pageCompression=1)
+        if template_page is None:
+            from reportlab.lib.utils import ImageReader
+            c.drawImage(ImageReader(base.image.convert('RGB')), 0, 0, width=page_width, height=page_height)
+        for layer in layers:
+            if layer is not None:
+                _draw_layer(c, layer, page_height, sx, sy)
+        c.showPage()
+        c.save()
+
+    if template_page is None:
+        return buffer.getvalue()
+    return _with_template(buffer.getvalue(), template_page)
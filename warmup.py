@@ -0,0 +1,142 @@
+"""
+Worker warm-up.
+Pays the one-off costs of a fresh process (template rasterization, font
+discovery, rembg model load when local segmentation is the primary background
+remover or raced against remove.bg, Google Drive client and token refresh)
+before the first webhook arrives. Run from gunicorn's post_worker_init hook
+(see gunicorn.conf.py); /health reports 503 until it has finished.
+"""
+import time
+import threading
+from typing import Dict
+
+from config import Config
+
+
+_state = {"started": False, "ready": False, "started_at": None, "finished_at": None, "steps": {}}
+_lock = threading.Lock()
+
+# Sizes create_slide always loads (name auto-sizing starts at 180pt)
+_WARM_FONT_SIZES = [(180, True), (140, True), (32, True), (32, False), (28, False), (20, False)]
+
+
+def _warm_template():
+    from html_slide_generator import HTMLSlideGenerator
+    import template_cache
+    generator = HTMLSlideGenerator()
+    if not generator.template_path:
+        return "no template configured"
+    template_cache.get_template(generator.template_path)
+    return generator.template_path
+
+
+def _warm_fonts():
+    import font_registry
+    for size, bold in _WARM_FONT_SIZES:
+        font_registry.get_font(size, bold=bold)
+    return f"{len(_WARM_FONT_SIZES)} fonts"
+
+
+def _warm_rembg():
+    # With remove.bg configured and hedging off, local segmentation is only a fallback:
+    # leave the rembg/onnxruntime stack unloaded until a headshot actually needs it
+    if Config.REMOVEBG_API_KEY and Config.REMOVEBG_API_KEY.strip() and not Config.BG_REMOVAL_HEDGE:
+        return "skipped (remove.bg configured; rembg loads on first fallback)"
+    import segmentation
+    service = segmentation.get_segmentation_service()
+    try:
+        service.load()
+    except ImportError:
+        return "rembg not installed"
+    return f"{service.model} loaded"
+
+
+def _warm_drive():
+    from google_drive_integration import GoogleDriveIntegration
+    # Builds the API client and refreshes the OAuth token if it has expired
+    GoogleDriveIntegration()
+    return "client built"
+
+
+WARMUP_STEPS = [
+    ("template", _warm_template),
+    ("fonts", _warm_fonts),
+    ("rembg", _warm_rembg),
+    ("drive", _warm_drive),
+]
+
+# What a batch render process needs (it never talks to Drive)
+RENDER_STEPS = ("template", "fonts", "rembg")
+
+
+def _run_steps(names=None):
+    for name, step in WARMUP_STEPS:
+        if names is not None and name not in names:
+            continue
+        started = time.perf_counter()
+        try:
+            detail = step()
+            ok = True
+        except Exception as e:
+            detail = f"{type(e).__name__}: {e}"
+            ok = False
+        seconds = round(time.perf_counter() - started, 3)
+        _state["steps"][name] = {"ok": ok, "seconds": seconds, "detail": detail}
+        print(f"   {'✓' if ok else '⚠️ '} warm-up {name}: {detail} ({seconds}s)")
+
+
+def run_warmup() -> Dict:
+    """
+    Run every warm-up step once per process (later calls return immediately).
+    A failing step is logged and recorded; it does not keep the worker unready,
+    since the request path falls back the same way it would without warm-up.
+
+    Returns:
+        Warm-up status (see status())
+    """
+    with _lock:
+        if _state["started"]:
+            return status()
+        _state["started"] = True
+        _state["started_at"] = time.time()
+
+    print("🔥 Warming up worker...")
+    _run_steps()
+
+    _state["finished_at"] = time.time()
+    _state["ready"] = True
+    print(f"🔥 Worker warm ({_state['finished_at'] - _state['started_at']:.1f}s)")
+    return status()
+
+
+def warm_render_process():
+    """
+    ProcessPoolExecutor initializer for batch render processes: load the
+    template, fonts and segmentation model once, before the first slide.
+    """
+    started = time.perf_counter()
+    _run_steps(RENDER_STEPS)
+    print(f"🔥 Render process warm ({time.perf_counter() - started:.1f}s)")
+
+
+def start_background_warmup() -> threading.Thread:
+    """Run warm-up on a daemon thread so the worker can answer /health meanwhile."""
+    thread = threading.Thread(target=run_warmup, name="warmup", daemon=True)
+    thread.start()
+    return thread
+
+
+def is_ready() -> bool:
+    """True once warm-up has finished, or when warm-up is disabled."""
+    return _state["ready"] or not Config.WARMUP_ENABLED
+
+
+def status() -> Dict:
+    """Readiness and per-step timings."""
+    return {
+        "ready": is_ready(),
+        "started": _state["started"],
+        "started_at": _state["started_at"],
+        "finished_at": _state["finished_at"],
+        "steps": dict(_state["steps"]),
+    }
@@ -6,24 +6,49 @@ import os
 # Disable numba JIT compilation to avoid timeout issues on Render
 os.environ.setdefault('NUMBA_DISABLE_JIT', '1')
 
-from flask import Flask, request, jsonify
-from main import PortfolioOnboardingAutomation
-from image_processor import ImageProcessor
-from canva_integration import CanvaIntegration
-from html_slide_generator import HTMLSlideGenerator
-from google_drive_integration import GoogleDriveIntegration
-from docsend_integration import DocSendIntegration
-from notion_integration import NotionIntegration
+from flask import Flask, Request, request, jsonify
 from config import Config
-from PyPDF2 import PdfWriter, PdfReader
-import os
+from pipeline import Pipeline, Stage
+from job_queue import JobQueue, SUCCEEDED, STAGE_RUNNING, STAGE_DONE, STAGE_FAILED, STAGE_SKIPPED
+from idempotency import payload_fingerprint, content_fingerprint
+import image_ingest
+import metrics
+import warmup
+from lazy_import import lazy
+from typing import Callable, Dict, List, Optional, Tuple
 import tempfile
-import base64
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+import time
 import io
-import requests
-from urllib.parse import urlparse
+import json
+
+# Integrations, imaging and PDF libraries are imported on first use so workers start
+# fast and unconfigured integrations are never loaded (see benchmark_startup.py).
+# on_load instruments HTTP clients (httpx, httplib2) that the import brought in.
+ImageProcessor = lazy("image_processor", "ImageProcessor", on_load=metrics.instrument_http)
+CanvaIntegration = lazy("canva_integration", "CanvaIntegration", on_load=metrics.instrument_http)
+HTMLSlideGenerator = lazy("html_slide_generator", "HTMLSlideGenerator", on_load=metrics.instrument_http)
+GoogleDriveIntegration = lazy("google_drive_integration", "GoogleDriveIntegration", on_load=metrics.instrument_http)
+DocSendIntegration = lazy("docsend_integration", "DocSendIntegration", on_load=metrics.instrument_http)
+NotionIntegration = lazy("notion_integration", "NotionIntegration", on_load=metrics.instrument_http)
+PdfReader = lazy("PyPDF2", "PdfReader")
+PdfWriter = lazy("PyPDF2", "PdfWriter")
+
+
+class OnboardingRequest(Request):
+    """Writes multipart file parts straight to UPLOAD_DIR instead of memory or spooled temp files."""
+
+    def _get_file_stream(self, total_content_length, content_type, filename=None, content_length=None):
+        return image_ingest.new_upload_file()
+
 
 app = Flask(__name__)
+app.request_class = OnboardingRequest
+app.config["MAX_CONTENT_LENGTH"] = Config.MAX_REQUEST_BYTES
+metrics.instrument_http()
 
 def _update_env_var(key: str, value: str, env_path: str = ".env") -> None:
     """Update or add a single env var in .env for local persistence."""
@@ -57,65 +82,19 @@ def _should_delete_previous_design() -> bool:
 def download_file_from_url(url: str, output_path: str):
     """
     Download file from URL (handles Notion file URLs and Google Drive URLs).
+    Uses the shared ingestion session with timeouts, size cap and content sniffing.
     
     Args:
         url: URL to download from
         output_path: Path to save file
     """
-    # Handle Google Drive URLs in different formats
-    if 'drive.google.com' in url:
-        # Extract file ID from various Google Drive URL formats
-        import re
-        file_id = None
-        
-        # Format 1: https://drive.google.com/open?id=FILE_ID
-        match = re.search(r'[?&]id=([a-zA-Z0-9_-]+)', url)
-        if match:
-            file_id = match.group(1)
-        # Format 2: https://drive.google.com/file/d/FILE_ID/view
-        else:
-            match = re.search(r'/file/d/([a-zA-Z0-9_-]+)', url)
-            if match:
-                file_id = match.group(1)
-        
-        if file_id:
-            # Convert to direct download URL
-            url = f"https://drive.google.com/uc?export=download&id={file_id}"
-            print(f"  Converting Google Drive URL to direct download: {file_id}")
-    
-    # Try to download with authentication headers if it's a Google Drive file
-    headers = {}
-    if 'drive.google.com' in url:
-        # Add headers to handle Google Drive's virus scan warning
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
-        }
-    
-    response = requests.get(url, stream=True, headers=headers, allow_redirects=True)
-    response.raise_for_status()
-    
-    # Handle Google Drive's virus scan warning page
-    if 'text/html' in response.headers.get('Content-Type', ''):
-        # Try to extract the actual download link from the warning page
-        content = response.text
-        if 'virus scan warning' in content.lower() or 'download anyway' in content.lower():
-            # Extract the actual download link
-            import re
-            match = re.search(r'href="(/uc\?export=download[^"]+)"', content)
-            if match:
-                download_url = 'https://drive.google.com' + match.group(1)
-                print(f"  Found download link after virus scan warning, retrying...")
-                response = requests.get(download_url, stream=True, headers=headers, allow_redirects=True)
-                response.raise_for_status()
-    
-    with open(output_path, 'wb') as f:
-        for chunk in response.iter_content(chunk_size=8192):
-            f.write(chunk)
+    image_ingest.fetch_url(url, output_path)
 
 
 def handle_image_input(image_data, temp_dir: str, filename: str) -> str:
     """
     Handle image input - can be base64 string or URL.
+    URLs are read through the on-disk asset cache (see asset_cache.py).
     
     Args:
         image_data: Base64 string or URL
@@ -125,315 +104,561 @@ def handle_image_input(image_data, temp_dir: str, filename: str) -> str:
     Returns:
         Path to saved image file
     """
-    file_path = os.path.join(temp_dir, filename)
+    return image_ingest.ingest_image(image_data, os.path.join(temp_dir, filename))
+
+
+class PayloadValidationError(ValueError):
+    """Raised when a webhook payload is missing required company data."""
+
+    def __init__(self, message: str, details: Optional[Dict] = None):
+        super().__init__(message)
+        self.details = details or {}
+
+
+def read_onboarding_payload() -> Optional[Dict]:
+    """
+    Read the onboarding payload from a JSON body or a multipart/form-data request.
+    
+    Multipart requests carry company data either as JSON in a "payload" field or as
+    flat company_data__ form fields, and images as "headshot", "logo" and repeated
+    "headshots" file parts. File parts are stored by image_ingest.store_upload and
+    replaced by upload: references, so the queued payload stays small.
     
-    # Check if it's a URL
-    if isinstance(image_data, str) and (image_data.startswith('http://') or image_data.startswith('https://')):
-        # It's a URL - download it
-        download_file_from_url(image_data, file_path)
+    Returns:
+        Payload dictionary (None for an empty body)
+        
+    Raises:
+        PayloadValidationError: If the payload field is not a JSON object
+        ImageIngestError: If an uploaded file is not an acceptable image
+    """
+    if request.mimetype != "multipart/form-data":
+        return request.json
+    
+    form = request.form
+    if form.get("payload"):
+        try:
+            data = json.loads(form["payload"])
+        except ValueError as e:
+            raise PayloadValidationError(f"Invalid JSON in payload field: {e}")
+        if not isinstance(data, dict):
+            raise PayloadValidationError("The payload field must be a JSON object")
     else:
-        # Assume it's base64 encoded
-        image_bytes = base64.b64decode(image_data)
-        with open(file_path, 'wb') as f:
-            f.write(image_bytes)
+        data = {key: form.get(key) for key in form if key != "payload"}
     
-    return file_path
+    for field in ("headshot", "logo"):
+        upload = request.files.get(field)
+        if upload and upload.filename:
+            data[field] = image_ingest.store_upload(upload.stream)
+    extra = [image_ingest.store_upload(f.stream) for f in request.files.getlist("headshots") if f.filename]
+    if extra:
+        if isinstance(data.get("company_data"), dict):
+            data["company_data"]["headshots"] = extra
+        else:
+            data["company_data__headshots"] = extra
+    return data
 
 
-@app.route('/webhook/onboarding', methods=['POST'])
-def handle_onboarding():
+def extract_company_data(data: Dict) -> Dict:
     """
-    Handle onboarding form submission webhook.
+    Extract and validate company data from a webhook payload.
     
-    Expected JSON payload (supports multiple formats):
+    Args:
+        data: Webhook JSON payload (nested or flat company_data__ format)
+        
+    Returns:
+        Normalized company data dictionary
+        
+    Raises:
+        PayloadValidationError: If required fields are missing
+    """
+    # Handle both nested and flat formats
+    # Format 1: Nested: {"company_data": {"name": "...", ...}}
+    # Format 2: Flat: {"company_data__name": "...", "company_data__description": "...", ...}
+    company_data = {}
     
-    Format 1 - Base64 images:
-    {
-        "company_data": {
-            "name": "...",
-            "website": "...",
-            ...
-        },
-        "headshot": "base64_encoded_image",
-        "logo": "base64_encoded_image"
-    }
+    if "company_data" in data and isinstance(data["company_data"], dict):
+        # Nested format
+        company_data = data["company_data"]
+        print("✓ Found nested company_data format")
+    else:
+        # Flat format (company_data__field_name)
+        # Extract all fields that start with "company_data__"
+        for key, value in data.items():
+            if key.startswith("company_data__"):
+                # Remove "company_data__" prefix
+                field_name = key.replace("company_data__", "")
+                company_data[field_name] = value
+            elif key not in ["headshot_url", "logo_url", "notion_page_id", "notion_created_time", "notion_last_edited", "status", "force"]:
+                # Also include other fields that might be company data
+                company_data[key] = value
     
-    Format 2 - File URLs (from Notion):
-    {
-        "company_data": { ... },
-        "headshot_url": "https://notion.so/file/...",
-        "logo_url": "https://notion.so/file/..."
+    # If still no company data, try to build from available fields
+    if not company_data:
+        print("⚠️  No nested company_data found, trying flat format extraction...")
+        # Try to extract from flat structure
+        company_data = {
+            "name": data.get("company_data__name") or data.get("name", ""),
+            "description": data.get("company_data__description") or data.get("description", ""),
+            "address": data.get("company_data__address") or data.get("address") or data.get("location", ""),
+            "location": data.get("company_data__address") or data.get("address") or data.get("location", ""),
+            "investment_date": data.get("company_data__investment_date") or data.get("investment_date", ""),
+            "investment_round": data.get("company_data__investment_round") or data.get("investment_round", ""),
+            "founders": data.get("company_data__founders") or data.get("founders", ""),
+            "co_investors": data.get("company_data__co_investors") or data.get("co_investors", ""),
+            "background": data.get("company_data__background") or data.get("background", ""),
+        }
+    
+    # Normalize founders and co_investors - convert comma-separated strings to lists if needed
+    if "founders" in company_data and isinstance(company_data["founders"], str):
+        # Split by comma if it's a string
+        founders_str = company_data["founders"].strip()
+        if founders_str:
+            company_data["founders"] = [f.strip() for f in founders_str.split(",") if f.strip()]
+        else:
+            company_data["founders"] = []
+    
+    if "co_investors" in company_data and isinstance(company_data["co_investors"], str):
+        # Split by comma if it's a string
+        co_investors_str = company_data["co_investors"].strip()
+        if co_investors_str:
+            company_data["co_investors"] = [c.strip() for c in co_investors_str.split(",") if c.strip()]
+        else:
+            company_data["co_investors"] = []
+    
+    print(f"Company data extracted: {list(company_data.keys())}")
+    print(f"Company name: '{company_data.get('name', '')}'")
+    print(f"Description: '{company_data.get('description', '')[:50]}...' (first 50 chars)")
+    print(f"Address: '{company_data.get('address', '')}'")
+    print(f"Founders: {company_data.get('founders', [])}")
+    print(f"Co-investors: {company_data.get('co_investors', [])}")
+    print(f"Background: '{company_data.get('background', '')[:50]}...' (first 50 chars)")
+    
+    # Validate required fields
+    required_fields = {
+        "name": company_data.get("name", "").strip(),
+        "description": company_data.get("description", "").strip(),
+        "address": company_data.get("address", company_data.get("location", "")).strip(),
     }
     
-    Format 3 - Mixed:
-    {
-        "company_data": { ... },
-        "headshot": "base64_or_url",
-        "logo": "base64_or_url"
+    missing_fields = [field for field, value in required_fields.items() if not value]
+    
+    if missing_fields:
+        error_msg = f"Missing required company data fields: {', '.join(missing_fields)}. "
+        error_msg += f"Received payload keys: {list(data.keys())}. "
+        error_msg += f"Company data keys: {list(company_data.keys())}. "
+        error_msg += "Please ensure Zapier sends: company_data__name, company_data__description, company_data__address (or company_data__location)"
+        print(f"❌ VALIDATION ERROR: {error_msg}")
+        raise PayloadValidationError(error_msg, {
+            "missing_fields": missing_fields,
+            "received_keys": list(data.keys()),
+            "company_data_keys": list(company_data.keys())
+        })
+    
+    # Warn about missing optional but important fields
+    optional_fields = {
+        "founders": company_data.get("founders", []),
+        "co_investors": company_data.get("co_investors", []),
+        "background": company_data.get("background", "").strip(),
+        "investment_round": company_data.get("investment_round", "").strip(),
     }
     
-    Format 4 - Zapier with Notion metadata:
-    {
-        "company_data": { ... },
-        "headshot_url": "...",
-        "logo_url": "...",
-        "notion_page_id": "...",
-        "notion_created_time": "...",
-        "notion_last_edited": "..."
+    missing_optional = [field for field, value in optional_fields.items() if not value]
+    if missing_optional:
+        print(f"⚠️  Warning: Missing optional fields: {', '.join(missing_optional)}")
+        print("   Slide will be generated but may have empty sections")
+    
+    return company_data
+
+
+def extract_notion_metadata(data: Dict) -> Dict:
+    """Return Notion metadata from the payload if provided (for reference)."""
+    return {
+        "page_id": data.get("notion_page_id"),
+        "created_time": data.get("notion_created_time"),
+        "last_edited": data.get("notion_last_edited")
     }
+
+
+# Pipeline stages reported through the progress callback
+ONBOARDING_STAGES = [
+    "ingest", "headshots", "map", "notion_lookup", "drive_resolve", "canva_auth",
+    "render", "drive", "canva", "docsend", "notion_update",
+]
+
+
+def _noop_progress(stage: str, status: str, detail: Optional[str] = None):
+    pass
+
+
+def resolve_drive_target(progress: Optional[Callable] = None) -> Dict:
     """
+    Resolve the Drive folder and static master PDF that slides are merged into.
+    Independent of the rendered slide, so it can run while slides render.
+    
+    Args:
+        progress: Optional progress callback (reports the "drive_resolve" stage)
+    
+    Returns:
+        Dictionary with drive (GoogleDriveIntegration), drive_folder_id, static_file_name,
+        static_target_file_id and drive_error (the exception if resolution failed)
+    """
+    progress = progress or _noop_progress
+    progress("drive_resolve", STAGE_RUNNING)
+    resolved = {
+        "drive": None,
+        "drive_folder_id": None,
+        "static_file_name": None,
+        "static_target_file_id": None,
+        "drive_error": None,
+    }
     try:
-        data = request.json
+        drive = GoogleDriveIntegration()
+        resolved["drive"] = drive
         
-        # Log incoming request for debugging
-        print(f"\n{'='*60}")
-        print(f"Received webhook request: {request.method} {request.path}")
-        print(f"Payload keys: {list(data.keys()) if data else 'None'}")
-        if data:
-            print(f"Payload sample (first 500 chars): {str(data)[:500]}")
-        print(f"{'='*60}\n")
+        drive_folder_id = os.getenv("GOOGLE_DRIVE_FOLDER_ID") or getattr(Config, "GOOGLE_DRIVE_FOLDER_ID", None)
+        drive_folder_name = (
+            os.getenv("GOOGLE_DRIVE_FOLDER_NAME")
+            or getattr(Config, "GOOGLE_DRIVE_FOLDER_NAME", None)
+            or "Slauson Deck (Portco Slides)"
+        )
         
-        if not data:
-            error_msg = "Missing data in request body"
-            print(f"❌ ERROR: {error_msg}")
-            return jsonify({"error": error_msg, "success": False}), 400
+        if not drive_folder_id and drive_folder_name:
+            drive_folder_id = drive.find_folder_id_by_name(drive_folder_name)
+            if drive_folder_id:
+                print(f"   Found Drive folder '{drive_folder_name}': {drive_folder_id}")
+            else:
+                print(f"   Drive folder '{drive_folder_name}' not found, creating it...")
+                drive_folder_id = drive.create_folder(drive_folder_name)
+                print(f"   Created Drive folder '{drive_folder_name}': {drive_folder_id}")
+        resolved["drive_folder_id"] = drive_folder_id
         
-        # Handle both nested and flat formats
-        # Format 1: Nested: {"company_data": {"name": "...", ...}}
-        # Format 2: Flat: {"company_data__name": "...", "company_data__description": "...", ...}
-        company_data = {}
+        if drive_folder_id:
+            all_files = drive.list_files_in_folder(drive_folder_id, limit=200)
+            if all_files:
+                names = ", ".join([f"{f.get('name')} ({f.get('id')})" for f in all_files])
+                print(f"   Files in folder: {names}")
+            else:
+                print("   No files found in target folder.")
+        
+        # Preferred static target via env/Config (defaults to Portfolio Slides.pdf)
+        static_file_id = os.getenv("GOOGLE_DRIVE_STATIC_FILE_ID") or getattr(Config, "GOOGLE_DRIVE_STATIC_FILE_ID", None)
+        static_file_name = (
+            os.getenv("GOOGLE_DRIVE_STATIC_FILE_NAME")
+            or getattr(Config, "GOOGLE_DRIVE_STATIC_FILE_NAME", None)
+            or "Portfolio Slides.pdf"
+        )
+        resolved["static_file_name"] = static_file_name
         
-        if "company_data" in data and isinstance(data["company_data"], dict):
-            # Nested format
-            company_data = data["company_data"]
-            print("✓ Found nested company_data format")
+        # Resolve static file ID by name if only name is provided
+        if not static_file_id and static_file_name:
+            resolved["static_target_file_id"] = drive.find_file_id_by_name(static_file_name, parent_folder_id=drive_folder_id)
+            if resolved["static_target_file_id"]:
+                print(f"   Found static Drive file by name '{static_file_name}': {resolved['static_target_file_id']}")
+        elif static_file_id:
+            resolved["static_target_file_id"] = static_file_id
+        progress("drive_resolve", STAGE_DONE)
+    except Exception as e:
+        # Reported by the drive stage, which owns the user-facing error
+        resolved["drive_error"] = e
+        progress("drive_resolve", STAGE_FAILED, str(e))
+    return resolved
+
+
+def prepare_canva(progress: Optional[Callable] = None) -> Dict:
+    """
+    Create the Canva client and acquire (refreshing if stale) its OAuth token,
+    so the token round-trip overlaps slide rendering.
+    
+    Args:
+        progress: Optional progress callback (reports the "canva_auth" stage)
+    
+    Returns:
+        {"canva": CanvaIntegration or None}
+    """
+    progress = progress or _noop_progress
+    if not (Config.CANVA_API_KEY or (Config.CANVA_CLIENT_ID and Config.CANVA_CLIENT_SECRET)):
+        progress("canva_auth", STAGE_SKIPPED, "Credentials not configured")
+        return {"canva": None}
+    progress("canva_auth", STAGE_RUNNING)
+    try:
+        canva = CanvaIntegration()
+    except Exception as e:
+        progress("canva_auth", STAGE_FAILED, str(e))
+        return {"canva": None}
+    try:
+        canva._get_access_token()
+        progress("canva_auth", STAGE_DONE)
+    except Exception as e:
+        # The Canva stage retries token acquisition and reports the error
+        print(f"⚠️  Could not acquire Canva token ahead of upload: {e}")
+        progress("canva_auth", STAGE_FAILED, str(e))
+    return {"canva": canva}
+
+
+def _adopt_canva_design(canva, canva_design_id: Optional[str], previous_design_id: Optional[str]):
+    """Make a freshly imported design the static design future slides are appended to."""
+    if canva_design_id and canva_design_id.startswith("DAG"):
+        Config.CANVA_STATIC_DESIGN_ID = canva_design_id
+        _update_env_var("CANVA_STATIC_DESIGN_ID", canva_design_id)
+        print(f"   Updated CANVA_STATIC_DESIGN_ID to {canva_design_id}")
+        if _should_delete_previous_design() and previous_design_id and previous_design_id != canva_design_id:
+            canva.delete_design(previous_design_id)
+
+
+def import_slides_to_canva(
+    canva,
+    slide_pdf_bytes: bytes,
+    filename: str,
+    target_design_id: Optional[str] = None,
+    load_existing_pdf: Optional[Callable[[], Optional[bytes]]] = None
+) -> Dict:
+    """
+    Append new slide(s) to the Canva design, or import them as a new design.
+    Canva has no page-append API, so appending merges the existing deck with the
+    new pages and imports the result; the imported design then becomes
+    CANVA_STATIC_DESIGN_ID. Falls back to a new design if appending fails.
+    
+    Args:
+        canva: CanvaIntegration
+        slide_pdf_bytes: PDF with the new page(s)
+        filename: Name for the imported PDF
+        target_design_id: Design to append to (None imports a new design)
+        load_existing_pdf: Returns the current deck PDF to append to (None if unavailable);
+            only called when appending
+    
+    Returns:
+        {"canva_asset_id", "canva_design_id", "canva_design_url"} (None where unknown)
+    """
+    import re
+    imported = {"canva_asset_id": None, "canva_design_id": None, "canva_design_url": None}
+    
+    def finish(canva_asset_id, done_message):
+        imported["canva_asset_id"] = canva_asset_id
+        is_job_id = re.match(r'^[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}$', canva_asset_id, re.IGNORECASE)
+        if is_job_id:
+            # Wait for import completion and get design ID
+            print("Waiting for Canva import to complete...")
+            status_info = canva.wait_for_import_completion(canva_asset_id, max_wait_seconds=60, poll_interval=2)
+            if status_info.get('status') != 'success':
+                print(f"⚠️  Canva import job did not complete successfully: {status_info.get('status')}")
+                return
+            imported["canva_design_id"] = status_info.get('design_id')
+            imported["canva_design_url"] = status_info.get('design_url')
+        elif target_design_id:
+            # Appending already waited for the import and returned the design ID
+            imported["canva_design_id"] = canva_asset_id
         else:
-            # Flat format (company_data__field_name)
-            # Extract all fields that start with "company_data__"
-            for key, value in data.items():
-                if key.startswith("company_data__"):
-                    # Remove "company_data__" prefix
-                    field_name = key.replace("company_data__", "")
-                    company_data[field_name] = value
-                elif key not in ["headshot_url", "logo_url", "notion_page_id", "notion_created_time", "notion_last_edited", "status"]:
-                    # Also include other fields that might be company data
-                    company_data[key] = value
-        
-        # If still no company data, try to build from available fields
-        if not company_data:
-            print("⚠️  No nested company_data found, trying flat format extraction...")
-            # Try to extract from flat structure
-            company_data = {
-                "name": data.get("company_data__name") or data.get("name", ""),
-                "description": data.get("company_data__description") or data.get("description", ""),
-                "address": data.get("company_data__address") or data.get("address") or data.get("location", ""),
-                "location": data.get("company_data__address") or data.get("address") or data.get("location", ""),
-                "investment_date": data.get("company_data__investment_date") or data.get("investment_date", ""),
-                "investment_round": data.get("company_data__investment_round") or data.get("investment_round", ""),
-                "founders": data.get("company_data__founders") or data.get("founders", ""),
-                "co_investors": data.get("company_data__co_investors") or data.get("co_investors", ""),
-                "background": data.get("company_data__background") or data.get("background", ""),
-            }
-        
-        # Normalize founders and co_investors - convert comma-separated strings to lists if needed
-        if "founders" in company_data and isinstance(company_data["founders"], str):
-            # Split by comma if it's a string
-            founders_str = company_data["founders"].strip()
-            if founders_str:
-                company_data["founders"] = [f.strip() for f in founders_str.split(",") if f.strip()]
-            else:
-                company_data["founders"] = []
+            print(f"✓ Uploaded PDF to Canva assets: {canva_asset_id}")
+            return
+        print(f"✓ {done_message}: {imported['canva_design_id']}")
+        _adopt_canva_design(canva, imported["canva_design_id"], target_design_id)
+    
+    if target_design_id:
+        print("Appending slide to existing Canva design...")
+        try:
+            existing_pdf_bytes = load_existing_pdf() if load_existing_pdf else None
+            canva_asset_id = canva.append_slide_to_design(
+                target_design_id,
+                slide_pdf_bytes,
+                filename,
+                existing_pdf_bytes=existing_pdf_bytes
+            )
+            finish(canva_asset_id, "Appended slide to Canva design")
+            return imported
+        except Exception as e:
+            print(f"⚠️  Failed to append to existing design: {e}")
+            print("   Falling back to uploading as new design...")
+    
+    print("Uploading slide PDF to Canva as new design...")
+    finish(canva.upload_pdf_asset(slide_pdf_bytes, filename), "Created new Canva design")
+    return imported
+
+
+def merge_slides_into_pdf(existing_bytes: bytes, slides: List[Dict]) -> Tuple[bytes, List[str]]:
+    """
+    Merge new slides into the master PDF.
+    A slide marked replace takes the place of the existing page(s) whose text contains
+    its company name (the same Notion page was edited); other slides are appended.
+    
+    Args:
+        existing_bytes: Current master PDF bytes
+        slides: Dicts with name, pdf_bytes and replace, in deck order
         
-        if "co_investors" in company_data and isinstance(company_data["co_investors"], str):
-            # Split by comma if it's a string
-            co_investors_str = company_data["co_investors"].strip()
-            if co_investors_str:
-                company_data["co_investors"] = [c.strip() for c in co_investors_str.split(",") if c.strip()]
-            else:
-                company_data["co_investors"] = []
-        
-        print(f"Company data extracted: {list(company_data.keys())}")
-        print(f"Company name: '{company_data.get('name', '')}'")
-        print(f"Description: '{company_data.get('description', '')[:50]}...' (first 50 chars)")
-        print(f"Address: '{company_data.get('address', '')}'")
-        print(f"Founders: {company_data.get('founders', [])}")
-        print(f"Co-investors: {company_data.get('co_investors', [])}")
-        print(f"Background: '{company_data.get('background', '')[:50]}...' (first 50 chars)")
-        
-        # Validate required fields
-        required_fields = {
-            "name": company_data.get("name", "").strip(),
-            "description": company_data.get("description", "").strip(),
-            "address": company_data.get("address", company_data.get("location", "")).strip(),
+    Returns:
+        (merged PDF bytes, names of companies whose old slide was replaced)
+    """
+    old_reader = PdfReader(io.BytesIO(existing_bytes))
+    new_slides = [(slide, PdfReader(io.BytesIO(slide["pdf_bytes"])).pages) for slide in slides]
+    replacing = [
+        (slide["name"].lower().strip(), pages) for slide, pages in new_slides
+        if slide.get("replace") and slide["name"].strip()
+    ]
+    for company_name, _ in replacing:
+        print(f"   Replacing existing slide for company '{company_name}' (Notion page edited)...")
+    
+    writer = PdfWriter()
+    replaced = []
+    for i, page in enumerate(old_reader.pages):
+        match = None
+        if replacing:
+            # Identify a company's old slide by its name in the page text
+            try:
+                page_text = page.extract_text().lower()
+                match = next(((name, pages) for name, pages in replacing if name in page_text), None)
+            except Exception as e:
+                # If text extraction fails, keep the page
+                print(f"   Warning: Could not extract text from page {i+1}: {e}")
+        if match:
+            company_name, pages = match
+            print(f"   Found old slide for '{company_name}' at page {i+1}, replacing it...")
+            if company_name not in replaced:
+                replaced.append(company_name)
+            for new_page in pages:
+                writer.add_page(new_page)
+        else:
+            writer.add_page(page)
+    
+    for slide, pages in new_slides:
+        company_name = slide["name"].lower().strip()
+        if slide.get("replace") and company_name in replaced:
+            continue
+        if slide.get("replace"):
+            print(f"   Could not find old slide for '{company_name}', appending new slide...")
+        else:
+            print(f"   Appending new slide(s) for '{company_name}' to existing PDF...")
+        for new_page in pages:
+            writer.add_page(new_page)
+    
+    merged_buf = io.BytesIO()
+    writer.write(merged_buf)
+    return merged_buf.getvalue(), replaced
+
+
+def run_onboarding(
+    data: Dict,
+    company_data: Dict,
+    progress: Optional[Callable] = None,
+    find_duplicate: Optional[Callable[[str], Optional[Dict]]] = None,
+    publish: bool = True
+) -> Dict:
+    """
+    Run the full onboarding workflow for one validated payload.
+    
+    Args:
+        data: Original webhook payload (image fields, Notion metadata)
+        company_data: Output of extract_company_data(data)
+        progress: Optional callback progress(stage, status, detail=None) for per-stage status
+        find_duplicate: Optional callback find_duplicate(content_fingerprint) returning the
+            stored results of an earlier run with identical inputs (image bytes included),
+            in which case the remaining stages are skipped
+        publish: If False, stop after rendering and return the slide as
+            results["slide_pdf_bytes"] (no Notion, Drive, Canva or DocSend calls)
+        
+    Returns:
+        Results dictionary (success, links, errors)
+    """
+    progress = metrics.timed_progress(progress or _noop_progress)
+    started_wall = time.perf_counter()
+    notion_metadata = extract_notion_metadata(data)
+    
+    # Create temporary files for images
+    with tempfile.TemporaryDirectory() as temp_dir:
+        progress("ingest", STAGE_RUNNING)
+        
+        # Fetch every image concurrently: payload fields first, company_data fields as fallback
+        slots = {
+            "headshot": (
+                [data.get("headshot") or data.get("headshot_url"),
+                 company_data.get("headshot") or company_data.get("headshot_url")],
+                "headshot.jpg",
+            ),
+            "logo": (
+                [data.get("logo") or data.get("logo_url"),
+                 company_data.get("logo") or company_data.get("logo_url")],
+                "logo.png",
+            ),
         }
+        extra_headshots = company_data.get("headshots")
+        if isinstance(extra_headshots, list):
+            for i, hs_data in enumerate(h for h in extra_headshots if isinstance(h, str)):
+                slots[f"headshots[{i}]"] = ([hs_data], f"headshot_{i + 1}.jpg")
         
-        missing_fields = [field for field, value in required_fields.items() if not value]
+        print(f"Ingesting {len(slots)} image input(s) concurrently...")
+        ingested, ingest_errors = image_ingest.ingest_images(slots, temp_dir)
+        headshot_path = ingested.get("headshot")
+        logo_path = ingested.get("logo")
+        extra_headshot_paths = [
+            ingested[name] for name in slots
+            if name.startswith("headshots[") and ingested.get(name)
+        ]
+        failed_inputs = []
+        for name, errors in ingest_errors.items():
+            if errors and not ingested.get(name):
+                print(f"Warning: Could not ingest {name}: {errors[-1]}")
+                failed_inputs.append(f"{name}: {errors[-1]}")
         
-        if missing_fields:
-            error_msg = f"Missing required company data fields: {', '.join(missing_fields)}. "
-            error_msg += f"Received payload keys: {list(data.keys())}. "
-            error_msg += f"Company data keys: {list(company_data.keys())}. "
-            error_msg += "Please ensure Zapier sends: company_data__name, company_data__description, company_data__address (or company_data__location)"
-            print(f"❌ VALIDATION ERROR: {error_msg}")
-            return jsonify({
-                "error": error_msg,
-                "success": False,
-                "missing_fields": missing_fields,
-                "received_keys": list(data.keys()),
-                "company_data_keys": list(company_data.keys())
-            }), 400
+        # If still missing, create placeholder files or skip image processing
+        if not headshot_path:
+            print("Warning: No headshot provided - creating placeholder")
+            headshot_path = os.path.join(temp_dir, "headshot_placeholder.jpg")
+            # Create a small placeholder image
+            from PIL import Image
+            placeholder = Image.new('RGB', (200, 200), color='gray')
+            placeholder.save(headshot_path)
         
-        # Warn about missing optional but important fields
-        optional_fields = {
-            "founders": company_data.get("founders", []),
-            "co_investors": company_data.get("co_investors", []),
-            "background": company_data.get("background", "").strip(),
-            "investment_round": company_data.get("investment_round", "").strip(),
-        }
+        if not logo_path:
+            print("Warning: No logo provided - creating placeholder")
+            logo_path = os.path.join(temp_dir, "logo_placeholder.png")
+            # Create a small placeholder image
+            from PIL import Image
+            placeholder = Image.new('RGB', (200, 200), color='lightgray')
+            placeholder.save(logo_path)
+        progress("ingest", STAGE_DONE, "; ".join(failed_inputs) or None)
         
-        missing_optional = [field for field, value in optional_fields.items() if not value]
-        if missing_optional:
-            print(f"⚠️  Warning: Missing optional fields: {', '.join(missing_optional)}")
-            print("   Slide will be generated but may have empty sections")
+        # Same company data, same image bytes, same Notion edit: reuse the earlier result
+        if find_duplicate:
+            try:
+                fingerprint = content_fingerprint(
+                    company_data,
+                    [headshot_path, logo_path],
+                    notion_metadata.get("last_edited"),
+                    notion_metadata.get("page_id")
+                )
+                previous = find_duplicate(fingerprint)
+            except Exception as e:
+                print(f"Warning: duplicate check failed, processing normally: {e}")
+                previous = None
+            if previous:
+                print("✓ Identical inputs already processed - returning stored result")
+                for stage in ONBOARDING_STAGES[1:]:
+                    progress(stage, STAGE_SKIPPED, "Duplicate of an earlier job")
+                return previous
         
-        # Store Notion metadata if provided (for reference)
-        notion_metadata = {
-            "page_id": data.get("notion_page_id"),
-            "created_time": data.get("notion_created_time"),
-            "last_edited": data.get("notion_last_edited")
+        # NEW WORKFLOW: Process headshots, generate map, create slide, upload, update Notion
+        
+        results = {
+            "success": False,
+            "google_drive_link": None,
+            "docsend_link": None,
+            "notion_page_id": notion_metadata.get("page_id"),
+            "errors": []
         }
+        notion_page_id = notion_metadata.get("page_id")
+        filename = f"{company_data.get('name', 'slide').replace(' ', '_')}_slide.pdf"
         
-        # Create temporary files for images
-        with tempfile.TemporaryDirectory() as temp_dir:
-            headshot_path = None
-            logo_path = None
-            
-            # Handle headshot - check multiple possible field names
-            if "headshot" in data:
-                try:
-                    headshot_path = handle_image_input(
-                        data["headshot"],
-                        temp_dir,
-                        "headshot.jpg"
-                    )
-                except Exception as e:
-                    print(f"Warning: Failed to process headshot from 'headshot' field: {e}")
-                    headshot_path = None
-            elif "headshot_url" in data:
-                try:
-                    print(f"Downloading headshot from URL: {data['headshot_url'][:100]}...")
-                    headshot_path = handle_image_input(
-                        data["headshot_url"],
-                        temp_dir,
-                        "headshot.jpg"
-                    )
-                    print(f"✓ Headshot downloaded successfully")
-                except Exception as e:
-                    print(f"Warning: Failed to download headshot from URL: {e}")
-                    import traceback
-                    traceback.print_exc()
-                    headshot_path = None
-            
-            # Handle logo - check multiple possible field names
-            if "logo" in data:
-                try:
-                    logo_path = handle_image_input(
-                        data["logo"],
-                        temp_dir,
-                        "logo.png"
-                    )
-                except Exception as e:
-                    print(f"Warning: Failed to process logo from 'logo' field: {e}")
-                    logo_path = None
-            elif "logo_url" in data:
-                try:
-                    print(f"Downloading logo from URL: {data['logo_url'][:100]}...")
-                    logo_path = handle_image_input(
-                        data["logo_url"],
-                        temp_dir,
-                        "logo.png"
-                    )
-                    print(f"✓ Logo downloaded successfully")
-                except Exception as e:
-                    print(f"Warning: Failed to download logo from URL: {e}")
-                    import traceback
-                    traceback.print_exc()
-                    logo_path = None
-            
-            # Headshot and logo are optional - check if they exist in company_data
-            if not headshot_path:
-                # Try to get from company_data
-                if "headshot" in company_data:
-                    headshot_path = handle_image_input(
-                        company_data["headshot"],
-                        temp_dir,
-                        "headshot.jpg"
-                    )
-                elif "headshot_url" in company_data:
-                    headshot_path = handle_image_input(
-                        company_data["headshot_url"],
-                        temp_dir,
-                        "headshot.jpg"
-                    )
-            
-            if not logo_path:
-                # Try to get from company_data
-                if "logo" in company_data:
-                    logo_path = handle_image_input(
-                        company_data["logo"],
-                        temp_dir,
-                        "logo.png"
-                    )
-                elif "logo_url" in company_data:
-                    logo_path = handle_image_input(
-                        company_data["logo_url"],
-                        temp_dir,
-                        "logo.png"
-                    )
-            
-            # If still missing, create placeholder files or skip image processing
-            if not headshot_path:
-                print("Warning: No headshot provided - creating placeholder")
-                headshot_path = os.path.join(temp_dir, "headshot_placeholder.jpg")
-                # Create a small placeholder image
-                from PIL import Image
-                placeholder = Image.new('RGB', (200, 200), color='gray')
-                placeholder.save(headshot_path)
-            
-            if not logo_path:
-                print("Warning: No logo provided - creating placeholder")
-                logo_path = os.path.join(temp_dir, "logo_placeholder.png")
-                # Create a small placeholder image
-                from PIL import Image
-                placeholder = Image.new('RGB', (200, 200), color='lightgray')
-                placeholder.save(logo_path)
-            
-            # NEW WORKFLOW: Process headshots, generate map, create slide, upload, update Notion
-            
-            results = {
-                "success": False,
-                "google_drive_link": None,
-                "docsend_link": None,
-                "notion_page_id": notion_metadata.get("page_id"),
-                "errors": []
-            }
-            
-            try:
+        try:
+            def process_headshots(headshot_path, extra_headshot_paths):
                 # Step 1: Process headshots with Gemini (background removal, greyscale, combine)
                 print("Processing headshots with Gemini...")
+                progress("headshots", STAGE_RUNNING)
                 headshot_paths = []
                 
                 # Collect all headshot paths (could be multiple founders)
                 if headshot_path:
                     headshot_paths.append(headshot_path)
                 
-                # Check if there are multiple headshots in company_data
-                if "headshots" in company_data and isinstance(company_data["headshots"], list):
-                    for hs_data in company_data["headshots"]:
-                        if isinstance(hs_data, str):
-                            # It's a URL or path
-                            hs_path = handle_image_input(hs_data, temp_dir, f"headshot_{len(headshot_paths)}.jpg")
-                            headshot_paths.append(hs_path)
+                # Additional founders' headshots from company_data["headshots"] (fetched during ingestion)
+                headshot_paths.extend(extra_headshot_paths)
                 
                 # Process headshots with Gemini
                 if headshot_paths:
@@ -447,15 +672,11 @@ def handle_onboarding():
                     except Exception as e:
                         print(f"Warning: Gemini headshot processing failed: {e}")
                         results["errors"].append(f"Headshot processing: {str(e)}")
+                        progress("headshots", STAGE_DONE, f"Gemini failed, using raw headshot: {e}")
                         # Use first headshot as fallback - HTML slide generator will process it
-                        if headshot_paths:
-                            # Save the raw headshot path - HTML slide generator will handle processing
-                            combined_headshot_path = headshot_paths[0]
-                            # Read bytes for compatibility, but we'll use the path directly
-                            with open(headshot_paths[0], 'rb') as f:
-                                combined_headshot_bytes = f.read()
-                        else:
-                            combined_headshot_path = None
+                        # Read bytes for compatibility, but we'll use the path directly
+                        with open(headshot_paths[0], 'rb') as f:
+                            combined_headshot_bytes = f.read()
                 else:
                     # Create placeholder
                     from PIL import Image
@@ -463,9 +684,13 @@ def handle_onboarding():
                     placeholder_bytes = io.BytesIO()
                     placeholder.save(placeholder_bytes, format='PNG')
                     combined_headshot_bytes = placeholder_bytes.getvalue()
-                
+                progress("headshots", STAGE_DONE)
+                return {"combined_headshot_bytes": combined_headshot_bytes}
+            
+            def generate_map():
                 # Step 2: Generate map with Gemini
                 print("Generating map with Gemini...")
+                progress("map", STAGE_RUNNING)
                 location = company_data.get("address", company_data.get("location", ""))
                 # Extract city name if address is full address
                 if "," in location:
@@ -478,6 +703,7 @@ def handle_onboarding():
                 except Exception as e:
                     print(f"Warning: Gemini map generation failed: {e}")
                     results["errors"].append(f"Map generation: {str(e)}")
+                    progress("map", STAGE_DONE, f"Gemini failed, using placeholder map: {e}")
                     # Create placeholder map
                     from PIL import Image, ImageDraw, ImageFont
                     img = Image.new('RGB', (800, 600), color=(40, 40, 40))
@@ -495,10 +721,13 @@ def handle_onboarding():
                 # Step 3: Prepare company data for Canva
                 # Add map image to company_data for Canva
                 company_data["map_image"] = map_bytes
-                
+                progress("map", STAGE_DONE)
+                return {"map_path": map_path if os.path.exists(map_path) else None}
+            
+            def render_slide(combined_headshot_bytes, logo_path, map_path):
                 # Step 4: Create slide (HTML → PDF preferred, then Canva if configured)
                 print("Creating slide...")
-                slide_pdf_path = os.path.join(temp_dir, "slide.pdf")
+                progress("render", STAGE_RUNNING)
                 
                 try:
                     # Save combined headshot temporarily
@@ -514,21 +743,19 @@ def handle_onboarding():
                     headshot_img.save(temp_headshot_path, 'PNG')
                     print(f"✓ Saved headshot for processing: {temp_headshot_path} (mode: {headshot_img.mode})")
                     
-                    # Get map path if available
-                    map_path = os.path.join(temp_dir, "map.png") if os.path.exists(os.path.join(temp_dir, "map.png")) else None
-                    
                     slide_pdf_bytes = None
                     
                     # Try HTML → PDF first (simplest, full control)
                     try:
                         print("📄 Using HTML → PDF method...")
                         html_gen = HTMLSlideGenerator()
-                        slide_pdf_bytes = html_gen.create_slide(
-                            company_data,
-                            temp_headshot_path,
-                            logo_path,
-                            map_path=map_path
-                        )
+                        with metrics.stage_timer("render_create_slide"):
+                            slide_pdf_bytes = html_gen.create_slide(
+                                company_data,
+                                temp_headshot_path,
+                                logo_path,
+                                map_path=map_path
+                            )
                         print("✓ Slide created with HTML → PDF")
                     except Exception as html_error:
                         print(f"⚠️  HTML → PDF failed: {html_error}")
@@ -537,7 +764,7 @@ def handle_onboarding():
                         # Try Canva only if credentials are available
                         canva_error = None
                         has_canva_creds = (
-                            (Config.CANVA_API_KEY or (Config.CANVA_CLIENT_ID and Config.CANVA_CLIENT_SECRET)) 
+                            (Config.CANVA_API_KEY or (Config.CANVA_CLIENT_ID and Config.CANVA_CLIENT_SECRET))
                             and Config.CANVA_TEMPLATE_ID
                         )
                         
@@ -564,19 +791,23 @@ def handle_onboarding():
                                 if not has_canva_creds:
                                     error_msg += ". Canva skipped (credentials not configured)"
                             raise Exception(error_msg)
-                    
+                
                 except Exception as e:
                     print(f"Error creating slide: {e}")
                     results["errors"].append(f"Slide creation: {str(e)}")
+                    progress("render", STAGE_FAILED, str(e))
                     raise
-                
+                progress("render", STAGE_DONE)
+                return {"slide_pdf_bytes": slide_pdf_bytes}
+            
+            def lookup_existing_slides():
                 # Step 5: Check if slides already exist for this Notion page
-                notion_page_id = notion_metadata.get("page_id")
                 existing_slides = False
                 existing_google_drive_link = None
                 existing_canva_design_id = None
                 
                 if notion_page_id and Config.NOTION_API_KEY:
+                    progress("notion_lookup", STAGE_RUNNING)
                     try:
                         notion = NotionIntegration()
                         existing_data = notion.get_company_by_page_id(notion_page_id)
@@ -587,7 +818,7 @@ def handle_onboarding():
                             
                             if existing_google_drive_link or existing_canva_design_id:
                                 existing_slides = True
-                                print(f"📋 Found existing slides for this Notion page:")
+                                print("📋 Found existing slides for this Notion page:")
                                 if existing_google_drive_link:
                                     print(f"   Google Drive: {existing_google_drive_link}")
                                 if existing_canva_design_id:
@@ -595,63 +826,36 @@ def handle_onboarding():
                                 print("   Will update/replace existing slides...")
                             else:
                                 print("📄 No existing slides found, creating new ones...")
+                        progress("notion_lookup", STAGE_DONE)
                     except Exception as e:
                         print(f"⚠️  Could not check for existing slides: {e}")
+                        progress("notion_lookup", STAGE_FAILED, str(e))
                         # Continue with creating new slides
-                
+                else:
+                    progress("notion_lookup", STAGE_SKIPPED, "No Notion page ID or API key")
+                return {
+                    "existing_slides": existing_slides,
+                    "existing_google_drive_link": existing_google_drive_link,
+                    "existing_canva_design_id": existing_canva_design_id,
+                }
+            
+            def upload_to_drive(slide_pdf_bytes, drive, drive_folder_id, static_file_name, static_target_file_id,
+                                drive_error, existing_slides, existing_google_drive_link):
                 # Step 6/7: Upload or append PDF to Google Drive (preserve DocSend link)
                 print("Uploading PDF to Google Drive (append/overwrite if existing)...")
-                filename = f"{company_data.get('name', 'slide').replace(' ', '_')}_slide.pdf"
+                progress("drive", STAGE_RUNNING)
                 google_drive_link = None
+                target_file_id = None
                 try:
-                    drive = GoogleDriveIntegration()
-
-                    # Resolve target folder and static file name
-                    drive_folder_id = os.getenv("GOOGLE_DRIVE_FOLDER_ID") or getattr(Config, "GOOGLE_DRIVE_FOLDER_ID", None)
-                    drive_folder_name = (
-                        os.getenv("GOOGLE_DRIVE_FOLDER_NAME")
-                        or getattr(Config, "GOOGLE_DRIVE_FOLDER_NAME", None)
-                        or "Slauson Deck (Portco Slides)"
-                    )
-
-                    if not drive_folder_id and drive_folder_name:
-                        drive_folder_id = drive.find_folder_id_by_name(drive_folder_name)
-                        if drive_folder_id:
-                            print(f"   Found Drive folder '{drive_folder_name}': {drive_folder_id}")
-                        else:
-                            print(f"   Drive folder '{drive_folder_name}' not found, creating it...")
-                            drive_folder_id = drive.create_folder(drive_folder_name)
-                            print(f"   Created Drive folder '{drive_folder_name}': {drive_folder_id}")
+                    if drive_error is not None:
+                        raise drive_error
+                    
+                    target_file_id = static_target_file_id
                     
-                    if drive_folder_id:
-                        all_files = drive.list_files_in_folder(drive_folder_id, limit=200)
-                        if all_files:
-                            names = ", ".join([f"{f.get('name')} ({f.get('id')})" for f in all_files])
-                            print(f"   Files in folder: {names}")
-                        else:
-                            print("   No files found in target folder.")
-
-                    # Preferred static target via env/Config (defaults to Portfolio Slides.pdf)
-                    static_file_id = os.getenv("GOOGLE_DRIVE_STATIC_FILE_ID") or getattr(Config, "GOOGLE_DRIVE_STATIC_FILE_ID", None)
-                    static_file_name = (
-                        os.getenv("GOOGLE_DRIVE_STATIC_FILE_NAME")
-                        or getattr(Config, "GOOGLE_DRIVE_STATIC_FILE_NAME", None)
-                        or "Portfolio Slides.pdf"
-                    )
-
-                    target_file_id = None
-                    # Resolve static file ID by name if only name is provided
-                    if not static_file_id and static_file_name:
-                        target_file_id = drive.find_file_id_by_name(static_file_name, parent_folder_id=drive_folder_id)
-                        if target_file_id:
-                            print(f"   Found static Drive file by name '{static_file_name}': {target_file_id}")
-                    elif static_file_id:
-                        target_file_id = static_file_id
-
                     # If no static target, fall back to existing link from Notion
                     if not target_file_id and existing_slides and existing_google_drive_link:
                         target_file_id = drive.extract_file_id_from_url(existing_google_drive_link)
-
+                    
                     # If still none, this is a fresh upload (or static name not found)
                     if not target_file_id:
                         google_drive_link = drive.upload_pdf(
@@ -665,61 +869,16 @@ def handle_onboarding():
                         try:
                             print("   Downloading target Drive PDF...")
                             existing_bytes = drive.download_file(target_file_id)
-                            old_reader = PdfReader(io.BytesIO(existing_bytes))
-                            new_reader = PdfReader(io.BytesIO(slide_pdf_bytes))
                             
                             # Check if we should replace existing slide for this company
                             # If the same Notion page is being edited, replace the old slide instead of appending
                             company_name = company_data.get('name', '').lower().strip()
                             should_replace = existing_slides and notion_page_id
-                            
-                            if should_replace:
-                                print(f"   Replacing existing slide for company '{company_name}' (Notion page edited)...")
-                                # Try to find and remove the old slide for this company
-                                # Extract company name from PDF pages to identify which page to replace
-                                writer = PdfWriter()
-                                replaced = False
-                                
-                                # Try to identify the company's slide by checking page text
-                                for i, page in enumerate(old_reader.pages):
-                                    try:
-                                        page_text = page.extract_text().lower()
-                                        # Check if this page contains the company name
-                                        if company_name and company_name in page_text:
-                                            print(f"   Found old slide for '{company_name}' at page {i+1}, replacing it...")
-                                            # Skip this page (replace with new slide)
-                                            replaced = True
-                                            # Add new slide in its place
-                                            for new_page in new_reader.pages:
-                                                writer.add_page(new_page)
-                                        else:
-                                            # Keep pages that don't match this company
-                                            writer.add_page(page)
-                                    except Exception as e:
-                                        # If text extraction fails, keep the page
-                                        print(f"   Warning: Could not extract text from page {i+1}: {e}")
-                                        writer.add_page(page)
-                                
-                                # If we didn't find a matching page, append the new slide
-                                if not replaced:
-                                    print(f"   Could not find old slide for '{company_name}', appending new slide...")
-                                    for p in old_reader.pages:
-                                        writer.add_page(p)
-                                    for p in new_reader.pages:
-                                        writer.add_page(p)
-                            else:
-                                # No existing slides for this page, just append
-                                print("   Appending new slide(s) to existing PDF...")
-                                writer = PdfWriter()
-                                for p in old_reader.pages:
-                                    writer.add_page(p)
-                                for p in new_reader.pages:
-                                    writer.add_page(p)
-                            
-                            merged_buf = io.BytesIO()
-                            writer.write(merged_buf)
-                            merged_buf.seek(0)
-                            merged_bytes = merged_buf.read()
+                            merged_bytes, replaced_names = merge_slides_into_pdf(
+                                existing_bytes,
+                                [{"name": company_name, "pdf_bytes": slide_pdf_bytes, "replace": bool(should_replace)}]
+                            )
+                            replaced = bool(replaced_names)
                             google_drive_link = drive.overwrite_pdf(target_file_id, merged_bytes)
                             results["google_drive_link"] = google_drive_link
                             if should_replace and replaced:
@@ -738,8 +897,16 @@ def handle_onboarding():
                 except Exception as e:
                     print(f"Warning: Google Drive upload failed: {e}")
                     results["errors"].append(f"Google Drive: {str(e)}")
-                
+                    progress("drive", STAGE_FAILED, str(e))
+                else:
+                    progress("drive", STAGE_DONE)
+                return {"google_drive_link": google_drive_link, "target_file_id": target_file_id}
+            
+            def upload_to_canva(slide_pdf_bytes, canva, drive, target_file_id, existing_slides, existing_canva_design_id):
                 # Step 8: Delete old Canva design if it exists
+                progress("canva", STAGE_RUNNING)
+                canva_design_id = None
+                canva_design_url = None
                 if existing_slides and existing_canva_design_id:
                     try:
                         has_canva_creds = (
@@ -747,7 +914,7 @@ def handle_onboarding():
                         )
                         if has_canva_creds:
                             print(f"🗑️  Deleting old Canva design: {existing_canva_design_id}")
-                            canva = CanvaIntegration()
+                            canva = canva or CanvaIntegration()
                             canva.delete_design(existing_canva_design_id)
                         else:
                             print("⚠️  Canva credentials not configured, skipping deletion")
@@ -758,20 +925,13 @@ def handle_onboarding():
                         # Continue anyway - we'll create new design
                 
                 # Step 9: Upload PDF to Canva as asset (required)
-                canva_asset_id = None
-                canva_design_id = None
-                canva_design_url = None
                 try:
                     has_canva_creds = (
                         (Config.CANVA_API_KEY or (Config.CANVA_CLIENT_ID and Config.CANVA_CLIENT_SECRET))
                         and Config.CANVA_TEMPLATE_ID
                     )
                     if has_canva_creds:
-                        # Ensure filename is defined (should be from Step 7, but double-check)
-                        if 'filename' not in locals():
-                            filename = f"{company_data.get('name', 'slide').replace(' ', '_')}_slide.pdf"
-                        
-                        canva = CanvaIntegration()
+                        canva = canva or CanvaIntegration()
                         
                         # Check if we should append to existing Canva design
                         static_canva_design_id = os.getenv("CANVA_STATIC_DESIGN_ID") or getattr(Config, "CANVA_STATIC_DESIGN_ID", None)
@@ -785,109 +945,40 @@ def handle_onboarding():
                             target_canva_design_id = existing_canva_design_id
                             print(f"   Found existing Canva design ID: {target_canva_design_id}")
                         
-                        previous_design_id = target_canva_design_id
-                        
-                        if target_canva_design_id:
-                            # Append to existing design
-                            print("Appending slide to existing Canva design...")
+                        def load_existing_pdf():
+                            # Get existing PDF from Google Drive for merging (if available)
+                            # This is the source of truth since Canva API doesn't support PDF export
+                            if not target_file_id:
+                                print("   No Google Drive file ID available, using only new slide")
+                                return None
                             try:
-                                # Get existing PDF from Google Drive for merging (if available)
-                                # This is the source of truth since Canva API doesn't support PDF export
-                                existing_pdf_bytes = None
-                                if target_file_id:
-                                    try:
-                                        existing_pdf_bytes = drive.download_file(target_file_id)
-                                        print(f"   Downloaded existing PDF from Google Drive ({len(existing_pdf_bytes)} bytes) for Canva merge")
-                                    except Exception as e:
-                                        print(f"   Could not download from Google Drive: {e}")
-                                        print(f"   (This is OK if it's the first slide)")
-                                        existing_pdf_bytes = None
-                                else:
-                                    print(f"   No Google Drive file ID available, using only new slide")
-                                
-                                canva_asset_id = canva.append_slide_to_design(
-                                    target_canva_design_id, 
-                                    slide_pdf_bytes, 
-                                    filename,
-                                    existing_pdf_bytes=existing_pdf_bytes
-                                )
-                                results["canva_asset_id"] = canva_asset_id
-                                
-                                # Check if it's a job ID (import job) or design ID
-                                import re
-                                is_job_id = re.match(r'^[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}$', canva_asset_id, re.IGNORECASE)
-                                if is_job_id:
-                                    # Wait for import completion and get design ID
-                                    print("Waiting for Canva import to complete...")
-                                    status_info = canva.wait_for_import_completion(canva_asset_id, max_wait_seconds=60, poll_interval=2)
-                                    if status_info.get('status') == 'success':
-                                        canva_design_id = status_info.get('design_id')
-                                        canva_design_url = status_info.get('design_url')
-                                        results["canva_design_id"] = canva_design_id
-                                        results["canva_design_url"] = canva_design_url
-                                        print(f"✓ Appended slide to Canva design: {canva_design_id}")
-                                        if canva_design_id and canva_design_id.startswith("DAG"):
-                                            Config.CANVA_STATIC_DESIGN_ID = canva_design_id
-                                            _update_env_var("CANVA_STATIC_DESIGN_ID", canva_design_id)
-                                            print(f"   Updated CANVA_STATIC_DESIGN_ID to {canva_design_id}")
-                                            if _should_delete_previous_design() and previous_design_id and previous_design_id != canva_design_id:
-                                                canva.delete_design(previous_design_id)
-                                    else:
-                                        print(f"⚠️  Canva import job did not complete successfully: {status_info.get('status')}")
-                                else:
-                                    # It's already a design ID
-                                    canva_design_id = canva_asset_id
-                                    results["canva_design_id"] = canva_design_id
-                                    print(f"✓ Appended slide to Canva design: {canva_design_id}")
-                                    if canva_design_id and canva_design_id.startswith("DAG"):
-                                        Config.CANVA_STATIC_DESIGN_ID = canva_design_id
-                                        _update_env_var("CANVA_STATIC_DESIGN_ID", canva_design_id)
-                                        print(f"   Updated CANVA_STATIC_DESIGN_ID to {canva_design_id}")
-                                        if _should_delete_previous_design() and previous_design_id and previous_design_id != canva_design_id:
-                                            canva.delete_design(previous_design_id)
+                                existing_pdf_bytes = drive.download_file(target_file_id)
+                                print(f"   Downloaded existing PDF from Google Drive ({len(existing_pdf_bytes)} bytes) for Canva merge")
+                                return existing_pdf_bytes
                             except Exception as e:
-                                print(f"⚠️  Failed to append to existing design: {e}")
-                                print("   Falling back to uploading as new design...")
-                                # Fall through to new design upload
-                                target_canva_design_id = None
+                                print(f"   Could not download from Google Drive: {e}")
+                                print("   (This is OK if it's the first slide)")
+                                return None
                         
-                        if not target_canva_design_id:
-                            # Upload as new design
-                            print("Uploading slide PDF to Canva as new design...")
-                            canva_asset_id = canva.upload_pdf_asset(slide_pdf_bytes, filename)
-                            results["canva_asset_id"] = canva_asset_id
-                            
-                            # Check if it's a job ID (import job) or asset ID
-                            import re
-                            is_job_id = re.match(r'^[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}$', canva_asset_id, re.IGNORECASE)
-                            if is_job_id:
-                                # Wait for import completion and get design ID
-                                print("Waiting for Canva import to complete...")
-                                status_info = canva.wait_for_import_completion(canva_asset_id, max_wait_seconds=60, poll_interval=2)
-                                if status_info.get('status') == 'success':
-                                    canva_design_id = status_info.get('design_id')
-                                    canva_design_url = status_info.get('design_url')
-                                    results["canva_design_id"] = canva_design_id
-                                    results["canva_design_url"] = canva_design_url
-                                    print(f"✓ Created new Canva design: {canva_design_id}")
-                                    if canva_design_id and canva_design_id.startswith("DAG"):
-                                        Config.CANVA_STATIC_DESIGN_ID = canva_design_id
-                                        _update_env_var("CANVA_STATIC_DESIGN_ID", canva_design_id)
-                                        print(f"   Updated CANVA_STATIC_DESIGN_ID to {canva_design_id}")
-                                        if _should_delete_previous_design() and previous_design_id and previous_design_id != canva_design_id:
-                                            canva.delete_design(previous_design_id)
-                                else:
-                                    print(f"⚠️  Canva import job did not complete successfully: {status_info.get('status')}")
-                            else:
-                                print(f"✓ Uploaded PDF to Canva assets: {canva_asset_id}")
+                        imported = import_slides_to_canva(
+                            canva, slide_pdf_bytes, filename, target_canva_design_id, load_existing_pdf
+                        )
+                        results.update({key: value for key, value in imported.items() if value is not None})
+                        canva_design_id = imported["canva_design_id"]
+                        canva_design_url = imported["canva_design_url"]
+                        progress("canva", STAGE_DONE)
                     else:
                         print("Warning: Canva credentials not configured, skipping PDF upload")
                         results["errors"].append("Canva PDF upload: Credentials not configured")
+                        progress("canva", STAGE_SKIPPED, "Credentials not configured")
                 except Exception as e:
                     print(f"Error: Canva PDF upload failed: {e}")
                     results["errors"].append(f"Canva PDF upload: {str(e)}")
+                    progress("canva", STAGE_FAILED, str(e))
                     # Don't fail the entire workflow, but log the error
-                
+                return {"canva_design_id": canva_design_id, "canva_design_url": canva_design_url}
+            
+            def upload_to_docsend(slide_pdf_bytes):
                 # Step 10: DocSend (optional - uses Google Drive sync)
                 print("DocSend integration via Google Drive...")
                 docsend_link = None
@@ -899,6 +990,7 @@ def handle_onboarding():
                 
                 if Config.DOCSEND_API_KEY and Config.DOCSEND_API_KEY != "your_docsend_api_key_here":
                     # Try DocSend API upload if API key is configured
+                    progress("docsend", STAGE_RUNNING)
                     try:
                         docsend = DocSendIntegration()
                         docsend_link = docsend.upload_individual_slide(
@@ -907,20 +999,26 @@ def handle_onboarding():
                         )
                         results["docsend_link"] = docsend_link
                         print(f"✓ Uploaded to DocSend via API: {docsend_link}")
+                        progress("docsend", STAGE_DONE)
                     except Exception as e:
                         print(f"Warning: DocSend API upload failed: {e}")
                         results["errors"].append(f"DocSend API: {str(e)}")
+                        progress("docsend", STAGE_FAILED, str(e))
                         # Fall through to Google Drive sync method
                 else:
                     # DocSend will auto-sync from Google Drive
+                    progress("docsend", STAGE_SKIPPED, "Auto-syncs from Google Drive")
                     print("✓ DocSend will auto-sync from Google Drive")
                     print("  Note: DocSend link will need to be retrieved manually or via DocSend API")
                     # You can manually get the DocSend link from the Google Drive file
                     # Or set up DocSend API later to get the link programmatically
-                
+                return {"docsend_link": docsend_link}
+            
+            def update_notion(google_drive_link, docsend_link, canva_design_id, canva_design_url, existing_slides):
                 # Step 11: Update Notion record
                 print("Updating Notion record...")
                 if notion_page_id and Config.NOTION_API_KEY:
+                    progress("notion_update", STAGE_RUNNING)
                     try:
                         notion = NotionIntegration()
                         notion.update_company_record(
@@ -935,31 +1033,521 @@ def handle_onboarding():
                             print("✓ Notion record updated (replaced existing slides)")
                         else:
                             print("✓ Notion record updated (new slides created)")
+                        progress("notion_update", STAGE_DONE)
                     except Exception as e:
                         print(f"Warning: Notion update failed: {e}")
                         results["errors"].append(f"Notion update: {str(e)}")
+                        progress("notion_update", STAGE_FAILED, str(e))
                 else:
                     print("Skipping Notion update (no page ID or API key)")
-                
-                # Step 8: Mark as successful
-                results["success"] = True
-                print("\n" + "="*60)
-                print("✓ Processing complete!")
-                print(f"  Google Drive: {google_drive_link or 'N/A'}")
-                print(f"  DocSend: {docsend_link or 'N/A'}")
-                print("="*60 + "\n")
-                
-            except Exception as e:
-                import traceback
-                print(f"\n❌ ERROR IN WORKFLOW:")
-                print(f"Error: {str(e)}")
-                print(f"Traceback:\n{traceback.format_exc()}\n")
-                results["errors"].append(str(e))
-                results["success"] = False
+                    progress("notion_update", STAGE_SKIPPED, "No Notion page ID or API key")
             
-            # Return JSON response to Zapier
-            return jsonify(results), 200 if results["success"] else 500
+            # Stages only wait for the data they read: the Notion lookup, Drive target
+            # resolution and Canva token run alongside headshots/map/render, and
+            # DocSend runs alongside Drive and Canva.
+            stages = [
+                Stage("headshots", process_headshots,
+                      inputs=["headshot_path", "extra_headshot_paths"], outputs=["combined_headshot_bytes"]),
+                Stage("map", generate_map, outputs=["map_path"]),
+                Stage("notion_lookup", lookup_existing_slides,
+                      outputs=["existing_slides", "existing_google_drive_link", "existing_canva_design_id"]),
+                Stage("drive_resolve", lambda: resolve_drive_target(progress),
+                      outputs=["drive", "drive_folder_id", "static_file_name", "static_target_file_id", "drive_error"]),
+                Stage("canva_auth", lambda: prepare_canva(progress), outputs=["canva"]),
+                Stage("render", render_slide,
+                      inputs=["combined_headshot_bytes", "logo_path", "map_path"], outputs=["slide_pdf_bytes"]),
+                Stage("drive", upload_to_drive,
+                      inputs=["slide_pdf_bytes", "drive", "drive_folder_id", "static_file_name",
+                              "static_target_file_id", "drive_error", "existing_slides", "existing_google_drive_link"],
+                      outputs=["google_drive_link", "target_file_id"]),
+                Stage("canva", upload_to_canva,
+                      inputs=["slide_pdf_bytes", "canva", "drive", "target_file_id",
+                              "existing_slides", "existing_canva_design_id"],
+                      outputs=["canva_design_id", "canva_design_url"]),
+                Stage("docsend", upload_to_docsend, inputs=["slide_pdf_bytes"], outputs=["docsend_link"]),
+                Stage("notion_update", update_notion,
+                      inputs=["google_drive_link", "docsend_link", "canva_design_id",
+                              "canva_design_url", "existing_slides"]),
+            ]
+            if not publish:
+                stages = [stage for stage in stages if stage.name in ("headshots", "map", "render")]
+            outputs = Pipeline(stages).run(
+                {
+                    "headshot_path": headshot_path,
+                    "extra_headshot_paths": extra_headshot_paths,
+                    "logo_path": logo_path,
+                },
+                max_workers=Config.PIPELINE_WORKERS,
+            )
+            if not publish:
+                results["slide_pdf_bytes"] = outputs["slide_pdf_bytes"]
+            google_drive_link = outputs.get("google_drive_link")
+            docsend_link = outputs.get("docsend_link")
+            
+            # Step 8: Mark as successful
+            results["success"] = True
+            print("\n" + "="*60)
+            print("✓ Processing complete!")
+            print(f"  Google Drive: {google_drive_link or 'N/A'}")
+            print(f"  DocSend: {docsend_link or 'N/A'}")
+            print("="*60 + "\n")
             
+        except Exception as e:
+            import traceback
+            print("\n❌ ERROR IN WORKFLOW:")
+            print(f"Error: {str(e)}")
+            print(f"Traceback:\n{traceback.format_exc()}\n")
+            results["errors"].append(str(e))
+            results["success"] = False
+        
+        metrics.observe_stage(
+            "total",
+            time.perf_counter() - started_wall,
+            progress.cpu_seconds,  # Stages run on pipeline threads; this thread mostly waits
+            "done" if results["success"] else "failed",
+        )
+        return results
+
+
+def render_onboarding_slide(payload: Dict) -> Dict:
+    """
+    Process-pool worker for batch onboarding: ingest images and render one slide.
+    
+    Args:
+        payload: One company payload (same formats as /webhook/onboarding)
+        
+    Returns:
+        run_onboarding results with slide_pdf_bytes (nothing is published)
+    """
+    return run_onboarding(payload, extract_company_data(payload), publish=False)
+
+
+_render_pool = None
+_render_pool_lock = threading.Lock()
+
+
+def get_render_pool() -> ProcessPoolExecutor:
+    """
+    Return the process-wide pool that renders batch slides. It lives as long as
+    the server process, so each render process loads the template, fonts and
+    segmentation model once (warmup.warm_render_process) instead of per batch.
+    """
+    global _render_pool
+    with _render_pool_lock:
+        if _render_pool is None:
+            # spawn: forking a process that runs queue worker threads can copy held locks
+            _render_pool = ProcessPoolExecutor(
+                max_workers=max(1, Config.BATCH_RENDER_PROCESSES),
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=warmup.warm_render_process,
+            )
+        return _render_pool
+
+
+def _discard_render_pool(pool: ProcessPoolExecutor):
+    """Drop a broken pool (a render process died) so the next batch starts a fresh one."""
+    global _render_pool
+    with _render_pool_lock:
+        if _render_pool is pool:
+            _render_pool = None
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+def run_batch_onboarding(payloads: List[Dict], progress: Optional[Callable] = None) -> Dict:
+    """
+    Onboard many companies at once: render every slide in the long-lived render
+    process pool, then merge them into the Drive master PDF with one
+    download/overwrite, append them to the Canva design in one import (same path
+    as a single onboarding), and update each Notion record.
+    
+    Args:
+        payloads: Validated company payloads
+        progress: Optional callback progress(stage, status, detail=None) for per-stage status
+        
+    Returns:
+        Results dictionary (success, google_drive_link, canva_design_id, errors) with
+        per-company results under "companies", in request order
+    """
+    progress = metrics.timed_progress(progress or _noop_progress)
+    companies = []
+    for index, payload in enumerate(payloads):
+        company_data = extract_company_data(payload)
+        companies.append({
+            "index": index,
+            "name": company_data.get("name", ""),
+            "notion_page_id": payload.get("notion_page_id"),
+            "success": False,
+            "google_drive_link": None,
+            "docsend_link": None,
+            "errors": [],
+        })
+    results = {
+        "success": False,
+        "google_drive_link": None,
+        "canva_design_id": None,
+        "canva_design_url": None,
+        "companies": companies,
+        "errors": [],
+    }
+    
+    def render_all():
+        progress("render", STAGE_RUNNING)
+        slides = {}
+        print(f"Rendering {len(payloads)} slide(s) in up to {max(1, Config.BATCH_RENDER_PROCESSES)} process(es)...")
+        pool = get_render_pool()
+        try:
+            futures = {pool.submit(render_onboarding_slide, payload): i for i, payload in enumerate(payloads)}
+        except BrokenProcessPool:
+            _discard_render_pool(pool)
+            pool = get_render_pool()
+            futures = {pool.submit(render_onboarding_slide, payload): i for i, payload in enumerate(payloads)}
+        for future in as_completed(futures):
+            company = companies[futures[future]]
+            try:
+                rendered = future.result()
+            except BrokenProcessPool as e:
+                _discard_render_pool(pool)
+                rendered = {"success": False, "errors": [f"Render process died: {e}"]}
+            except Exception as e:
+                rendered = {"success": False, "errors": [str(e)]}
+            company["errors"].extend(rendered.get("errors", []))
+            if rendered.get("success") and rendered.get("slide_pdf_bytes"):
+                slides[company["index"]] = rendered["slide_pdf_bytes"]
+                company["success"] = True
+                print(f"✓ Rendered slide for '{company['name']}'")
+            else:
+                print(f"❌ Could not render slide for '{company['name']}'")
+        if not slides:
+            progress("render", STAGE_FAILED, "No slides rendered")
+            raise Exception("No slides rendered")
+        progress("render", STAGE_DONE, f"{len(slides)}/{len(payloads)} rendered")
+        return {"slides": slides}
+    
+    def lookup_existing_slides():
+        # page ID -> True if that Notion page already has slides (its old page gets replaced)
+        existing = {}
+        if not Config.NOTION_API_KEY:
+            progress("notion_lookup", STAGE_SKIPPED, "No Notion API key")
+            return {"existing": existing}
+        progress("notion_lookup", STAGE_RUNNING)
+        notion = NotionIntegration()
+        for company in companies:
+            page_id = company["notion_page_id"]
+            if not page_id:
+                continue
+            try:
+                existing_data = notion.get_company_by_page_id(page_id) or {}
+                existing[page_id] = bool(existing_data.get("google_drive_link") or existing_data.get("canva_design_id"))
+            except Exception as e:
+                print(f"⚠️  Could not check for existing slides of '{company['name']}': {e}")
+        progress("notion_lookup", STAGE_DONE)
+        return {"existing": existing}
+    
+    def upload_to_drive(slides, existing, drive, drive_folder_id, static_file_name, static_target_file_id, drive_error):
+        print(f"Merging {len(slides)} slide(s) into the Drive master PDF...")
+        progress("drive", STAGE_RUNNING)
+        ordered = [companies[i] for i in sorted(slides)]
+        existing_bytes = None
+        try:
+            if drive_error is not None:
+                raise drive_error
+            new_slides = [
+                {
+                    "name": company["name"],
+                    "pdf_bytes": slides[company["index"]],
+                    "replace": bool(company["notion_page_id"] and existing.get(company["notion_page_id"])),
+                }
+                for company in ordered
+            ]
+            if static_target_file_id:
+                existing_bytes = drive.download_file(static_target_file_id)
+                deck_bytes, replaced = merge_slides_into_pdf(existing_bytes, new_slides)
+                google_drive_link = drive.overwrite_pdf(static_target_file_id, deck_bytes)
+                print(f"✓ Overwrote Drive PDF with {len(new_slides)} slide(s) ({len(replaced)} replaced): {google_drive_link}")
+            else:
+                writer = PdfWriter()
+                for slide in new_slides:
+                    for page in PdfReader(io.BytesIO(slide["pdf_bytes"])).pages:
+                        writer.add_page(page)
+                buf = io.BytesIO()
+                writer.write(buf)
+                deck_bytes = buf.getvalue()
+                google_drive_link = drive.upload_pdf(deck_bytes, static_file_name, folder_id=drive_folder_id)
+                print(f"✓ Uploaded new Drive PDF: {google_drive_link}")
+            results["google_drive_link"] = google_drive_link
+            for company in ordered:
+                company["google_drive_link"] = google_drive_link
+            progress("drive", STAGE_DONE)
+        except Exception as e:
+            print(f"Warning: Google Drive upload failed: {e}")
+            results["errors"].append(f"Google Drive: {str(e)}")
+            progress("drive", STAGE_FAILED, str(e))
+        # The deck as it was before this batch, which Canva appends the batch to
+        return {"existing_deck_bytes": existing_bytes}
+    
+    def upload_to_canva(slides, existing_deck_bytes, canva):
+        has_canva_creds = (
+            (Config.CANVA_API_KEY or (Config.CANVA_CLIENT_ID and Config.CANVA_CLIENT_SECRET))
+            and Config.CANVA_TEMPLATE_ID
+        )
+        if not has_canva_creds:
+            results["errors"].append("Canva PDF upload: Credentials not configured")
+            progress("canva", STAGE_SKIPPED, "Credentials not configured")
+            return {"canva_done": True}
+        progress("canva", STAGE_RUNNING)
+        try:
+            canva = canva or CanvaIntegration()
+            writer = PdfWriter()
+            for i in sorted(slides):
+                for page in PdfReader(io.BytesIO(slides[i])).pages:
+                    writer.add_page(page)
+            buf = io.BytesIO()
+            writer.write(buf)
+            batch_bytes = buf.getvalue()
+            # Same path as a single onboarding: append to the static design, else import a new one
+            target_design_id = os.getenv("CANVA_STATIC_DESIGN_ID") or getattr(Config, "CANVA_STATIC_DESIGN_ID", None)
+            print(f"Adding {len(slides)} slide(s) to Canva once for the whole batch...")
+            imported = import_slides_to_canva(
+                canva, batch_bytes, "Portfolio_Slides.pdf", target_design_id, lambda: existing_deck_bytes
+            )
+            results.update({key: value for key, value in imported.items() if value is not None})
+            progress("canva", STAGE_DONE)
+        except Exception as e:
+            print(f"Error: Canva PDF upload failed: {e}")
+            results["errors"].append(f"Canva PDF upload: {str(e)}")
+            progress("canva", STAGE_FAILED, str(e))
+        return {"canva_done": True}
+    
+    def upload_to_docsend(slides):
+        if not (Config.DOCSEND_API_KEY and Config.DOCSEND_API_KEY != "your_docsend_api_key_here"):
+            progress("docsend", STAGE_SKIPPED, "Auto-syncs from Google Drive")
+            return {}
+        progress("docsend", STAGE_RUNNING)
+        docsend = DocSendIntegration()
+        for i in sorted(slides):
+            company = companies[i]
+            try:
+                company["docsend_link"] = docsend.upload_individual_slide(slides[i], company["name"] or "Company")
+            except Exception as e:
+                company["errors"].append(f"DocSend API: {str(e)}")
+        progress("docsend", STAGE_DONE)
+        return {}
+    
+    def update_notion(slides, canva_done):
+        if not Config.NOTION_API_KEY:
+            progress("notion_update", STAGE_SKIPPED, "No Notion API key")
+            return
+        progress("notion_update", STAGE_RUNNING)
+        notion = NotionIntegration()
+        for i in sorted(slides):
+            company = companies[i]
+            if not company["notion_page_id"]:
+                continue
+            try:
+                notion.update_company_record(
+                    page_id=company["notion_page_id"],
+                    google_drive_link=company["google_drive_link"],
+                    docsend_link=company["docsend_link"],
+                    canva_design_id=results["canva_design_id"],
+                    canva_design_url=results["canva_design_url"],
+                    status="completed"
+                )
+            except Exception as e:
+                company["errors"].append(f"Notion update: {str(e)}")
+        progress("notion_update", STAGE_DONE)
+    
+    try:
+        Pipeline([
+            Stage("render", render_all, outputs=["slides"]),
+            Stage("notion_lookup", lookup_existing_slides, outputs=["existing"]),
+            Stage("drive_resolve", lambda: resolve_drive_target(progress),
+                  outputs=["drive", "drive_folder_id", "static_file_name", "static_target_file_id", "drive_error"]),
+            Stage("canva_auth", lambda: prepare_canva(progress), outputs=["canva"]),
+            Stage("drive", upload_to_drive,
+                  inputs=["slides", "existing", "drive", "drive_folder_id", "static_file_name",
+                          "static_target_file_id", "drive_error"],
+                  outputs=["existing_deck_bytes"]),
+            Stage("canva", upload_to_canva, inputs=["slides", "existing_deck_bytes", "canva"], outputs=["canva_done"]),
+            Stage("docsend", upload_to_docsend, inputs=["slides"]),
+            # After Canva so every record gets the batch's design ID
+            Stage("notion_update", update_notion, inputs=["slides", "canva_done"]),
+        ]).run({}, max_workers=Config.PIPELINE_WORKERS)
+        results["success"] = all(company["success"] for company in companies)
+    except Exception as e:
+        print(f"\n❌ ERROR IN BATCH WORKFLOW: {e}")
+        results["errors"].append(str(e))
+    
+    print(f"✓ Batch complete: {sum(c['success'] for c in companies)}/{len(companies)} companies")
+    return results
+
+
+_job_queue = None
+_job_queue_lock = threading.Lock()
+
+
+def get_job_queue(start_workers: bool = True) -> JobQueue:
+    """
+    Return the process-wide job queue, starting its workers if needed.
+    Workers are started at server start (gunicorn.conf.py post_worker_init, or
+    the __main__ block); starting them here too restarts any that died.
+    """
+    global _job_queue
+    with _job_queue_lock:
+        if _job_queue is None:
+            _job_queue = JobQueue(
+                Config.JOB_QUEUE_PATH,
+                workers=Config.JOB_WORKERS,
+                lease_seconds=Config.JOB_LEASE_SECONDS,
+                max_attempts=Config.JOB_MAX_ATTEMPTS,
+            )
+        if start_workers:
+            _job_queue.start(_run_onboarding_job)
+    return _job_queue
+
+
+def _run_onboarding_job(job_id: str, payload: Dict) -> Dict:
+    """Job queue handler: re-validate the stored payload and run the workflow."""
+    queue = get_job_queue()
+    
+    def progress(stage, status, detail=None):
+        try:
+            queue.update_stage(job_id, stage, status, detail)
+        except Exception as e:
+            print(f"Warning: could not record stage {stage} for job {job_id}: {e}")
+    
+    def find_duplicate(fingerprint):
+        queue.set_content_fingerprint(job_id, fingerprint)
+        if payload.get("force"):
+            return None
+        previous = queue.find_succeeded(content_fingerprint=fingerprint, exclude_job_id=job_id)
+        if not previous or not previous.get("result"):
+            return None
+        return {**previous["result"], "deduplicated_from": previous["job_id"]}
+    
+    if "batch" in payload:
+        return run_batch_onboarding(payload["batch"], progress=progress)
+    
+    company_data = extract_company_data(payload)
+    return run_onboarding(payload, company_data, progress=progress, find_duplicate=find_duplicate)
+
+
+@app.route('/webhook/onboarding', methods=['POST'])
+def handle_onboarding():
+    """
+    Handle onboarding form submission webhook.
+    
+    Expected JSON payload (supports multiple formats):
+    
+    Format 1 - Base64 images:
+    {
+        "company_data": {
+            "name": "...",
+            "website": "...",
+            ...
+        },
+        "headshot": "base64_encoded_image",
+        "logo": "base64_encoded_image"
+    }
+    
+    Format 2 - File URLs (from Notion):
+    {
+        "company_data": { ... },
+        "headshot_url": "https://notion.so/file/...",
+        "logo_url": "https://notion.so/file/..."
+    }
+    
+    Format 3 - Mixed:
+    {
+        "company_data": { ... },
+        "headshot": "base64_or_url",
+        "logo": "base64_or_url"
+    }
+    
+    Format 4 - Zapier with Notion metadata:
+    {
+        "company_data": { ... },
+        "headshot_url": "...",
+        "logo_url": "...",
+        "notion_page_id": "...",
+        "notion_created_time": "...",
+        "notion_last_edited": "..."
+    }
+    
+    Format 5 - multipart/form-data (images as file parts, streamed to disk):
+        payload=<any JSON format above, without inline images>  (or flat company_data__ fields)
+        headshot=@headshot.jpg  logo=@logo.png  headshots=@extra.jpg (repeatable)
+    
+    Bodies larger than MAX_REQUEST_BYTES are rejected with 413.
+    
+    The payload is validated, persisted to the job queue and processed by a
+    background worker. Responds 202 with a job ID; poll GET /jobs/<job_id>
+    for per-stage status and the final links. Set ONBOARDING_SYNC=true to
+    run the workflow inside the request instead.
+    """
+    try:
+        data = read_onboarding_payload()
+        
+        # Log incoming request for debugging
+        print(f"\n{'='*60}")
+        print(f"Received webhook request: {request.method} {request.path}")
+        print(f"Payload keys: {list(data.keys()) if data else 'None'}")
+        if data:
+            # Summarize long values (inline base64 images) instead of copying them into the log line
+            sample = {k: f"<{len(v)} chars>" if isinstance(v, str) and len(v) > 200 else v for k, v in data.items()}
+            print(f"Payload sample (first 500 chars): {str(sample)[:500]}")
+        print(f"{'='*60}\n")
+        
+        if not data:
+            error_msg = "Missing data in request body"
+            print(f"❌ ERROR: {error_msg}")
+            return jsonify({"error": error_msg, "success": False}), 400
+        
+        company_data = extract_company_data(data)
+        
+        # Idempotency: Zapier re-fires the same row on edits and retries on timeouts.
+        # Pass "force": true (or ?force=1) to reprocess anyway.
+        fingerprint = payload_fingerprint(data, company_data)
+        force = bool(data.get("force")) or request.args.get("force", "").lower() in ("1", "true")
+        queue = get_job_queue(start_workers=not Config.ONBOARDING_SYNC)
+        
+        if Config.ONBOARDING_SYNC:
+            previous = None if force else queue.find_succeeded(fingerprint=fingerprint)
+            if previous and previous.get("result"):
+                print(f"✓ Duplicate request - returning stored result of job {previous['job_id']}")
+                return jsonify({**previous["result"], "job_id": previous["job_id"], "deduplicated": True}), 200
+            results = run_onboarding(data, company_data)
+            queue.record_completed(data, fingerprint, results)
+            return jsonify(results), 200 if results["success"] else 500
+        
+        if force:
+            # The worker's content dedup reads the flag from the stored payload
+            data["force"] = True
+            job_id, created = queue.enqueue(data, fingerprint), True
+        else:
+            job_id, created = queue.enqueue_unique(data, fingerprint)
+        
+        if not created:
+            job = queue.get(job_id)
+            if job["status"] == SUCCEEDED and job.get("result"):
+                print(f"✓ Duplicate request - returning stored result of job {job_id}")
+                return jsonify({**job["result"], "job_id": job_id, "deduplicated": True}), 200
+            print(f"✓ Duplicate request - collapsed into in-flight job {job_id}")
+        else:
+            print(f"✓ Queued onboarding job {job_id} for '{company_data.get('name', '')}'")
+        
+        return jsonify({
+            "success": True,
+            "job_id": job_id,
+            "status": "queued" if created else queue.get(job_id)["status"],
+            "status_url": f"/jobs/{job_id}",
+            "deduplicated": not created,
+            "notion_page_id": data.get("notion_page_id")
+        }), 202
+    
+    except PayloadValidationError as e:
+        return jsonify({"error": str(e), "success": False, **e.details}), 400
+    except image_ingest.ImageIngestError as e:
+        return jsonify({"error": str(e), "success": False}), 400
     except Exception as e:
         import traceback
         error_details = {
@@ -968,22 +1556,154 @@ def handle_onboarding():
             "traceback": traceback.format_exc()
         }
         # Print to console for debugging
-        print(f"\n❌ ERROR PROCESSING WEBHOOK:")
+        print("\n❌ ERROR PROCESSING WEBHOOK:")
         print(f"Error: {str(e)}")
         print(f"Type: {type(e).__name__}")
         print(f"Traceback:\n{traceback.format_exc()}\n")
         return jsonify(error_details), 500
 
 
+@app.route('/webhook/onboarding/batch', methods=['POST'])
+def handle_onboarding_batch():
+    """
+    Onboard a cohort (or backfill) in one request.
+    
+    Expected payload:
+    {
+        "companies": [ <payload as accepted by /webhook/onboarding>, ... ]
+    }
+    
+    Slides are rendered in a process pool, merged into the Drive master PDF with a
+    single download/overwrite and imported into Canva once. Responds 202 with a job
+    ID; GET /jobs/<job_id> returns per-company results under result.companies.
+    Every entry is validated up front and the whole batch is rejected (400) if any
+    entry is invalid.
+    """
+    try:
+        data = request.get_json(silent=True)
+        companies = data.get("companies") if isinstance(data, dict) else data
+        if not isinstance(companies, list) or not companies:
+            return jsonify({"error": "Expected a non-empty 'companies' list", "success": False}), 400
+        if len(companies) > Config.BATCH_MAX_COMPANIES:
+            return jsonify({
+                "error": f"Batch too large ({len(companies)} > {Config.BATCH_MAX_COMPANIES} companies)",
+                "success": False
+            }), 400
+        
+        invalid = {}
+        for index, payload in enumerate(companies):
+            if not isinstance(payload, dict):
+                invalid[index] = "Entry must be a JSON object"
+                continue
+            try:
+                extract_company_data(payload)
+            except PayloadValidationError as e:
+                invalid[index] = str(e)
+        if invalid:
+            return jsonify({"error": "Invalid batch entries", "invalid": invalid, "success": False}), 400
+        
+        print(f"✓ Received onboarding batch of {len(companies)} companies")
+        if Config.ONBOARDING_SYNC:
+            results = run_batch_onboarding(companies)
+            return jsonify(results), 200 if results["success"] else 500
+        
+        queue = get_job_queue()
+        job_id = queue.enqueue({"batch": companies})
+        return jsonify({
+            "success": True,
+            "job_id": job_id,
+            "status": "queued",
+            "status_url": f"/jobs/{job_id}",
+            "companies": len(companies)
+        }), 202
+    except Exception as e:
+        import traceback
+        print(f"\n❌ ERROR PROCESSING BATCH WEBHOOK: {e}")
+        return jsonify({
+            "error": str(e),
+            "error_type": type(e).__name__,
+            "traceback": traceback.format_exc()
+        }), 500
+
+
+@app.errorhandler(413)
+def request_too_large(e):
+    """Reject bodies over MAX_REQUEST_BYTES before they are read."""
+    return jsonify({
+        "error": f"Request body too large (limit {Config.MAX_REQUEST_BYTES} bytes)",
+        "success": False
+    }), 413
+
+
+@app.route('/jobs/<job_id>', methods=['GET'])
+def get_job_status(job_id):
+    """Return status, per-stage status and final results for a queued onboarding job."""
+    job = get_job_queue().get(job_id)
+    if job is None:
+        return jsonify({"error": f"Job not found: {job_id}", "success": False}), 404
+    return jsonify(job), 200
+
+
+@app.route('/stats/asset-cache', methods=['GET'])
+def asset_cache_stats():
+    """Hit/miss counters and size of the downloaded-image cache (this process)."""
+    if not Config.ASSET_CACHE_ENABLED:
+        return jsonify({"enabled": False}), 200
+    from asset_cache import get_asset_cache
+    return jsonify({"enabled": True, **get_asset_cache().stats()}), 200
+
+
+@app.route('/stats/cutout-cache', methods=['GET'])
+def cutout_cache_stats():
+    """Hit/miss counters and size of the background-removal result cache (this process)."""
+    from cutout_cache import get_cutout_cache
+    cache = get_cutout_cache()
+    if cache is None:
+        return jsonify({"enabled": False}), 200
+    return jsonify({"enabled": True, **cache.stats()}), 200
+
+
+@app.route('/stats/bg-removal', methods=['GET'])
+def bg_removal_stats():
+    """Recent latency/acceptance per background-removal strategy and the order they are tried in."""
+    import cutout_strategies
+    import segmentation
+    use_api = bool(Config.REMOVEBG_API_KEY and Config.REMOVEBG_API_KEY.strip())
+    strategies = (["removebg"] if use_api else []) + ["openai", "rembg"]
+    scheduler = cutout_strategies.get_scheduler()
+    return jsonify({
+        "adaptive": scheduler is not None,
+        "hedged": Config.BG_REMOVAL_HEDGE,
+        "order": cutout_strategies.order(strategies),
+        **(scheduler.stats() if scheduler is not None else {}),
+        "segmentation": segmentation.get_segmentation_service().stats(),
+    }), 200
+
+
+@app.route('/metrics', methods=['GET'])
+def prometheus_metrics():
+    """Per-stage and per-integration latency histograms (Prometheus text format, this process)."""
+    return metrics.render(), 200, {"Content-Type": "text/plain; version=0.0.4; charset=utf-8"}
+
+
 @app.route('/health', methods=['GET'])
 def health_check():
-    """Health check endpoint."""
-    return jsonify({"status": "healthy"}), 200
+    """Health check endpoint. Responds 503 until this worker has finished warming up."""
+    if not warmup.is_ready():
+        if not warmup.status()["started"]:
+            # Not started by gunicorn.conf.py (e.g. flask run): warm up now
+            warmup.start_background_warmup()
+        return jsonify({"status": "warming_up", "warmup": warmup.status()}), 503
+    return jsonify({"status": "healthy", "warmup": warmup.status()}), 200
 
 
 if __name__ == "__main__":
     port = int(os.getenv("PORT", 5001))  # Changed default to 5001
     # Disable debug mode in production
     debug_mode = os.getenv("FLASK_DEBUG", "False").lower() == "true"
+    if not Config.ONBOARDING_SYNC:
+        get_job_queue()
+    if Config.WARMUP_ENABLED:
+        warmup.start_background_warmup()
     app.run(host="0.0.0.0", port=port, debug=debug_mode)
 